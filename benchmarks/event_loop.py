@@ -0,0 +1,104 @@
+"""
+Throughput of the asyncio and uvloop event loops on the mock-server workload.
+
+Each round starts the mock DataForSEO API (tests/mock_dataforseo.py) plus a
+homepage server on the loop under test, then runs a DataForSEOClient
+through homepage fingerprinting and the two live enrichment calls for
+every domain, the same requests a WordPress domain costs in a real run.
+
+    python -m benchmarks.event_loop --domains 2000 --rounds 3
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from src.cache import JsonCache
+from src.data_processor import DataForSEOClient
+from src.event_loop import new_event_loop, resolve_loop
+from src.host_scheduler import HostScheduler
+from tests.mock_dataforseo import MockDataForSEO
+
+HOMEPAGE = ('<html><head><meta name="generator" content="WordPress 6.4">'
+            '<link rel="stylesheet" href="/wp-content/themes/astra/style.css"></head>'
+            '<body>' + '<p>Lorem ipsum dolor sit amet.</p>' * 200 + '</body></html>')
+
+
+def make_app():
+    app = MockDataForSEO().app()
+
+    async def homepage(request):
+        return web.Response(text=HOMEPAGE, content_type='text/html')
+
+    app.router.add_get('/site/{domain}/', homepage)
+    return app
+
+
+async def workload(domains, concurrency):
+    server = TestServer(make_app())
+    await server.start_server()
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            client = DataForSEOClient(cache=JsonCache(os.path.join(tmp_dir, 'cache.json')), mode='live')
+            client.BASE_URL = str(server.make_url('/v3'))
+            # Every mock site is on one local host; don't let the per-host cap serialise them
+            client.hosts = HostScheduler(limit=concurrency)
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def one(i):
+                domain = f"site{i}.com"
+                async with semaphore:
+                    await client.fingerprint_site(str(server.make_url(f'/site/{domain}/')))
+                    await client._api_call('domain_analytics/technologies/domain_technologies',
+                                           [{"target": domain}], 'domain_technologies')
+                    await client.get_backlink_data(domain)
+
+            async with client:
+                started = time.perf_counter()
+                await asyncio.gather(*(one(i) for i in range(domains)))
+                return time.perf_counter() - started
+    finally:
+        await server.close()
+
+
+def run_round(kind, domains, concurrency):
+    loop = new_event_loop(kind)
+    try:
+        asyncio.set_event_loop(loop)
+        return loop.run_until_complete(workload(domains, concurrency))
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--domains', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    kinds = ['asyncio']
+    if resolve_loop('uvloop') == 'uvloop':
+        kinds.append('uvloop')
+    else:
+        print("uvloop is not installed; timing asyncio only")
+
+    print(f"{'loop':<10}{'median s':>10}{'best s':>10}{'domains/s':>12}")
+    for kind in kinds:
+        times = [run_round(kind, args.domains, args.concurrency) for _ in range(args.rounds)]
+        print(f"{kind:<10}{statistics.median(times):>10.2f}{min(times):>10.2f}"
+              f"{args.domains / statistics.median(times):>12.0f}")
+
+
+if __name__ == '__main__':
+    main()
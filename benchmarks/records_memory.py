@@ -0,0 +1,74 @@
+"""
+Memory used by 1M leads and results: per-row dicts versus slotted records.
+
+Builds the rows the way each representation is produced at runtime (dicts
+as DataFrame.to_dict('records') made them, Lead / SiteResult as read_csv
+and the Worker make them now) and reports the traced allocation.
+
+    python -m benchmarks.records_memory --rows 1000000
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.records import Lead, SiteResult, LEAD_FIELDS
+
+
+def lead_values(i):
+    return (f"First{i}", f"Last{i}", f"user{i}@example.com", f"Org {i}", 'CEO',
+            f"site{i}.com", 15550000000.0 + i, f"https://linkedin.com/in/user{i}")
+
+
+def dict_leads(n):
+    # The frame is dropped once converted, so only the dicts stay traced
+    return pd.DataFrame([lead_values(i) for i in range(n)], columns=LEAD_FIELDS).to_dict('records')
+
+
+def record_leads(n):
+    return [Lead.from_values(*lead_values(i)) for i in range(n)]
+
+
+def dict_results(n):
+    return [{
+        'website': f"site{i}.com", 'linkedin_url': '', 'cms': 'WordPress', 'domain_rank': i % 1000,
+        'total_pages': i, 'indexed_pages': i, 'backlinks': i, 'backlink_domains': i,
+        'indexed_pending': False, 'partial': False, 'cms_confidence': None, 'lookup_failed': False
+    } for i in range(n)]
+
+
+def record_results(n):
+    return [SiteResult(f"site{i}.com", '', 'WordPress', i % 1000, i, i, i, i) for i in range(n)]
+
+
+def measure(build, n):
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    rows = build(n)
+    elapsed = time.perf_counter() - started
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del rows
+    return size, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f"{'representation':<22}{'MB':>10}{'bytes/row':>12}{'build s':>10}")
+    for name, build in [('lead dicts', dict_leads), ('Lead records', record_leads),
+                        ('result dicts', dict_results), ('SiteResult records', record_results)]:
+        size, elapsed = measure(build, args.rows)
+        print(f"{name:<22}{size / 2**20:>10.1f}{size / args.rows:>12.0f}{elapsed:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,6 +3,9 @@ import logging
 import argparse
 from PyQt6.QtWidgets import QApplication
 from src.gui.main_window import MainWindow
+from src.utils import setup_logging
+from src.constants import EVENT_LOOP
+from src.event_loop import LOOP_CHOICES
 
 def main():
     parser = argparse.ArgumentParser(description='SEO Data Extraction Tool')
@@ -12,14 +15,20 @@ def main():
         choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
         help='Set the logging level (default: ERROR)'
     )
-    
+    parser.add_argument(
+        '--event-loop',
+        default=EVENT_LOOP,
+        choices=LOOP_CHOICES,
+        help=f'Event loop for processing; auto uses uvloop on Linux when installed (default: {EVENT_LOOP})'
+    )
+
     args = parser.parse_args()
     
-    # Set the log level for the root logger
-    logging.getLogger().setLevel(getattr(logging, args.log_level.upper()))
+    # Set the log level for the root logger and send logging through the queue
+    setup_logging(level=getattr(logging, args.log_level.upper()))
     
     app = QApplication(sys.argv)
-    window = MainWindow()
+    window = MainWindow(event_loop=args.event_loop)
     window.show()
 
     return app.exec()
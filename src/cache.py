@@ -0,0 +1,67 @@
+import os
+import json
+import logging
+from typing import Any, Dict, Optional
+from src.constants import CACHE_FILE
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class JsonCache:
+    """
+    Persistent key/value store backed by a single JSON file.
+
+    Entries are grouped into namespaces (e.g. 'canonical_origins') so several
+    features can share one file. Changes are held in memory and only written
+    out by `save`, which replaces the file atomically.
+    """
+
+    def __init__(self, path: str = CACHE_FILE):
+        self.path = path
+        self._data: Dict[str, Dict[str, Any]] = self._load()
+        self._dirty = False
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+                    if isinstance(data, dict):
+                        return data
+        except Exception as e:
+            logger.warning("Could not load cache file %s: %s", self.path, e)
+        return {}
+
+    def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        return self._data.get(namespace, {}).get(key, default)
+
+    def set(self, namespace: str, key: str, value: Any):
+        self._data.setdefault(namespace, {})[key] = value
+        self._dirty = True
+
+    def delete(self, namespace: str, key: str):
+        if self._data.get(namespace, {}).pop(key, None) is not None:
+            self._dirty = True
+
+    def namespace(self, namespace: str) -> Dict[str, Any]:
+        """Return the live dictionary for a namespace, creating it if needed."""
+        return self._data.setdefault(namespace, {})
+
+    def mark_dirty(self):
+        self._dirty = True
+
+    def save(self) -> Optional[str]:
+        """Write pending changes to disk. Returns the path written, if any."""
+        if not self._dirty:
+            return None
+        tmp_path = self.path + '.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(self._data, f)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+            return self.path
+        except Exception as e:
+            logger.error("Error saving cache file %s: %s", self.path, e)
+            return None
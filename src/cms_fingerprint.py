@@ -0,0 +1,188 @@
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+from src.constants import CMS_MIN_CONFIDENCE
+
+# Reported for a site that answered but matched no signature strongly enough
+OTHER_CMS = 'Other'
+
+# (cms, source, pattern, weight). Sources:
+#   'header:<Name>'  regex on that response header's value
+#   'cookie'         regex on the names of cookies the response sets
+#   'generator'      regex on the <meta name="generator"> content
+#   'html'           regex on the lowercased page body (so no \D, \S, \W or \B)
+# Weights are how sure one match makes us (0-1); matches for a CMS are
+# combined as independent evidence.
+SIGNATURES: List[Tuple[str, str, str, float]] = [
+    # WordPress
+    ('WordPress', 'header:Link', r'api\.w\.org', 0.95),
+    ('WordPress', 'header:X-Pingback', r'/xmlrpc\.php', 0.9),
+    ('WordPress', 'header:X-Redirect-By', r'^wordpress', 0.95),
+    ('WordPress', 'header:X-Powered-By', r'wordpress|wp engine', 0.9),
+    ('WordPress', 'cookie', r'^(?:wordpress_|wp-settings-|wp_woocommerce_session_)', 0.8),
+    ('WordPress', 'generator', r'^wordpress', 0.95),
+    ('WordPress', 'html', r'/wp-content/themes/.+?/', 0.9),
+    ('WordPress', 'html', r'/wp-includes/js/wp-emoji-release\.min\.js', 0.9),
+    ('WordPress', 'html', r'/wp-content/', 0.8),
+    ('WordPress', 'html', r'wp-json', 0.6),
+    ('WordPress', 'html', r'wp-admin', 0.5),
+    ('WordPress', 'html', r'wp-login\.php', 0.5),
+    # Shopify
+    ('Shopify', 'header:X-ShopId', r'.', 0.95),
+    ('Shopify', 'header:X-Shopify-Stage', r'.', 0.95),
+    ('Shopify', 'header:Powered-By', r'shopify', 0.95),
+    ('Shopify', 'cookie', r'^_shopify_[sy]$', 0.8),
+    ('Shopify', 'html', r'cdn\.shopify\.com', 0.9),
+    ('Shopify', 'html', r'Shopify\.theme', 0.9),
+    ('Shopify', 'html', r'\.myshopify\.com', 0.6),
+    # Wix
+    ('Wix', 'header:X-Wix-Request-Id', r'.', 0.95),
+    ('Wix', 'header:Server', r'^pepyaka', 0.9),
+    ('Wix', 'generator', r'^wix\.com', 0.95),
+    ('Wix', 'html', r'wixstatic\.com', 0.8),
+    ('Wix', 'html', r'apps\.wix\.com', 0.7),
+    # Squarespace
+    ('Squarespace', 'header:Server', r'^squarespace', 0.95),
+    ('Squarespace', 'cookie', r'^SS_MID$', 0.7),
+    ('Squarespace', 'html', r'static1\.squarespace\.com', 0.9),
+    ('Squarespace', 'html', r'Static\.SQUARESPACE_CONTEXT', 0.9),
+    # Drupal
+    ('Drupal', 'header:X-Generator', r'^drupal', 0.95),
+    ('Drupal', 'header:X-Drupal-Cache', r'.', 0.95),
+    ('Drupal', 'header:X-Drupal-Dynamic-Cache', r'.', 0.95),
+    ('Drupal', 'cookie', r'^SS?ESS[0-9a-f]{32}$', 0.4),
+    ('Drupal', 'generator', r'^drupal', 0.95),
+    ('Drupal', 'html', r'drupal-settings-json|Drupal\.settings', 0.9),
+    ('Drupal', 'html', r'data-drupal-', 0.9),
+    ('Drupal', 'html', r'/sites/default/', 0.8),
+    ('Drupal', 'html', r'drupal\.js', 0.8),
+    ('Drupal', 'html', r'/modules/', 0.2),
+    # Joomla
+    ('Joomla', 'generator', r'^joomla', 0.95),
+    ('Joomla', 'html', r'/media/jui/', 0.8),
+    ('Joomla', 'html', r'/components/com_', 0.6),
+    ('Joomla', 'html', r'/media/system/js/', 0.6),
+    # Webflow
+    ('Webflow', 'generator', r'^webflow', 0.95),
+    ('Webflow', 'html', r'data-wf-(?:page|site)=', 0.9),
+    ('Webflow', 'html', r'assets\.website-files\.com', 0.8),
+    # Ghost
+    ('Ghost', 'generator', r'^ghost', 0.95),
+    ('Ghost', 'header:X-Ghost-Cache-Status', r'.', 0.9),
+    # Magento
+    ('Magento', 'header:X-Magento-Cache-Debug', r'.', 0.9),
+    ('Magento', 'cookie', r'^X-Magento-Vary$', 0.8),
+    ('Magento', 'html', r'Mage\.Cookies|mage/cookies', 0.8),
+    ('Magento', 'html', r'/static/version\d+/frontend/', 0.8),
+    # BigCommerce
+    ('BigCommerce', 'html', r'cdn\d*\.bigcommerce\.com', 0.9),
+    # Weebly
+    ('Weebly', 'html', r'editmysite\.com', 0.9),
+    # HubSpot CMS
+    ('HubSpot', 'generator', r'^hubspot', 0.95),
+    # TYPO3
+    ('TYPO3', 'generator', r'^typo3', 0.95),
+]
+
+# Both run on the lowercased page
+_GENERATOR_RE = re.compile(r'<meta\s[^>]*name\s*=\s*["\']?generator["\']?[^>]*>')
+_CONTENT_RE = re.compile(r'content\s*=\s*["\']([^"\']*)["\']')
+
+
+class Fingerprint(NamedTuple):
+    cms: str
+    confidence: float
+    evidence: List[str]
+
+
+class CMSFingerprinter:
+    """
+    Identifies a site's CMS from its homepage response.
+
+    The signature table is compiled once: header and cookie signatures are
+    grouped so each header is only looked at by the signatures that use it.
+    The body is lowercased once and each HTML signature searched for
+    case-sensitively, stopping at its first hit; that lets re skip ahead on
+    the pattern's literal prefix, which IGNORECASE (or one big alternation)
+    prevents, and is well over ten times faster on a typical page.
+    """
+
+    def __init__(self, signatures: Iterable[Tuple[str, str, str, float]] = SIGNATURES,
+                 min_confidence: float = CMS_MIN_CONFIDENCE):
+        self.min_confidence = min_confidence
+        self._signatures = list(signatures)
+        self._headers: Dict[str, List[Tuple[int, re.Pattern]]] = defaultdict(list)
+        self._cookies: List[Tuple[int, re.Pattern]] = []
+        self._generator: List[Tuple[int, re.Pattern]] = []
+        self._html: List[Tuple[int, re.Pattern]] = []
+
+        for i, (_, source, pattern, _) in enumerate(self._signatures):
+            if source.startswith('header:'):
+                self._headers[source.split(':', 1)[1].lower()].append((i, re.compile(pattern, re.IGNORECASE)))
+            elif source == 'cookie':
+                self._cookies.append((i, re.compile(pattern)))
+            elif source == 'generator':
+                self._generator.append((i, re.compile(pattern, re.IGNORECASE)))
+            elif source == 'html':
+                self._html.append((i, re.compile(pattern.lower())))
+            else:
+                raise ValueError(f"Unknown signature source: {source}")
+
+    def _match_headers(self, headers: Mapping[str, str]) -> Iterable[int]:
+        for name, value in headers.items():
+            for i, pattern in self._headers.get(name.lower(), ()):
+                if pattern.search(value):
+                    yield i
+
+    def _match_cookies(self, cookie_names: Iterable[str]) -> Iterable[int]:
+        for name in cookie_names:
+            for i, pattern in self._cookies:
+                if pattern.search(name):
+                    yield i
+
+    def _match_html(self, html: str) -> Iterable[int]:
+        page = html.lower()
+        tag = _GENERATOR_RE.search(page)
+        content = _CONTENT_RE.search(tag.group(0)) if tag else None
+        if content:
+            generator = content.group(1).strip()
+            for i, pattern in self._generator:
+                if pattern.search(generator):
+                    yield i
+        for i, pattern in self._html:
+            if pattern.search(page):
+                yield i
+
+    def score(self, matched: Iterable[int]) -> Dict[str, Tuple[float, List[str]]]:
+        """Combine matched signatures into a confidence and evidence list per CMS."""
+        doubt: Dict[str, float] = defaultdict(lambda: 1.0)
+        evidence: Dict[str, List[str]] = defaultdict(list)
+        for i in sorted(set(matched)):
+            cms, source, pattern, weight = self._signatures[i]
+            doubt[cms] *= 1.0 - weight
+            evidence[cms].append(f"{source} {pattern}")
+        return {cms: (round(1.0 - doubt[cms], 3), evidence[cms]) for cms in doubt}
+
+    def identify(self, headers: Mapping[str, str], cookie_names: Iterable[str] = (),
+                 html: Optional[str] = None) -> Fingerprint:
+        matched = [*self._match_headers(headers), *self._match_cookies(cookie_names)]
+        if html:
+            matched.extend(self._match_html(html))
+        return self._best(matched)
+
+    def identify_headers(self, headers: Mapping[str, str], cookie_names: Iterable[str] = ()) -> Fingerprint:
+        """Verdict from headers and cookies alone, before any body is read."""
+        return self._best([*self._match_headers(headers), *self._match_cookies(cookie_names)])
+
+    def _best(self, matched: Iterable[int]) -> Fingerprint:
+        scores = self.score(matched)
+        if not scores:
+            return Fingerprint(OTHER_CMS, 0.0, [])
+        cms, (confidence, evidence) = max(scores.items(), key=lambda item: item[1][0])
+        if confidence < self.min_confidence:
+            return Fingerprint(OTHER_CMS, confidence, evidence)
+        return Fingerprint(cms, confidence, evidence)
+
+
+# Compiled once and shared by every client
+fingerprinter = CMSFingerprinter()
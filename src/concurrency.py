@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+from src.constants import AIMD_INCREASE, AIMD_DECREASE, AIMD_LATENCY_TOLERANCE
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit that adjusts itself (AIMD) to what the far end can take.
+
+    Work holds a slot between `acquire` and `release`; `acquire` waits while
+    `limit` slots are in use. Completions are grouped into windows of
+    `limit` each. At the end of a window the limit grows by `increase` when
+    callers had to wait for a slot, throughput beat the previous window's
+    and mean latency stayed within `latency_tolerance` of the best window
+    seen so far.
+
+    Timeouts and 429/503 responses are reported with `record_overload`.
+    With `overload_ratio` 0 the first one in a window multiplies the limit
+    by `decrease` at once; otherwise the cut happens at the end of a window
+    in which at least that many overloads per completion were reported, so
+    the odd dead website does not throttle everything else.
+    """
+
+    def __init__(self, name: str, initial: int, minimum: int, maximum: int,
+                 increase: int = AIMD_INCREASE, decrease: float = AIMD_DECREASE,
+                 latency_tolerance: float = AIMD_LATENCY_TOLERANCE, overload_ratio: float = 0.0):
+        if not 1 <= minimum <= initial <= maximum:
+            raise ValueError(f"{name} limiter needs 1 <= minimum <= initial <= maximum")
+        self.name = name
+        self.limit = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self.overload_ratio = overload_ratio
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+        self.increases = 0
+        self.decreases = 0
+        self.overloads = 0
+        self._best_latency: Optional[float] = None
+        self._previous_throughput: Optional[float] = None
+        self._reset_window()
+
+    def _reset_window(self):
+        self._window_started = time.monotonic()
+        self._window_done = 0
+        self._window_latency = 0.0
+        self._window_overloads = 0
+        self._window_waited = False
+        self._window_cut = False
+
+    async def acquire(self):
+        while self.in_flight >= self.limit:
+            self._window_waited = True
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                else:
+                    self._wake()  # Pass on the wake-up we were given
+                raise
+        self.in_flight += 1
+
+    def release(self, latency: Optional[float] = None):
+        """Free a slot; `latency` is how long the work took, None if it was abandoned."""
+        self.in_flight -= 1
+        if latency is not None:
+            self._window_done += 1
+            self._window_latency += latency
+            if self._window_done >= self.limit:
+                self._close_window()
+        self._wake()
+
+    def _wake(self):
+        free = self.limit - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    def record_overload(self):
+        self.overloads += 1
+        self._window_overloads += 1
+        if self.overload_ratio == 0 and not self._window_cut:
+            self._cut()
+
+    def _cut(self):
+        self._window_cut = True
+        limit = max(self.minimum, int(self.limit * self.decrease))
+        if limit < self.limit:
+            logger.info("%s concurrency %s -> %s after overload", self.name, self.limit, limit)
+            self.limit = limit
+            self.decreases += 1
+        # Throughput at the old limit is no yardstick for the new one
+        self._previous_throughput = None
+
+    def _close_window(self):
+        elapsed = max(time.monotonic() - self._window_started, 1e-9)
+        throughput = self._window_done / elapsed
+        latency = self._window_latency / self._window_done
+        if self._best_latency is None or latency < self._best_latency:
+            self._best_latency = latency
+
+        if self.overload_ratio and self._window_overloads / self._window_done >= self.overload_ratio:
+            self._cut()
+        elif (not self._window_cut and self._window_waited and self.limit < self.maximum
+              and (self._previous_throughput is None or throughput > self._previous_throughput)
+              and latency <= self._best_latency * self.latency_tolerance):
+            self.limit = min(self.maximum, self.limit + self.increase)
+            self.increases += 1
+            logger.debug("%s concurrency raised to %s (%.1f/s, %.2fs mean latency)",
+                         self.name, self.limit, throughput, latency)
+        if not self._window_cut:
+            self._previous_throughput = throughput
+        self._reset_window()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'limit': self.limit, 'in_flight': self.in_flight,
+            'minimum': self.minimum, 'maximum': self.maximum,
+            'increases': self.increases, 'decreases': self.decreases, 'overloads': self.overloads,
+        }
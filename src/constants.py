@@ -29,36 +29,166 @@ DATAFORSEO_LOGIN = api_credentials.get('dataforseo_login', '')
 DATAFORSEO_PASSWORD = api_credentials.get('dataforseo_password', '')
 GOOGLE_API_KEY = api_credentials.get('google_api_key', '')
 GOOGLE_CSE_ID = api_credentials.get('google_cse_id', '')
+# 'live' sends one request per domain to the /live endpoints; 'standard' posts
+# tasks in bulk to the cheaper task_post / tasks_ready / task_get queue
+DATAFORSEO_MODE = persistent_config.get('dataforseo_mode', 'live')
+# Event loop the Worker runs on: 'asyncio', 'uvloop', or 'auto' (uvloop on
+# Linux when installed); main.py's --event-loop overrides it. asyncio stays the
+# default: benchmarks/event_loop.py shows no gain from uvloop for this workload
+EVENT_LOOP = persistent_config.get('event_loop', 'asyncio')
 
 # API Request Configuration
 MAX_RETRIES = 3
 INITIAL_RETRY_DELAY = 2
 MAX_RETRY_DELAY = 15
 RETRY_MULTIPLIER = 2
+RETRY_AFTER_MAX = 60  # Longest Retry-After we are willing to honour
+# Retries each endpoint may spend over a whole run before failing fast
+RETRY_BUDGETS = {
+    'domain_technologies': 200,
+    'backlinks_summary': 200,
+    'google_cse': 50,
+}
+# Per-host circuit breaker
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_TIMEOUT = 60
+# Scraped sites: concurrent requests per host, and consecutive failures
+# (timeouts, connection errors, 429/503) before the rest are skipped
+HOST_CONCURRENCY_LIMIT = 4
+HOST_FAILURE_THRESHOLD = 3
+HOST_BREAKER_RESET_TIMEOUT = 300
+# A robots.txt Crawl-delay spaces out requests to its host; longer delays are
+# capped so one site cannot hold a domain beyond its time budget
+CRAWL_DELAY_MAX = 10
+# Google Custom Search daily quota; the last CSE_QUOTA_RESERVE queries of the
+# day are kept for domains ranked at least CSE_PRIORITY_MIN_RANK, the rest are
+# deferred to a later run and shown as pending
+CSE_DAILY_QUOTA = 10000
+CSE_QUOTA_RESERVE = 1000
+CSE_PRIORITY_MIN_RANK = 100
+CSE_RESULT_TTL_DAYS = 30  # How long a cached totalResults is reused
 
 # Request Timeouts (in seconds)
 DEFAULT_TIMEOUT = 45
 SITEMAP_TIMEOUT = 30
 ROBOTS_TIMEOUT = 20
+CONNECT_TIMEOUT = 15
+# Total time one domain may spend being worked on (excluding queue waits);
+# once spent, the domain is returned with whatever was collected, flagged partial
+DOMAIN_TIME_BUDGET = 180
 
 # Rate Limiting
 REQUESTS_PER_SECOND = 1
 RATE_LIMIT_WINDOW = 2
 
+# CMS detection: a CMS is reported when its signatures reach CMS_MIN_CONFIDENCE;
+# WordPress below CMS_CONFIRM_CONFIDENCE is confirmed with a /wp-json/ request
+CMS_MIN_CONFIDENCE = 0.5
+CMS_CONFIRM_CONFIDENCE = 0.8
+# Headers alone at this confidence settle the CMS without downloading the body
+CMS_HEADER_CONFIDENCE = 0.9
+
 # Sitemap Configuration
 MAX_SITEMAP_DEPTH = 2
 MAX_URLS_PER_SITEMAP = 50000  # Google's sitemap limit
+# Estimate totals from a few pages of paginated WordPress sitemaps instead of
+# downloading every child; set to True to always count every <loc>
+EXACT_PAGE_COUNT = False
+SITEMAP_SAMPLE_PAGES = 3  # Full pages sampled per paginated family
+WP_CORE_SITEMAP_PAGE_SIZE = 2000  # wp_sitemaps_get_max_urls() default
+YOAST_SITEMAP_PAGE_SIZE = 1000  # Yoast / Rank Math entries per page
+# Each domain's sitemaps are crawled from one frontier: shallow sitemaps first,
+# SITEMAP_WORKERS fetches at a time, and no more than SITEMAP_MAX_DOCUMENTS
+# sitemaps or SITEMAP_MAX_BYTES of decoded XML; past a budget the count is a lower bound
+SITEMAP_WORKERS = 4
+SITEMAP_MAX_DOCUMENTS = 1000
+SITEMAP_MAX_BYTES = 200 * 1024 * 1024
+
+# Response bodies are read in chunks of READ_CHUNK_SIZE; the first
+# CHARSET_SNIFF_BYTES are searched for a <meta charset> when the headers name none
+READ_CHUNK_SIZE = 64 * 1024
+CHARSET_SNIFF_BYTES = 4096
+
+# Staged Pipeline
+# Each stage's concurrency is adaptive (AIMD): it starts at *_CONCURRENCY and
+# moves between the *_MIN / *_MAX bounds, see src/concurrency.py
+# Stage 1 (triage) only scrapes homepages, so it can run wide. A cut needs
+# TRIAGE_OVERLOAD_RATIO timeouts / 429s per domain, as single sites often fail
+TRIAGE_CONCURRENCY = 20
+TRIAGE_CONCURRENCY_MIN = 4
+TRIAGE_CONCURRENCY_MAX = 100
+TRIAGE_OVERLOAD_RATIO = 0.2
+TRIAGE_QUEUE_SIZE = 100
+# Stage 2 (enrichment) makes the paid API calls for WordPress sites; any
+# API timeout or 429 cuts its concurrency at once
+ENRICH_CONCURRENCY = 3
+ENRICH_CONCURRENCY_MIN = 1
+ENRICH_CONCURRENCY_MAX = 20
+ENRICH_QUEUE_SIZE = 50
+ENRICH_REQUESTS_PER_SECOND = 1
+# In standard mode enrichment mostly waits on queued tasks, so it runs wider
+QUEUE_ENRICH_CONCURRENCY = 200
+QUEUE_ENRICH_QUEUE_SIZE = 400
+QUEUE_ENRICH_REQUESTS_PER_SECOND = 20
+
+# DataForSEO standard queue
+QUEUE_POST_BATCH_SIZE = 100  # Tasks per task_post request (API maximum)
+QUEUE_FLUSH_INTERVAL = 2  # Seconds a partial batch waits before it is posted
+QUEUE_POLL_MIN_INTERVAL = 5
+QUEUE_POLL_MAX_INTERVAL = 60
+QUEUE_POLL_BACKOFF = 1.5  # Poll interval growth while nothing is ready
+QUEUE_TASK_TIMEOUT = 3600  # Give up on a task not ready after this long
+
+# Local cache for data reused across runs (canonical origins, HTTP validators,
+# Google CSE usage and results)
+CACHE_FILE = 'http_cache.json'
+# Finished domains per job settings, so a re-run or edited input list only
+# processes the domains without a result; results older than the TTL are redone
+JOBS_DIR = 'jobs'
+JOB_RESULT_TTL_DAYS = 30
 
-# Memory Management
-CHUNK_SIZE = 10
-CHUNK_DELAY = 5
-MAX_CONCURRENT_REQUESTS = 3
+# Results are streamed to the per-CMS export files while processing; buffered
+# rows are appended every EXPORT_FLUSH_ROWS rows or EXPORT_FLUSH_INTERVAL seconds
+EXPORT_FLUSH_ROWS = 500
+EXPORT_FLUSH_INTERVAL = 5
+
+# Rows per chunk when loading the input CSV in the background
+CSV_CHUNK_ROWS = 5000
+INPUT_WAIT_INTERVAL = 0.2  # Seconds the Worker waits for the next chunk when it has caught up
+
+# Results table: how often rows updated by new results are repainted
+TABLE_REFRESH_INTERVAL_MS = 250
+
+# AIMD steps: +AIMD_INCREASE per window of completions while throughput grows
+# and mean latency stays within AIMD_LATENCY_TOLERANCE x the best seen;
+# x AIMD_DECREASE on overload
+AIMD_INCREASE = 1
+AIMD_DECREASE = 0.5
+AIMD_LATENCY_TOLERANCE = 1.5
 
 # Connection Management
-TCP_CONNECTOR_LIMIT = 50
+# Enough connections for every triage domain at the adaptive maximum plus API calls
+TCP_CONNECTOR_LIMIT = TRIAGE_CONCURRENCY_MAX + 50
 FORCE_CLOSE_CONNECTIONS = True
 ENABLE_CLEANUP_CLOSED = True
 
+# Run metrics report
+METRICS_SAMPLE_INTERVAL = 10  # Seconds between throughput samples
+METRICS_SLOWEST_DOMAINS = 10
+# Estimated USD per billable call, per DataForSEO mode; set to your plan's prices
+API_CALL_COSTS = {
+    'live': {'domain_technologies': 0.01, 'backlinks_summary': 0.02, 'google_cse': 0.005},
+    'standard': {'domain_technologies': 0.006, 'backlinks_summary': 0.012, 'google_cse': 0.005},
+}
+
+# Logging
+LOG_MAX_BYTES = 10 * 1024 * 1024  # Rotate the log file at this size
+LOG_BACKUP_COUNT = 5
+# Records sharing a message template: at most LOG_REPEAT_BURST per
+# LOG_REPEAT_WINDOW seconds, the rest are counted and dropped
+LOG_REPEAT_BURST = 50
+LOG_REPEAT_WINDOW = 10
+
 # Error Messages
 ERROR_MESSAGES = {
     'auth_failed': 'Authentication failed. Please check your credentials.',
@@ -0,0 +1,160 @@
+import codecs
+import logging
+import re
+import zlib
+from typing import List, Optional
+import brotli
+from src.constants import CHARSET_SNIFF_BYTES
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+_META_CHARSET_RE = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([\w.:-]+)', re.IGNORECASE)
+_XML_ENCODING_RE = re.compile(rb'^\s*<\?xml[^>]+encoding\s*=\s*["\']([\w.:-]+)', re.IGNORECASE)
+_BOMS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+
+class _Identity:
+    def decompress(self, data):
+        return data
+
+    def flush(self) -> bytes:
+        return b''
+
+
+class _Brotli:
+    def __init__(self):
+        self._decompressor = brotli.Decompressor()
+
+    def decompress(self, data):
+        return self._decompressor.process(data)
+
+    def flush(self) -> bytes:
+        return b''
+
+
+class _Deflate:
+    """'deflate' is meant to be zlib-wrapped, but some servers send it raw."""
+
+    def __init__(self):
+        self._decompressor = zlib.decompressobj()
+        self._started = False
+
+    def decompress(self, data):
+        try:
+            return self._decompressor.decompress(data)
+        except zlib.error:
+            if self._started:
+                raise
+            self._decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+            return self._decompressor.decompress(data)
+        finally:
+            self._started = True
+
+    def flush(self) -> bytes:
+        return self._decompressor.flush()
+
+
+def _decompressor(content_encoding: Optional[str]):
+    encoding = (content_encoding or '').strip().lower()
+    if encoding in ('', 'identity'):
+        return _Identity()
+    if encoding == 'br':
+        return _Brotli()
+    if encoding in ('gzip', 'x-gzip'):
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    if encoding == 'deflate':
+        return _Deflate()
+    raise ValueError(f"Unsupported Content-Encoding: {content_encoding}")
+
+
+def _codec(name: Optional[str]) -> Optional[str]:
+    if not name:
+        return None
+    try:
+        return codecs.lookup(name.strip()).name
+    except LookupError:
+        logger.info("Unknown charset %s", name)
+        return None
+
+
+def _bom_charset(head) -> Optional[str]:
+    return next((charset for bom, charset in _BOMS if head.startswith(bom)), None)
+
+
+def sniff_charset(head) -> Optional[str]:
+    """Charset declared by a byte-order mark, an XML declaration or a <meta> tag at the start of a document."""
+    bom = _bom_charset(head)
+    if bom:
+        return bom
+    match = _XML_ENCODING_RE.match(head) or _META_CHARSET_RE.search(head)
+    return _codec(match.group(1).decode('ascii')) if match else None
+
+
+class StreamDecoder:
+    """
+    Decompresses and decodes a response body chunk by chunk.
+
+    Chunks go straight from the network through an incremental brotli/zlib
+    decompressor into an incremental text decoder, so neither the
+    compressed nor the decompressed body is ever held as one bytes object.
+    The first `sniff_bytes` of decompressed data are held back to look for
+    a BOM or a <meta charset> when the headers did not name one; undecodable
+    bytes are replaced rather than failing the page.
+    """
+
+    def __init__(self, content_encoding: Optional[str] = None, charset: Optional[str] = None,
+                 sniff_bytes: int = CHARSET_SNIFF_BYTES):
+        self.content_encoding = content_encoding
+        self._decompressor = _decompressor(content_encoding)
+        self._charset = _codec(charset)
+        self._sniff_bytes = sniff_bytes
+        self._head = bytearray()
+        self._decoder = None
+        self._parts: List[str] = []
+        self._fed = False
+
+    @property
+    def charset(self) -> Optional[str]:
+        return self._charset
+
+    def feed(self, chunk) -> None:
+        try:
+            data = self._decompressor.decompress(chunk)
+        except (zlib.error, brotli.error):
+            if self._fed:
+                raise
+            # Mislabelled body; read it as sent, like a browser would
+            logger.info("Body is not %s-encoded, reading it as is", self.content_encoding)
+            self._decompressor = _Identity()
+            data = chunk
+        self._fed = True
+        self._write(data)
+
+    def _write(self, data) -> None:
+        if self._decoder is not None:
+            self._parts.append(self._decoder.decode(data))
+            return
+        self._head += data
+        if len(self._head) >= self._sniff_bytes:
+            self._start_decoding()
+
+    def _start_decoding(self) -> None:
+        # A BOM outranks the headers, which outrank the document's own declaration
+        self._charset = _bom_charset(self._head) or self._charset or sniff_charset(self._head) or 'utf-8'
+        self._decoder = codecs.getincrementaldecoder(self._charset)(errors='replace')
+        self._parts.append(self._decoder.decode(memoryview(self._head)))
+        self._head = bytearray()
+
+    def finish(self) -> str:
+        self._write(self._decompressor.flush())
+        if self._decoder is None:
+            self._start_decoding()
+        self._parts.append(self._decoder.decode(b'', final=True))
+        text = ''.join(self._parts)
+        self._parts = []
+        return text
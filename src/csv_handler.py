@@ -2,6 +2,8 @@ import pandas as pd
 import csv
 import logging
 import os
+from src.records import Lead, LEAD_FIELDS
+from src.constants import CSV_CHUNK_ROWS
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -14,87 +16,151 @@ def clean_domain(url):
             url = url.split('://', 1)[1]
     return url
 
+# Input column names we accept (old_name: new_name)
+COLUMN_MAPPINGS = {
+    'firstName': 'first_name',
+    'lastName': 'last_name',
+    'email': 'email',
+    'companyName': 'organization_name',
+    'title': 'title',
+    'website': 'website_url',
+    'phoneNumbers': 'phone_number',
+    'linkedIn': 'linkedin_url'
+}
+
+def _map_columns(df):
+    """Rename known input columns and check every lead field is present."""
+    df = df.rename(columns={old: new for old, new in COLUMN_MAPPINGS.items() if old in df.columns})
+
+    # Ensure we're using the correct column for email
+    if 'email' not in df.columns and 'personal_email' in df.columns:
+        logger.info("Using 'personal_email' as 'email'")
+        df['email'] = df['personal_email']
+
+    missing_fields = [field for field in LEAD_FIELDS if field not in df.columns]
+    if missing_fields:
+        raise ValueError(f"Missing required fields in CSV: {', '.join(missing_fields)}. "
+                         f"Available fields: {', '.join(map(str, df.columns))}")
+    return df
+
+def _to_leads(df):
+    """Select the lead fields, strip URL protocols and build Lead records."""
+    df = df[LEAD_FIELDS].copy()
+    df['website_url'] = df['website_url'].apply(clean_domain)
+    # Compact slotted records instead of one dict per row
+    return [Lead.from_values(*values) for values in df.itertuples(index=False, name=None)]
+
+def iter_csv_chunks(file_path, chunk_size=CSV_CHUNK_ROWS):
+    """
+    Read the leads CSV in chunks of `chunk_size` rows.
+
+    Yields (leads, fraction of the file read so far). Raises ValueError
+    when required columns are missing.
+    """
+    logger.info("Reading CSV file in chunks of %s rows: %s", chunk_size, file_path)
+    file_size = os.path.getsize(file_path) or 1
+    with open(file_path, 'rb') as handle:
+        for chunk in pd.read_csv(handle, chunksize=chunk_size):
+            leads = _to_leads(_map_columns(chunk))
+            yield leads, min(1.0, handle.tell() / file_size)
+
 def read_csv(file_path):
     try:
-        logger.info(f"Attempting to read CSV file: {file_path}")
+        logger.info("Attempting to read CSV file: %s", file_path)
         df = pd.read_csv(file_path)
-        logger.info(f"Successfully read CSV with columns: {df.columns.tolist()}")
-        
-        # Define column mappings (old_name: new_name)
-        column_mappings = {
-            'firstName': 'first_name',
-            'lastName': 'last_name',
-            'email': 'email',
-            'companyName': 'organization_name',
-            'title': 'title',
-            'website': 'website_url',
-            'phoneNumbers': 'phone_number',
-            'linkedIn': 'linkedin_url'
-        }
-        
-        # Log original column names
-        logger.info("Original columns before mapping:")
-        for col in df.columns:
-            logger.info(f"  - {col}")
-        
-        # Rename columns based on mappings
-        for old_name, new_name in column_mappings.items():
-            if old_name in df.columns:
-                logger.info(f"Mapping column {old_name} to {new_name}")
-                df = df.rename(columns={old_name: new_name})
-        
-        # Log mapped column names
-        logger.info("Columns after mapping:")
-        for col in df.columns:
-            logger.info(f"  - {col}")
-        
-        required_fields = [
-            'first_name', 'last_name', 'email', 'organization_name', 'title',
-            'website_url', 'phone_number', 'linkedin_url'
-        ]
-        
-        # Check if all required fields are present in the CSV
-        missing_fields = [field for field in required_fields if field not in df.columns]
-        if missing_fields:
-            logger.error(f"Missing required fields in CSV: {', '.join(missing_fields)}")
-            logger.error("Available fields: " + ", ".join(df.columns))
-            return None
-        
-        # Ensure we're using the correct column for email
-        if 'email' not in df.columns and 'personal_email' in df.columns:
-            logger.info("Using 'personal_email' as 'email'")
-            df['email'] = df['personal_email']
-        
-        # Clean website URLs to remove protocols
-        if 'website_url' in df.columns:
-            logger.info("Cleaning website URLs to remove protocols")
-            df['website_url'] = df['website_url'].apply(clean_domain)
-        
-        # Select only the required fields
-        df = df[required_fields]
-        
-        # Log the number of rows
-        logger.info(f"Found {len(df)} rows in CSV")
-        
-        # Convert DataFrame to list of dictionaries for compatibility with existing code
-        records = df.to_dict('records')
-        logger.info(f"Converted {len(records)} rows to records format")
-        
+        logger.info("Successfully read CSV with columns: %s", df.columns.tolist())
+
+        records = _to_leads(_map_columns(df))
+        logger.info("Converted %s rows to lead records", len(records))
+
         # Log a sample of the data
         if records:
             logger.info("Sample of first record:")
-            for key, value in records[0].items():
-                logger.info(f"  {key}: {value}")
+            for key in LEAD_FIELDS:
+                logger.info("  %s: %s", key, getattr(records[0], key))
 
         return records
 
     except Exception as e:
-        logger.error(f"Error reading CSV: {str(e)}")
+        logger.error("Error reading CSV: %s", e)
         return None
 
+# Supported export formats: file extension and writer
+EXPORT_FORMATS = {
+    'csv': '.csv',
+    'parquet': '.parquet',
+    'arrow': '.arrow',
+}
+
+def _write_frame(df, output_file, file_format):
+    if file_format == 'csv':
+        df.to_csv(output_file, index=False, quoting=csv.QUOTE_ALL)
+    elif file_format == 'parquet':
+        df.to_parquet(output_file, index=False)
+    elif file_format == 'arrow':
+        try:
+            import pyarrow as pa
+            import pyarrow.feather as feather
+        except ImportError:
+            raise RuntimeError("Arrow export requires the 'pyarrow' package")
+        feather.write_feather(pa.Table.from_pandas(df, preserve_index=False), output_file, compression='uncompressed')
+    else:
+        raise ValueError(f"Unsupported export format: {file_format}")
+
+def partition_file(base_path, cms_type, ext):
+    """File a CMS type's rows are exported to: <base>_out_<cms><ext>."""
+    if pd.isna(cms_type) or cms_type == '':
+        return f"{base_path}_out_unknown{ext}"
+    if cms_type == 'Error':
+        return f"{base_path}_out_errors{ext}"
+    # Create safe filename
+    safe_cms = str(cms_type).lower().replace(' ', '_')
+    return f"{base_path}_out_{safe_cms}{ext}"
+
+def write_partitioned(df, output_path, file_format='csv'):
+    """
+    Write one file per CMS type in a single groupby pass.
+
+    Files are named <base>_out_<cms><ext>, with 'Error' rows (homepage
+    unreachable) going to <base>_out_errors<ext> and sites no signature
+    identified to <base>_out_other<ext>. Without a CMS column everything goes to
+    <base>_out_all<ext>.
+    """
+    try:
+        base_path, _ = os.path.splitext(output_path)
+        ext = EXPORT_FORMATS[file_format]
+
+        # Check for CMS column (case-insensitive)
+        cms_column = None
+        for col in df.columns:
+            if col.lower() == 'cms':
+                cms_column = col
+                break
+
+        if not cms_column:
+            logger.info("No 'cms' column found in data, writing all records to single file")
+            output_file = f"{base_path}_out_all{ext}"
+            _write_frame(df, output_file, file_format)
+            logger.info("Wrote %s rows to %s", len(df), output_file)
+            return True
+
+        for cms_type, cms_df in df.groupby(cms_column, dropna=False, sort=False):
+            try:
+                output_file = partition_file(base_path, cms_type, ext)
+                _write_frame(cms_df, output_file, file_format)
+                logger.info("Wrote %s rows to %s for CMS type: %s", len(cms_df), output_file, cms_type)
+            except Exception as e:
+                logger.error("Error writing file for CMS type %s: %s", cms_type, e)
+                continue
+
+        return True
+    except Exception as e:
+        logger.error("Error writing %s export: %s", file_format, e)
+        return False
+
 def write_csv(data, output_path):
     try:
-        logger.error(f"Attempting to write CSV files based on: {output_path}")
+        logger.info("Attempting to write CSV files based on: %s", output_path)
 
         # Convert data to DataFrame if it's a list of dictionaries
         if isinstance(data, list):
@@ -104,66 +170,14 @@ def write_csv(data, output_path):
             logger.info("Using provided DataFrame")
             df = data
 
-        logger.info(f"Total records before splitting: {df.shape[0]}")
-        logger.info(f"Available columns: {df.columns.tolist()}")
+        logger.info("Total records before splitting: %s", df.shape[0])
 
         # Clean website URLs before writing
         if 'website_url' in df.columns:
             logger.info("Cleaning website URLs before writing")
             df['website_url'] = df['website_url'].apply(clean_domain)
 
-        # Get base path and extension
-        base_path, ext = os.path.splitext(output_path)
-        if not ext:
-            ext = '.csv'
-
-        # Check for CMS column (case-insensitive)
-        cms_column = None
-        for col in df.columns:
-            if col.lower() == 'cms':
-                cms_column = col
-                break
-
-        if cms_column:
-            logger.info(f"Found CMS column: {cms_column}")
-            # Get unique CMS types
-            cms_types = df[cms_column].unique()
-            logger.info(f"Found CMS types: {cms_types}")
-
-            # Create a file for each CMS type
-            for cms_type in cms_types:
-                try:
-                    # Handle None/NaN values
-                    if pd.isna(cms_type):
-                        safe_cms = 'unknown'
-                    else:
-                        # Create safe filename
-                        safe_cms = str(cms_type).lower().replace(' ', '_')
-                    
-                    if cms_type == 'Error':
-                        output_file = f"{base_path}_out_errors{ext}"
-                    else:
-                        output_file = f"{base_path}_out_{safe_cms}{ext}"
-                    
-                    # Filter data for this CMS type
-                    if pd.isna(cms_type):
-                        cms_df = df[df[cms_column].isna()]
-                    else:
-                        cms_df = df[df[cms_column] == cms_type]
-                    
-                    # Write to file
-                    cms_df.to_csv(output_file, index=False, quoting=csv.QUOTE_ALL)
-                    logger.info(f"Wrote {len(cms_df)} rows to {output_file} for CMS type: {cms_type}")
-                except Exception as e:
-                    logger.error(f"Error writing file for CMS type {cms_type}: {str(e)}")
-                    continue
-        else:
-            logger.info("No 'cms' column found in data, writing all records to single file")
-            output_file = f"{base_path}_out_all{ext}"
-            df.to_csv(output_file, index=False, quoting=csv.QUOTE_ALL)
-            logger.error(f"Wrote {len(df)} rows to {output_file}")
-
-        return True
+        return write_partitioned(df, output_path, 'csv')
     except Exception as e:
-        logger.error(f"Error writing CSV: {str(e)}")
+        logger.error("Error writing CSV: %s", e)
         return False
@@ -1,27 +1,39 @@
 import aiohttp
 import asyncio
 from src.constants import (
-    DATAFORSEO_LOGIN, DATAFORSEO_PASSWORD, GOOGLE_API_KEY, GOOGLE_CSE_ID,
-    DEFAULT_TIMEOUT, MAX_SITEMAP_DEPTH, MAX_URLS_PER_SITEMAP, MAX_RETRIES,
-    INITIAL_RETRY_DELAY, TCP_CONNECTOR_LIMIT, FORCE_CLOSE_CONNECTIONS, ENABLE_CLEANUP_CLOSED
+    DATAFORSEO_LOGIN, DATAFORSEO_PASSWORD, GOOGLE_API_KEY, GOOGLE_CSE_ID, DATAFORSEO_MODE,
+    DEFAULT_TIMEOUT, SITEMAP_TIMEOUT, ROBOTS_TIMEOUT, CONNECT_TIMEOUT,
+    TCP_CONNECTOR_LIMIT, FORCE_CLOSE_CONNECTIONS, ENABLE_CLEANUP_CLOSED,
+    EXACT_PAGE_COUNT,
+    CMS_CONFIRM_CONFIDENCE, CMS_HEADER_CONFIDENCE, READ_CHUNK_SIZE,
+    TRIAGE_CONCURRENCY, TRIAGE_CONCURRENCY_MIN, TRIAGE_CONCURRENCY_MAX, TRIAGE_OVERLOAD_RATIO,
+    ENRICH_CONCURRENCY, ENRICH_CONCURRENCY_MIN, ENRICH_CONCURRENCY_MAX
 )
+from src.cache import JsonCache
+from src.retry import RetryEngine, RetryableError
+from src.host_scheduler import HostScheduler, OVERLOAD_STATUSES
+from src.deadline import Deadline, DeadlineExceeded, current_deadline, stage_timeout
+from src.quota import CSEQuotaManager, QuotaExceededError
+from src.task_queue import StandardTaskQueue
+from src.utils import log_domain
+from src.metrics import RunMetrics
+from src.concurrency import AdaptiveLimiter
+from src.cms_fingerprint import Fingerprint, OTHER_CMS, fingerprinter
+from src.content_decoder import StreamDecoder
+from src.robots import RobotsTxt, parse_robots_txt
+from src.sitemap_frontier import SitemapFrontier
 from urllib.parse import urlparse, urljoin
-from bs4 import BeautifulSoup
-import re
-import gzip
-import brotli
-from io import BytesIO
 import logging
 from typing import Optional, Tuple, List, Dict, Any
-import backoff
 import gc
+from contextlib import asynccontextmanager
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 # Request timeout configuration
-REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=DEFAULT_TIMEOUT, connect=15)
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=DEFAULT_TIMEOUT, connect=CONNECT_TIMEOUT)
 
 # Modern browser User-Agent
 BROWSER_HEADERS = {
@@ -37,24 +49,22 @@ BROWSER_HEADERS = {
     "Sec-Fetch-User": "?1"
 }
 
-# WordPress detection patterns
-# Improved WordPress patterns for specific files
-WP_PATTERNS = [
-    r'/wp-content/themes/.+?/',  # Specific WordPress theme paths
-    r'/wp-includes/js/wp-emoji-release.min.js',  # Unique WordPress script
-    r'wp-json',  # WordPress JSON API
-    r'wp-admin',  # Admin path
-    r'wp-login.php',  # WordPress login page
+# The host could not be reached at all (DNS, refused, TLS handshake, connect
+# timeout); only these make the www variant worth trying
+CONNECTION_ERRORS = (aiohttp.ClientConnectorError, aiohttp.ConnectionTimeoutError)
+
+# Where sitemaps are looked for when robots.txt lists none
+DEFAULT_SITEMAP_PATHS = [
+    '/sitemap.xml',
+    '/sitemap_index.xml',
+    '/wp-sitemap.xml',
+    '/sitemaps.xml',
+    '/sitemap/',
+    '/sitemap/sitemap.xml'
 ]
 
-# Negative patterns to identify non-WordPress CMSs (like Drupal or Wix)
-NON_WP_PATTERNS = [
-    r'/sites/default/',  # Drupal
-    r'drupal\.js',       # Drupal
-    r'/modules/',        # Drupal
-    r'wixstatic\.com',   # Wix
-    r'apps\.wix\.com',   # Wix apps
-]
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+MAX_REDIRECTS = 10  # aiohttp's own default
 
 # Custom exception for SSL errors
 class SSLError(Exception):
@@ -64,7 +74,8 @@ class DataForSEOClient:
     BASE_URL = "https://api.dataforseo.com/v3"
     GOOGLE_CSE_URL = "https://www.googleapis.com/customsearch/v1"
     
-    def __init__(self):
+    def __init__(self, cache: Optional[JsonCache] = None, mode: str = DATAFORSEO_MODE,
+                 metrics: Optional[RunMetrics] = None):
         self.login = DATAFORSEO_LOGIN
         self.password = DATAFORSEO_PASSWORD
         self.google_api_key = GOOGLE_API_KEY
@@ -82,9 +93,43 @@ class DataForSEOClient:
         self._is_closing = False
         self._request_semaphore = asyncio.Semaphore(TCP_CONNECTOR_LIMIT)
         self._session_lock = asyncio.Lock()
-        self._current_domain = None  # Track current domain being processed
+        # Adaptive concurrency for the triage (scraping) and enrichment (API)
+        # stages; overloads seen by the client feed them
+        self.scrape_limiter = AdaptiveLimiter('scrape', TRIAGE_CONCURRENCY, TRIAGE_CONCURRENCY_MIN,
+                                              TRIAGE_CONCURRENCY_MAX, overload_ratio=TRIAGE_OVERLOAD_RATIO)
+        self.api_limiter = AdaptiveLimiter('api', ENRICH_CONCURRENCY, ENRICH_CONCURRENCY_MIN, ENRICH_CONCURRENCY_MAX)
+        self.retry_engine = RetryEngine(on_overload=self.api_limiter.record_overload)
+        self.hosts = HostScheduler()  # Per-host limits for the sites we scrape
         self._processed_backlinks = set()  # Track domains we've already fetched backlinks for
 
+        # Final origin (scheme://host) each domain's homepage resolved to, so
+        # later requests skip the http->https / apex->www redirect hops.
+        # Persisted in the cache so the next run starts from the right host.
+        self.cache = cache if cache is not None else JsonCache()
+        self._canonical_origins = self.cache.namespace('canonical_origins')
+        self._origins_seen = set()  # Domains whose origin was confirmed this run
+        # Homepage fingerprints of this run, keyed by requested and final URL, so
+        # a page reached twice (duplicate leads, bare -> www redirects) is fetched once
+        self._fingerprints: Dict[str, Optional[Fingerprint]] = {}
+        # Parsed robots.txt per host for this run, with the fetch status
+        self._robots: Dict[str, Tuple[Optional[RobotsTxt], str]] = {}
+
+        # ETag / Last-Modified per robots.txt and sitemap URL, stored with the
+        # results derived from the body so a 304 can reuse them
+        self._validators = self.cache.namespace('http_validators')
+
+        # Google CSE daily quota, result cache and deferred lookups
+        self.cse_quota = CSEQuotaManager(self.cache)
+
+        # Standard mode batches DataForSEO tasks through the queue instead of /live
+        if mode not in ('live', 'standard'):
+            raise ValueError(f"Unknown DataForSEO mode: {mode}")
+        self.task_queue = StandardTaskQueue(self) if mode == 'standard' else None
+
+        # Run-level counters for the metrics report
+        self.metrics = metrics if metrics is not None else RunMetrics(mode)
+        self.metrics.track_limiters(self.scrape_limiter, self.api_limiter)
+
     async def __aenter__(self):
         logger.info("Initializing DataForSEO client session")
         async with self._session_lock:
@@ -94,14 +139,21 @@ class DataForSEOClient:
                     force_close=FORCE_CLOSE_CONNECTIONS,
                     enable_cleanup_closed=ENABLE_CLEANUP_CLOSED
                 )
+                # Count body chunks read with read() (API responses); streamed pages count their own
+                trace_config = aiohttp.TraceConfig()
+                trace_config.on_response_chunk_received.append(self._on_chunk_received)
                 self.session = aiohttp.ClientSession(
                     auth=self.auth,
                     headers=BROWSER_HEADERS,
                     timeout=REQUEST_TIMEOUT,
-                    connector=connector
+                    connector=connector,
+                    trace_configs=[trace_config]
                 )
         return self
 
+    async def _on_chunk_received(self, session, context, params):
+        self.metrics.record_bytes(len(params.chunk))
+
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         await self.close()
 
@@ -112,16 +164,20 @@ class DataForSEOClient:
                 self._is_closing = True
                 logger.info("Closing DataForSEO client session")
                 try:
+                    if self.task_queue is not None:
+                        await self.task_queue.close()
                     await self.session.close()
                     # Wait for underlying connections to close
                     await asyncio.sleep(0.5)  # Increased wait time
                     # Force garbage collection
                     gc.collect()
                 except Exception as e:
-                    logger.error(f"Error closing session: {str(e)}")
+                    logger.error("Error closing session: %s", e)
                 finally:
                     self.session = None
                     self._is_closing = False
+                    self.cache.save()
+                    logger.info("Retry totals for this run: %s", self.retry_engine.summary())
 
     def _extract_domain(self, url: str) -> str:
         if not url.startswith(('http://', 'https://')):
@@ -135,254 +191,410 @@ class DataForSEOClient:
             return 'https://' + url
         return url
 
+    def _host_key(self, host: str) -> str:
+        """Key used for canonical origins; apex and www share one entry."""
+        host = host.lower()
+        return host[4:] if host.startswith('www.') else host
+
+    def _canonical_url(self, url: str) -> str:
+        """Rewrite a URL onto the canonical origin recorded for its domain, if any."""
+        url = self._normalize_url(url)
+        parsed = urlparse(url)
+        origin = self._canonical_origins.get(self._host_key(parsed.netloc))
+        if not origin:
+            return url
+        path = parsed.path or '/'
+        return f"{origin}{path}?{parsed.query}" if parsed.query else f"{origin}{path}"
+
+    def _record_canonical_origin(self, requested_url: str, final_url) -> None:
+        """Remember where the homepage request for a domain finally landed."""
+        key = self._host_key(urlparse(requested_url).netloc)
+        if key in self._origins_seen:
+            # Keep the first origin that answered this run (e.g. bare before www)
+            return
+        origin = str(final_url.origin())
+        if self._canonical_origins.get(key) != origin:
+            logger.info("Canonical origin for %s is %s", key, origin)
+            self._canonical_origins[key] = origin
+            self.cache.mark_dirty()
+        self._origins_seen.add(key)
+
+    def _forget_canonical_origin(self, url: str) -> None:
+        self.cache.delete('canonical_origins', self._host_key(urlparse(url).netloc))
+
     async def _decode_content(self, response: aiohttp.ClientResponse) -> str:
-        """Helper method to decode response content based on Content-Type and Content-Encoding."""
+        """Stream a scraped response body through the decompressor and charset decoder."""
         try:
-            content_encoding = response.headers.get('Content-Encoding', '').lower()
-            raw_content = await response.read()
-
-            if content_encoding == 'br':
-                try:
-                    return brotli.decompress(raw_content).decode('utf-8')
-                except Exception:
-                    return raw_content.decode('utf-8')
-            elif content_encoding == 'gzip':
-                try:
-                    return gzip.decompress(raw_content).decode('utf-8')
-                except Exception:
-                    return raw_content.decode('utf-8')
-            else:
-                return raw_content.decode('utf-8')
+            decoder = StreamDecoder(response.headers.get('Content-Encoding'), response.charset)
+            async for chunk in response.content.iter_chunked(READ_CHUNK_SIZE):
+                # The chunk trace only fires for read(), so streamed bodies are counted here
+                self.metrics.record_bytes(len(chunk))
+                decoder.feed(chunk)
+            return decoder.finish()
         except Exception as e:
-            logger.error(f"Error decoding content: {str(e)}")
+            logger.error("Error decoding content: %s", e)
             raise
 
-    async def check_wordpress_via_scrape(self, url: str) -> bool:
-        """Check if a website is using WordPress by scraping the page."""
+    @asynccontextmanager
+    async def _scrape_get(self, url: str, timeout: float = DEFAULT_TIMEOUT, **kwargs):
+        """
+        GET a page on a scraped site under its host's concurrency cap and breaker.
+        The body is left compressed; read it with _decode_content.
+        """
+        kwargs.setdefault('auto_decompress', False)
+        host = self._host_key(urlparse(url).netloc)
+        async with self.hosts.slot(host):
+            try:
+                async with self.session.get(url, timeout=stage_timeout(timeout), **kwargs) as response:
+                    if response.status in OVERLOAD_STATUSES:
+                        self.hosts.record_failure(host)
+                        self.scrape_limiter.record_overload()
+                    yield response
+            except asyncio.TimeoutError as e:
+                # A host that never answered is dead, not a sign we are scraping too fast;
+                # neither is a request cut short by the domain's own time budget
+                deadline = current_deadline.get()
+                if not isinstance(e, (DeadlineExceeded, aiohttp.ConnectionTimeoutError)) and \
+                        not (deadline is not None and deadline.exhausted):
+                    self.scrape_limiter.record_overload()
+                raise
+
+    def _page_key(self, url) -> str:
+        """Memo key for a page URL: scheme, lowercased host and path, without the fragment."""
+        parsed = urlparse(str(url))
+        key = f"{parsed.scheme}://{parsed.netloc.lower()}{parsed.path or '/'}"
+        return f"{key}?{parsed.query}" if parsed.query else key
+
+    async def fingerprint_site(self, url: str) -> Optional[Fingerprint]:
+        """
+        Identify the CMS a website runs from its homepage; None if the page
+        answered with an error or could not be read. Results are memoised for
+        the run under both the requested and the final URL. Connection
+        failures (CONNECTION_ERRORS) are raised to the caller.
+        """
+        key = self._page_key(url)
+        if key in self._fingerprints:
+            self.metrics.record_cache('homepages', True)
+            return self._fingerprints[key]
+        self.metrics.record_cache('homepages', False)
+
+        fingerprint = await self._fetch_fingerprint(url)
+        self._fingerprints[key] = fingerprint
+        return fingerprint
+
+    async def _fetch_fingerprint(self, url: str) -> Optional[Fingerprint]:
+        """
+        Fetch and identify a homepage. Redirects are followed by hand so a hop
+        onto a page already identified this run stops without fetching it.
+        """
+        hops = []  # Memo keys of the redirects followed
+        page_url = url
         try:
-            async with self.session.get(url, timeout=REQUEST_TIMEOUT) as response:
-                if response.status != 200:
-                    logger.info(f"{url} returned non-200 status: {response.status}")
-                    return False
-
-                content = await self._decode_content(response)
-                soup = BeautifulSoup(content, 'html.parser')
-
-                # Check meta generator tag for WordPress and log details
-                meta_generator = soup.find('meta', {'name': 'generator'})
-                if meta_generator and meta_generator.get('content'):
-                    meta_content = meta_generator.get('content', '').lower()
-                    logger.info(f"{url} meta generator tag content: {meta_content}")
-                    if 'wordpress' in meta_content:
-                        logger.info(f"{url} identified as WordPress by meta generator tag: {meta_content}")
-                        return True
-                    else:
-                        logger.info(f"{url} meta generator tag found but not WordPress: {meta_content}")
-                else:
-                    logger.info(f"{url} has no meta generator tag")
-
-                # Convert HTML to a string for regex matching
-                html_str = str(soup)
-
-                # Check for WordPress-specific patterns in HTML content
-                for pattern in WP_PATTERNS:
-                    if re.search(pattern, html_str, re.IGNORECASE):
-                        logger.info(f"{url} matched WordPress pattern: {pattern}")
-
-                        # Try accessing wp-json endpoint to confirm WordPress
-                        try:
-                            wp_json_url = urljoin(url, '/wp-json/')
-                            async with self.session.get(wp_json_url, timeout=REQUEST_TIMEOUT) as wp_response:
-                                if wp_response.status == 200:
-                                    logger.info(f"{url} confirmed as WordPress by wp-json endpoint.")
-                                    return True
-                                else:
-                                    logger.info(f"{url} wp-json endpoint returned non-200 status: {wp_response.status}")
-                        except Exception as e:
-                            logger.error(f"Error accessing wp-json for {url}: {str(e)}")
-                        return True  # WordPress pattern match without needing wp-json confirmation
-
-                # If any non-WordPress patterns are found, return False immediately
-                for pattern in NON_WP_PATTERNS:
-                    if re.search(pattern, html_str, re.IGNORECASE):
-                        logger.info(f"{url} matched non-WordPress pattern: {pattern}")
-                        return False
-
-                # If no positive WordPress patterns are conclusively detected
-                logger.info(f"No conclusive WordPress patterns found for {url}")
-                return False
+            for _ in range(MAX_REDIRECTS + 1):
+                async with self._scrape_get(page_url, allow_redirects=False) as response:
+                    location = response.headers.get('Location')
+                    if response.status in REDIRECT_STATUSES and location:
+                        page_url = urljoin(str(response.url), location)
+                        key = self._page_key(page_url)
+                        if key in self._fingerprints:
+                            logger.info("%s redirects to %s, already identified", url, page_url)
+                            return self._remember(hops, self._fingerprints[key])
+                        hops.append(key)
+                        continue
+
+                    if response.status != 200:
+                        logger.info("%s returned non-200 status: %s", page_url, response.status)
+                        return self._remember(hops, None)
+
+                    self._record_canonical_origin(url, response.url)
+                    cookie_names = list(response.cookies.keys())
+                    fingerprint = fingerprinter.identify_headers(response.headers, cookie_names)
+                    if fingerprint.cms != OTHER_CMS and fingerprint.confidence >= CMS_HEADER_CONFIDENCE:
+                        # Conclusive from headers; the body is never read
+                        self.metrics.record_header_only()
+                        logger.info("%s identified as %s from headers (confidence %.2f): %s", url, fingerprint.cms,
+                                    fingerprint.confidence, ', '.join(fingerprint.evidence))
+                        return self._remember(hops, fingerprint)
 
+                    content = await self._decode_content(response)
+                    fingerprint = fingerprinter.identify(response.headers, cookie_names, content)
+                    break
+            else:
+                logger.info("%s redirected more than %s times", url, MAX_REDIRECTS)
+                return self._remember(hops, None)
+        except CONNECTION_ERRORS:
+            raise
         except Exception as e:
-            logger.error(f"Error checking WordPress via scrape for {url}: {str(e)}")
-            return False
-
-    @backoff.on_exception(
-        backoff.expo,
-        (aiohttp.ClientError, asyncio.TimeoutError),
-        max_tries=MAX_RETRIES,
-        max_time=90  # Increased from 60
-    )
-    async def _make_request(self, endpoint: str, data: List[Dict[str, Any]], retry_with_www: bool = False) -> Optional[List[Dict[str, Any]]]:
-        """Make API request with retry logic and rate limiting."""
-        async with self._request_semaphore:
-            logger.info(f"Making API request to {endpoint}")
+            logger.error("Error fingerprinting %s: %s", url, e)
+            return None
+
+        if fingerprint.cms == 'WordPress' and fingerprint.confidence < CMS_CONFIRM_CONFIDENCE:
+            # Weak markers only; the REST API answering settles it
             try:
-                async with self.session.post(endpoint, json=data, timeout=REQUEST_TIMEOUT) as response:
-                    response.raise_for_status()
-                    result = await response.json()
+                async with self._scrape_get(urljoin(page_url, '/wp-json/')) as wp_response:
+                    if wp_response.status == 200:
+                        logger.info("%s confirmed as WordPress by wp-json endpoint", url)
+                        fingerprint = fingerprint._replace(
+                            confidence=CMS_CONFIRM_CONFIDENCE, evidence=[*fingerprint.evidence, 'wp-json 200'])
+                    else:
+                        logger.info("%s wp-json endpoint returned non-200 status: %s", url, wp_response.status)
+            except Exception as e:
+                logger.error("Error accessing wp-json for %s: %s", url, e)
 
-                    # Validate response structure
-                    if not isinstance(result, dict):
-                        logger.error(f"Invalid response format from API: {result}")
-                        return []
+        logger.info("%s identified as %s (confidence %.2f): %s", url, fingerprint.cms,
+                    fingerprint.confidence, ', '.join(fingerprint.evidence) or 'no signatures matched')
+        return self._remember(hops, fingerprint)
 
-                    tasks = result.get('tasks', [])
-                    if not tasks:
-                        logger.error("No tasks found in API response")
-                        return []
+    def _remember(self, keys: List[str], fingerprint: Optional[Fingerprint]) -> Optional[Fingerprint]:
+        for key in keys:
+            self._fingerprints[key] = fingerprint
+        return fingerprint
 
-                    # Safely access first task
-                    first_task = tasks[0] if tasks else None
-                    if not first_task:
-                        logger.error("Empty task in API response")
-                        return []
-                        
-                    status_code = first_task.get('status_code')
-                    if not status_code:
-                        logger.error(f"No status code in task: {first_task}")
-                        return []
-                        
-                    if status_code == 20000:
-                        result_data = first_task.get('result', [])
-                        if result_data:
-                            logger.info(f"Successful API response from {endpoint}")
-                            return result_data
-                        else:
-                            logger.warning(f"Empty result data from API for {endpoint}")
-                            return []
+    async def _fingerprint_reachable(self, url: str) -> Tuple[Optional[Fingerprint], bool]:
+        """fingerprint_site, returning (fingerprint, False) when the host could not be reached."""
+        try:
+            return await self.fingerprint_site(url), True
+        except CONNECTION_ERRORS as e:
+            logger.info("Could not connect to %s: %s", url, e)
+            return None, False
+
+    async def _post_task(self, endpoint: str, data: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """POST one DataForSEO task and return its first task record."""
+        async with self.session.post(endpoint, json=data, timeout=stage_timeout(DEFAULT_TIMEOUT)) as response:
+            response.raise_for_status()
+            result = await response.json()
+
+        # Validate response structure
+        if not isinstance(result, dict):
+            raise ValueError(f"Invalid response format from API: {result}")
+
+        tasks = result.get('tasks') or []
+        first_task = tasks[0] if tasks else None
+        if not first_task:
+            raise ValueError("No tasks found in API response")
+
+        status_code = first_task.get('status_code')
+        if not status_code:
+            raise ValueError(f"No status code in task: {first_task}")
+        if status_code >= 50000:
+            # DataForSEO internal errors are transient; let the retry engine handle them
+            raise RetryableError(f"API task failed: {first_task.get('status_message', 'Unknown error')}")
+        return first_task
+
+    async def _make_request(self, endpoint: str, data: List[Dict[str, Any]], retry_with_www: bool = False,
+                            endpoint_name: str = 'dataforseo') -> Optional[List[Dict[str, Any]]]:
+        """
+        Make API request through the retry engine, with rate limiting.
+
+        Returns the task's result list, empty when the API had no data, or
+        None when the request failed.
+        """
+        async with self._request_semaphore:
+            logger.info("Making API request to %s", endpoint)
+            try:
+                first_task = await self.retry_engine.call(
+                    endpoint_name, urlparse(endpoint).netloc,
+                    lambda: self._post_task(endpoint, data)
+                )
+
+                if first_task['status_code'] == 20000:
+                    result_data = first_task.get('result', [])
+                    if result_data:
+                        logger.info("Successful API response from %s", endpoint)
+                        return result_data
                     else:
-                        error_message = first_task.get('status_message', 'Unknown error')
-                        logger.error(f"API request failed: {error_message}")
-                        
-                        # If SSL error and not already retrying with www, suggest retry
-                        if not retry_with_www and 'SSL' in error_message:
-                            raise SSLError("SSL verification failed")
+                        logger.warning("Empty result data from API for %s", endpoint)
                         return []
-                        
+                else:
+                    error_message = first_task.get('status_message', 'Unknown error')
+                    logger.error("API request failed: %s", error_message)
+
+                    # If SSL error and not already retrying with www, suggest retry
+                    if not retry_with_www and 'SSL' in error_message:
+                        raise SSLError("SSL verification failed")
+                    return None
+
+            except SSLError:
+                raise
             except aiohttp.ClientResponseError as e:
-                logger.error(f"API request failed with status {e.status}: {str(e)}")
+                logger.error("API request failed with status %s: %s", e.status, e)
                 if not retry_with_www and 'SSL' in str(e):
                     raise SSLError("SSL verification failed")
-                return []
+                return None
             except Exception as e:
-                logger.error(f"Unexpected error during API request: {str(e)}")
+                logger.error("API request to %s failed: %s", endpoint, e)
                 if not retry_with_www and 'SSL' in str(e):
                     raise SSLError("SSL verification failed")
-                return []
-            finally:
-                # Force garbage collection after request
-                gc.collect()
-
-    async def get_website_data(self, url: str) -> Dict[str, Any]:
-        url = self._normalize_url(url)
-        domain = self._extract_domain(url)
-        self._current_domain = domain
-
-        logger.error("\n" + "-"*80 + "\n")  # Separator line
-        logger.error(f"Fetching website data for {url}")
-
-        # Initialize result dictionary with default values
-        result = {
-            'cms': 'Error',
+                return None
+
+    async def _api_call(self, path: str, data: List[Dict[str, Any]],
+                        endpoint_name: str) -> Optional[List[Dict[str, Any]]]:
+        """Run one DataForSEO task via its /live endpoint, or the standard queue in standard mode."""
+        self.metrics.record_api_call(endpoint_name)
+        if self.task_queue is None:
+            return await self._make_request(f"{self.BASE_URL}/{path}/live", data, endpoint_name=endpoint_name)
+
+        # Waiting in the queue does not count against the domain's time budget
+        deadline = current_deadline.get()
+        if deadline is not None:
+            deadline.pause()
+        try:
+            return await self.task_queue.submit(path, data[0], endpoint_name)
+        except Exception as e:
+            logger.error("Queued %s task failed: %s", endpoint_name, e)
+            return None
+        finally:
+            if deadline is not None:
+                deadline.resume()
+
+    def empty_result(self) -> Dict[str, Any]:
+        """Result dictionary with default values, used before any data is fetched."""
+        return {
+            'cms': 'Error',  # Homepage could not be fetched
+            'cms_confidence': None,
             'domain_rank': None,
             'phone_numbers': [],
             'backlinks': 0,
             'backlink_domains': 0,
             'indexed_pages': 0,
-            'total_pages': 0
+            'total_pages': 0,
+            'indexed_pending': False,  # Set when the CSE lookup was deferred by the quota
+            'partial': False,  # Set when the domain's time budget ran out
+            'lookup_failed': False  # Set when a paid lookup failed, so its zeros are not real data
         }
 
-        # First try WordPress detection via scraping
+    async def detect_cms(self, url: str, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Stage 1: scrape the homepage and identify the CMS the site runs."""
+        url = self._normalize_url(url)
+        domain = self._extract_domain(url)
+        log_domain.set(domain)  # Every record logged for this domain carries it
+        deadline = deadline or Deadline()
+        current_deadline.set(deadline)
+
+        logger.info("Fetching website data for %s", url)
+
+        result = self.empty_result()
         try:
-            is_wordpress = await self.check_wordpress_via_scrape(url)
-            if not is_wordpress and not url.startswith('https://www.'):
-                # Try scraping with www prefix
-                www_url = f"https://www.{domain}"
-                is_wordpress = await self.check_wordpress_via_scrape(www_url)
+            # Start from the origin a previous run resolved to, if we have one
+            start_url = self._canonical_url(url)
+            self.metrics.record_cache('canonical_origins', start_url != url)
+            fingerprint, reachable = await self._fingerprint_reachable(start_url)
+            if start_url != url and self._host_key(domain) not in self._origins_seen:
+                # Cached origin no longer answers; rediscover from the bare domain
+                logger.info("Cached origin for %s is stale, retrying %s", domain, url)
+                self._forget_canonical_origin(url)
+                start_url = url
+                fingerprint, reachable = await self._fingerprint_reachable(url)
+
+            if not reachable and not start_url.startswith('https://www.'):
+                # Only a host that could not be reached is worth retrying as www;
+                # a page that answered already redirected wherever it lives
+                fingerprint, _ = await self._fingerprint_reachable(f"https://www.{domain}")
+
+            if fingerprint is not None:
+                result['cms'] = fingerprint.cms
+                result['cms_confidence'] = round(fingerprint.confidence * 100)
+        except Exception as e:
+            logger.error("Error during CMS detection for %s: %s", url, e)
 
-            # result dictionary set cms
-            result['cms'] = 'WordPress' if is_wordpress else 'Error'
+        if deadline.exhausted:
+            logger.warning("Time budget ran out while checking %s", url)
+            result['partial'] = True
+        return result
 
-            # Only get API data for WordPress sites
-            if is_wordpress:
-                logger.info(f"WordPress detected via scraping for {url}")
+    async def enrich_website_data(self, url: str, result: Dict[str, Any],
+                                  deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Stage 2: fill in the paid API data for a site already identified as WordPress."""
+        url = self._normalize_url(url)
+        domain = self._extract_domain(url)
+        log_domain.set(domain)
+        deadline = deadline or Deadline()
+        current_deadline.set(deadline)
 
-                # get domain Rank via DataForSeo API
-                try:
-                    # Get domain rank via DataForSEO API
-                    tech_response = await self._make_request(
-                        f"{self.BASE_URL}/domain_analytics/technologies/domain_technologies/live",
-                        [{"target": domain, "limit": 1}]
-                    )
-
-                    # Log the tech_response
-                    # logger.error(f"Tech Response for {url}: {tech_response}")
-
-                    # Validate tech_response
-                    if (tech_response and isinstance(tech_response, list) and
-                        len(tech_response) > 0 and tech_response[0] and
-                        isinstance(tech_response[0], dict)):
-                        result['domain_rank'] = tech_response[0].get('domain_rank')
-                    else:
-                        logger.error(f"No technology data found for {url}. API response: {tech_response}")
+        # get domain Rank via DataForSeo API
+        try:
+            # Get domain rank via DataForSEO API
+            tech_response = await self._api_call(
+                "domain_analytics/technologies/domain_technologies",
+                [{"target": domain, "limit": 1}],
+                endpoint_name='domain_technologies'
+            )
 
-                except Exception as e:
-                    logger.error(f"Error processing domain rank for {url}: {str(e)}")
+            # Validate tech_response
+            if (tech_response and isinstance(tech_response, list) and
+                len(tech_response) > 0 and tech_response[0] and
+                isinstance(tech_response[0], dict)):
+                result['domain_rank'] = tech_response[0].get('domain_rank')
+            else:
+                logger.error("No technology data found for %s. API response: %s", url, tech_response)
+                result['lookup_failed'] |= tech_response is None
 
-                # Get page data
-                try:
-                    page_data = await self.get_page_data(url)
-                    result['indexed_pages'] = page_data.get('indexed_pages', 0)
-                    result['total_pages'] = page_data.get('total_pages', 0)
+        except Exception as e:
+            logger.error("Error processing domain rank for %s: %s", url, e)
+            result['lookup_failed'] = True
 
-                except Exception as e:
-                    logger.error(f"Error processing page data for {url}: {str(e)}")
+        # Get page data
+        try:
+            page_data = await self.get_page_data(url, priority=result['domain_rank'])
+            result['indexed_pages'] = page_data.get('indexed_pages', 0)
+            # None means the CSE lookup was deferred to a later run
+            result['indexed_pending'] = result['indexed_pages'] is None
+            result['total_pages'] = page_data.get('total_pages', 0)
+            result['lookup_failed'] |= page_data.get('lookup_failed', False)
 
-                # Get backlink data if not already processed
-                try:
-                    if domain not in self._processed_backlinks:
-                        backlink_data = await self.get_backlink_data(url)
-                        result['backlinks'] = backlink_data.get('backlinks', 0)
-                        result['backlink_domains'] = backlink_data.get('backlink_domains', 0)
-                        self._processed_backlinks.add(domain)
+        except Exception as e:
+            logger.error("Error processing page data for %s: %s", url, e)
+            result['lookup_failed'] = True
 
-                except Exception as e:
-                    logger.error(f"Error processing backlink data for {url}: {str(e)}")
+        # Get backlink data if not already processed
+        try:
+            if domain not in self._processed_backlinks:
+                backlink_data = await self.get_backlink_data(url)
+                if backlink_data is None:
+                    result['lookup_failed'] = True
+                else:
+                    result['backlinks'] = backlink_data.get('backlinks', 0)
+                    result['backlink_domains'] = backlink_data.get('backlink_domains', 0)
+                    self._processed_backlinks.add(domain)
 
         except Exception as e:
-            logger.error(f"Error during WordPress scraping for {url}: {str(e)}")
+            logger.error("Error processing backlink data for %s: %s", url, e)
+            result['lookup_failed'] = True
 
+        if deadline.exhausted:
+            logger.warning("Time budget ran out for %s, returning partial results", url)
+            result['partial'] = True
         return result
 
-    async def get_backlink_data(self, url: str) -> Dict[str, int]:
+    async def get_website_data(self, url: str) -> Dict[str, Any]:
+        """Run both stages for a single site: CMS triage, then enrichment for WordPress."""
+        deadline = Deadline()
+        result = await self.detect_cms(url, deadline)
+        if result['cms'] == 'WordPress':
+            await self.enrich_website_data(url, result, deadline)
+        return result
+
+    async def get_backlink_data(self, url: str) -> Optional[Dict[str, int]]:
+        """Backlink totals for a domain; None when the lookup failed."""
         url = self._normalize_url(url)
         domain = self._extract_domain(url)
         
         # Check if we've already processed this domain
         if domain in self._processed_backlinks:
-            logger.info(f"Skipping backlink data fetch for {url} - already processed")
+            logger.info("Skipping backlink data fetch for %s - already processed", url)
             return {'backlinks': 0, 'backlink_domains': 0}
             
-        logger.info(f"Fetching backlink data for {url}")
-        endpoint = f"{self.BASE_URL}/backlinks/summary/live"
+        logger.info("Fetching backlink data for %s", url)
         data = [{
             "target": domain,
             "limit": 1
         }]
         try:
-            response = await self._make_request(endpoint, data)
-            if response and isinstance(response, list) and len(response) > 0:
-                logger.info(f"Successfully retrieved backlink data for {url}")
+            response = await self._api_call("backlinks/summary", data, endpoint_name='backlinks_summary')
+            if response is None:
+                return None
+            if isinstance(response, list) and len(response) > 0:
+                logger.info("Successfully retrieved backlink data for %s", url)
                 result = response[0]
                 self._processed_backlinks.add(domain)
                 return {
@@ -390,20 +602,50 @@ class DataForSEOClient:
                     'backlink_domains': result.get('referring_domains', 0)
                 }
         except Exception as e:
-            logger.error(f"Error processing backlink data for {url}: {str(e)}")
-            
-        logger.warning(f"No backlink data found for {url}")
+            logger.error("Error processing backlink data for %s: %s", url, e)
+            return None
+
+        logger.warning("No backlink data found for %s", url)
         return {'backlinks': 0, 'backlink_domains': 0}
 
-    @backoff.on_exception(
-        backoff.expo,
-        (aiohttp.ClientError, asyncio.TimeoutError),
-        max_tries=MAX_RETRIES
-    )
-    async def get_indexed_pages(self, url: str) -> int:
+    async def _fetch_cse_total(self, query_params: Dict[str, Any]) -> Optional[int]:
+        async with self.session.get(self.GOOGLE_CSE_URL, params=query_params,
+                                    timeout=stage_timeout(DEFAULT_TIMEOUT)) as response:
+            if response.status in (403, 429):
+                body = await response.text()
+                if 'dailyLimitExceeded' in body or 'Quota exceeded' in body:
+                    # Not worth retrying until the quota resets
+                    raise QuotaExceededError("Google Custom Search daily quota exceeded")
+            response.raise_for_status()
+            result = await response.json()
+        if isinstance(result, dict) and 'searchInformation' in result:
+            total_results = result['searchInformation'].get('totalResults', '0')
+            return int(total_results) if total_results.isdigit() else 0
+        return None
+
+    async def get_indexed_pages(self, url: str, priority: Optional[int] = None) -> Optional[int]:
+        """
+        Indexed page count from Google Custom Search.
+
+        Returns None when the lookup was deferred because of the daily quota;
+        the domain is queued and filled in by a later run. Raises when the
+        lookup failed.
+        """
         try:
             domain = self._extract_domain(url)
-            logger.info(f"Fetching indexed pages count for {domain}")
+            cached = self.cse_quota.cached_total(domain)
+            self.metrics.record_cache('cse_results', cached is not None)
+            if cached is not None:
+                logger.info("Using cached indexed pages count for %s: %s", domain, cached)
+                return cached
+
+            if not self.cse_quota.try_acquire(priority):
+                logger.info("Deferring indexed pages lookup for %s (%s queries left today)", domain, self.cse_quota.remaining)
+                self.cse_quota.defer(domain, priority)
+                return None
+
+            logger.info("Fetching indexed pages count for %s", domain)
+            self.metrics.record_api_call('google_cse')
             query_params = {
                 'key': self.google_api_key,
                 'cx': self.google_cse_id,
@@ -411,187 +653,180 @@ class DataForSEOClient:
                 'num': 1
             }
 
-            async with self.session.get(self.GOOGLE_CSE_URL, params=query_params) as response:
-                response.raise_for_status()
-                result = await response.json()
-                if isinstance(result, dict) and 'searchInformation' in result:
-                    total_results = result['searchInformation'].get('totalResults', '0')
-                    indexed_pages = int(total_results) if total_results.isdigit() else 0
-                    logger.info(f"Found {indexed_pages} indexed pages for {domain}")
-                    return indexed_pages
-                else:
-                    logger.warning(f"Invalid response format from Google CSE for {domain}")
-                    return 0
+            attempts = 0
+
+            async def fetch_total():
+                nonlocal attempts
+                attempts += 1
+                if attempts > 1:
+                    self.cse_quota.record_query()  # A retry is another query against the quota
+                return await self._fetch_cse_total(query_params)
+
+            indexed_pages = await self.retry_engine.call(
+                'google_cse', urlparse(self.GOOGLE_CSE_URL).netloc, fetch_total
+            )
+            if indexed_pages is None:
+                raise ValueError("Invalid response format from Google CSE")
+            logger.info("Found %s indexed pages for %s", indexed_pages, domain)
+            self.cse_quota.store_total(domain, indexed_pages)
+            return indexed_pages
+        except QuotaExceededError:
+            self.cse_quota.mark_exhausted()
+            self.cse_quota.defer(domain, priority)
+            return None
         except Exception as e:
-            logger.error(f"Error fetching indexed pages for {url}: {str(e)}")
-            return 0
+            logger.error("Error fetching indexed pages for %s: %s", url, e)
+            raise
 
-    async def get_robots_txt(self, url: str) -> Tuple[Optional[str], str]:
-        url = self._normalize_url(url)
+    async def _conditional_get(self, url: str, timeout: float = SITEMAP_TIMEOUT) -> Tuple[int, Optional[str], Dict[str, Any]]:
+        """
+        GET a URL, sending the ETag / Last-Modified stored from a previous run.
+
+        Returns (status, content, entry). On 200 the content is decoded and
+        entry holds the fresh validators (not yet stored); on 304 content is
+        None and entry is the cached record including its derived results.
+        """
+        entry = self._validators.get(url)
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        async with self._scrape_get(url, timeout=timeout, headers=headers) as response:
+            if entry:
+                self.metrics.record_cache('http_validators', response.status == 304)
+            if response.status == 304 and entry:
+                logger.info("%s not modified since last run", url)
+                return 304, None, entry
+            if response.status != 200:
+                return response.status, None, {}
+            content = await self._decode_content(response)
+            fresh = {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified')
+            }
+            return 200, content, fresh
+
+    def _store_validators(self, url: str, entry: Dict[str, Any], **derived: Any) -> None:
+        """Cache validators together with the results derived from the body."""
+        if not entry.get('etag') and not entry.get('last_modified'):
+            # Nothing to revalidate with next time
+            self.cache.delete('http_validators', url)
+            return
+        self._validators[url] = {**entry, **derived}
+        self.cache.mark_dirty()
+
+    async def get_robots(self, url: str) -> Tuple[Optional[RobotsTxt], str]:
+        """
+        Fetch and parse a site's robots.txt once per run; None when it could
+        not be read. A missing or forbidden file parses as empty. The host's
+        Crawl-delay is passed to the scheduler for every later request.
+        """
+        url = self._canonical_url(url)
+        host = self._host_key(urlparse(url).netloc)
+        if host in self._robots:
+            self.metrics.record_cache('robots', True)
+            return self._robots[host]
+        self.metrics.record_cache('robots', False)
+
+        robots, status = await self._fetch_robots(url)
+        if robots is not None:
+            self.hosts.set_crawl_delay(host, robots.crawl_delay)
+            if robots.crawl_delay:
+                logger.info("%s asks for a Crawl-delay of %ss", host, robots.crawl_delay)
+        self._robots[host] = (robots, status)
+        return robots, status
+
+    async def _fetch_robots(self, url: str) -> Tuple[Optional[RobotsTxt], str]:
         robots_url = urljoin(url, '/robots.txt')
 
-        logger.info(f"Fetching robots.txt from {robots_url}")
+        logger.info("Fetching robots.txt from %s", robots_url)
 
         try:
-            async with self.session.get(robots_url, timeout=REQUEST_TIMEOUT) as response:
-                if response.status == 200:
-                    try:
-                        content = await self._decode_content(response)
-                        logger.info(f"Successfully retrieved robots.txt for {url}")
-                        return content, "Robots.txt found"
-                    except Exception as e:
-                        logger.error(f"Error decoding robots.txt content for {url}: {str(e)}")
-                        return None, f"Error decoding robots.txt content: {str(e)}"
-                elif response.status == 403:
-                    logger.warning(f"Access forbidden (403) for robots.txt at {url}")
-                    return "", "Robots.txt access forbidden (403)"
-                elif response.status == 404:
-                    logger.warning(f"Robots.txt not found (404) at {url}")
-                    return "", "Robots.txt not found (404)"
-                else:
-                    logger.warning(f"Unexpected status code {response.status} for robots.txt at {url}")
-                    return None, f"Unexpected status code {response.status} for robots.txt"
+            status, content, entry = await self._conditional_get(robots_url, timeout=ROBOTS_TIMEOUT)
+            if status == 200:
+                logger.info("Successfully retrieved robots.txt for %s", url)
+                robots = parse_robots_txt(content, robots_url)
+                self._store_validators(robots_url, entry, sitemaps=list(robots.sitemaps),
+                                       crawl_delay=robots.crawl_delay)
+                return robots, "Robots.txt found"
+            elif status == 304:
+                # Only the parsed fields are kept, which is all callers need
+                robots = RobotsTxt(tuple(entry.get('sitemaps', [])), entry.get('crawl_delay'))
+                return robots, "Robots.txt not modified (304)"
+            elif status == 403:
+                logger.warning("Access forbidden (403) for robots.txt at %s", url)
+                return RobotsTxt(), "Robots.txt access forbidden (403)"
+            elif status == 404:
+                logger.warning("Robots.txt not found (404) at %s", url)
+                return RobotsTxt(), "Robots.txt not found (404)"
+            else:
+                logger.warning("Unexpected status code %s for robots.txt at %s", status, url)
+                return None, f"Unexpected status code {status} for robots.txt"
         except asyncio.TimeoutError:
-            logger.error(f"Timeout while fetching robots.txt for {url}")
+            logger.error("Timeout while fetching robots.txt for %s", url)
             return None, "Timeout while fetching robots.txt"
         except Exception as e:
-            logger.error(f"Error fetching robots.txt for {url}: {str(e)}")
+            logger.error("Error fetching robots.txt for %s: %s", url, e)
             return None, f"Error fetching robots.txt: {str(e)}"
 
-    def get_sitemaps(self, robots_txt: Optional[str]) -> List[str]:
-        sitemaps = []
-        if robots_txt:
-            for line in robots_txt.split('\n'):
-                if line.lower().startswith('sitemap:'):
-                    sitemaps.append(line.split(': ')[1].strip())
-        return sitemaps
-
-    async def try_default_sitemaps(self, url: str) -> List[str]:
-        """Try to access common default sitemap locations."""
-        default_paths = [
-            '/sitemap.xml',
-            '/sitemap_index.xml',
-            '/wp-sitemap.xml',
-            '/sitemaps.xml',
-            '/sitemap/',
-            '/sitemap/sitemap.xml'
-        ]
-
-        sitemaps = []
-        tasks = []
-        for path in default_paths:
-            sitemap_url = urljoin(url, path)
-            tasks.append(self._check_sitemap(sitemap_url))
-        
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        for sitemap_url, is_valid in zip(default_paths, results):
-            if isinstance(is_valid, bool) and is_valid:
-                full_url = urljoin(url, sitemap_url)
-                sitemaps.append(full_url)
-                logger.info(f"Found valid sitemap at {full_url}")
+    async def get_total_pages(self, url: str, exact: bool = EXACT_PAGE_COUNT) -> Tuple[int, str]:
+        url = self._canonical_url(url)
+        logger.info("Getting total pages count for %s", url)
         
-        return sitemaps
-
-    async def _check_sitemap(self, url: str) -> bool:
-        """Check if a sitemap URL is valid."""
         try:
-            async with self.session.get(url, timeout=REQUEST_TIMEOUT) as response:
-                is_valid = response.status == 200
-                if not is_valid and self._current_domain:
-                    logger.warning(f"Invalid sitemap {url} for domain {self._current_domain}")
-                return is_valid
-        except Exception as e:
-            if self._current_domain:
-                logger.warning(f"Error checking sitemap {url} for domain {self._current_domain}: {str(e)}")
-            else:
-                logger.warning(f"Error checking sitemap {url}: {str(e)}")
-            return False
-
-    async def parse_sitemap(self, url: str, depth: int = 0) -> List[str]:
-        if depth > MAX_SITEMAP_DEPTH:
-            logger.warning(f"Maximum sitemap depth reached for {url}")
-            return []
-
-        logger.info(f"Parsing sitemap at {url} (depth: {depth})")
-        try:
-            async with self.session.get(url, timeout=REQUEST_TIMEOUT) as response:
-                try:
-                    content = await self._decode_content(response)
-                    soup = BeautifulSoup(content, 'lxml-xml')
-
-                    urls = []
-                    sitemapindex = soup.find('sitemapindex')
-                    
-                    if sitemapindex:
-                        logger.info(f"Found sitemap index at {url}")
-                        sitemap_urls = [loc.text for loc in sitemapindex.find_all('loc')[:MAX_URLS_PER_SITEMAP]]
-                        tasks = [self.parse_sitemap(u, depth+1) for u in sitemap_urls]
-                        nested_urls = await asyncio.gather(*tasks, return_exceptions=True)
-                        for result in nested_urls:
-                            if isinstance(result, list):
-                                urls.extend(result)
-                    else:
-                        urls = [loc.text for loc in soup.find_all('loc')[:MAX_URLS_PER_SITEMAP]]
-                        logger.info(f"Found {len(urls)} URLs in sitemap at {url}")
-
-                    return urls
-                except Exception as e:
-                    if self._current_domain:
-                        logger.warning(f"Error processing sitemap {url} for domain {self._current_domain}: {str(e)}")
-                    else:
-                        logger.warning(f"Error processing sitemap {url}: {str(e)}")
-                    return []
-        except Exception as e:
-            if self._current_domain:
-                logger.warning(f"Error fetching sitemap {url} for domain {self._current_domain}: {str(e)}")
-            else:
-                logger.warning(f"Error fetching sitemap {url}: {str(e)}")
-            return []
-
-    async def get_total_pages(self, url: str) -> Tuple[int, str]:
-        url = self._normalize_url(url)
-        logger.info(f"Getting total pages count for {url}")
-        
-        try:
-            robots_txt, status = await self.get_robots_txt(url)
-            
-            sitemaps = self.get_sitemaps(robots_txt) if robots_txt is not None else []
+            robots, status = await self.get_robots(url)
             
-            if not sitemaps:
+            frontier = SitemapFrontier(self, exact=exact)
+            sitemaps = list(robots.sitemaps) if robots is not None else []
+            if sitemaps:
+                logger.info("Found %s sitemaps in robots.txt for %s", len(sitemaps), url)
+                for sitemap in sitemaps:
+                    frontier.add(sitemap)
+            else:
+                # Probed and parsed in one request each
                 logger.info("No sitemaps found in robots.txt, trying default locations...")
-                sitemaps = await self.try_default_sitemaps(url)
+                for path in DEFAULT_SITEMAP_PATHS:
+                    frontier.add(urljoin(url, path), probe=True)
             
-            if not sitemaps:
-                logger.error(f"No sitemaps found for {url}")
-                return 0, "No sitemaps found in robots.txt or default locations"
-            
-            logger.info(f"Found {len(sitemaps)} sitemaps for {url}")
-            tasks = [self.parse_sitemap(sitemap) for sitemap in sitemaps]
-            url_lists = await asyncio.gather(*tasks, return_exceptions=True)
-            total_urls = set()
+            total = await frontier.run()
+            logger.info("Crawled %s sitemaps for %s (%s duplicates skipped)", frontier.fetched, url, frontier.duplicates)
             
-            for result in url_lists:
-                if isinstance(result, list):
-                    total_urls.update(result)
+            if not frontier.found:
+                logger.error("No sitemaps found for %s", url)
+                return 0, "No sitemaps found in robots.txt or default locations"
             
+            total_urls = total.urls
             if not total_urls:
-                logger.warning(f"No URLs found in sitemaps for {url}")
+                logger.warning("No URLs found in sitemaps for %s", url)
                 return 0, "No URLs found in sitemaps"
             
-            logger.info(f"Found total of {len(total_urls)} unique URLs for {url}")
-            return len(total_urls), "Total pages counted from sitemaps"
+            if total.truncated:
+                logger.info("At least %s unique URLs for %s; sitemap budget reached", total_urls, url)
+                return total_urls, "Total pages from sitemaps (budget reached, lower bound)"
+            if total.estimated and total.margin is None:
+                logger.info("Guessed a total of %s unique URLs for %s; no paginated sitemap could be sampled",
+                            total_urls, url)
+                return total_urls, "Total pages guessed from sitemap page sizes (margin unknown)"
+            if total.estimated:
+                logger.info("Estimated total of %s (±%s) unique URLs for %s", total_urls, total.margin, url)
+                return total_urls, f"Total pages estimated from sitemaps (±{total.margin})"
+            logger.info("Found total of %s unique URLs for %s", total_urls, url)
+            return total_urls, "Total pages counted from sitemaps"
         except Exception as e:
-            logger.error(f"Error in get_total_pages for {url}: {str(e)}")
+            logger.error("Error in get_total_pages for %s: %s", url, e)
             return 0, f"Error getting total pages: {str(e)}"
 
-    async def get_page_data(self, url: str) -> Dict[str, Any]:
+    async def get_page_data(self, url: str, priority: Optional[int] = None) -> Dict[str, Any]:
         url = self._normalize_url(url)
-        logger.info(f"Getting page data for {url}")
+        logger.info("Getting page data for %s", url)
 
         try:
             # Create tasks for concurrent execution
             total_pages_task = asyncio.create_task(self.get_total_pages(url))
-            indexed_pages_task = asyncio.create_task(self.get_indexed_pages(url))
+            indexed_pages_task = asyncio.create_task(self.get_indexed_pages(url, priority))
             
             # Wait for both tasks to complete
             total_pages_result, indexed_pages = await asyncio.gather(
@@ -602,27 +837,30 @@ class DataForSEOClient:
             
             # Handle total_pages_result
             if isinstance(total_pages_result, Exception):
-                logger.error(f"Error getting total pages: {str(total_pages_result)}")
+                logger.error("Error getting total pages: %s", str(total_pages_result))
                 total_pages, status = 0, f"Error: {str(total_pages_result)}"
             else:
                 total_pages, status = total_pages_result
             
             # Handle indexed_pages
-            if isinstance(indexed_pages, Exception):
-                logger.error(f"Error getting indexed pages: {str(indexed_pages)}")
+            lookup_failed = isinstance(indexed_pages, Exception)
+            if lookup_failed:
+                logger.error("Error getting indexed pages: %s", str(indexed_pages))
                 indexed_pages = 0
             
             return {
                 'total_pages': total_pages,
                 'indexed_pages': indexed_pages,
-                'status': status
+                'status': status,
+                'lookup_failed': lookup_failed
             }
         except Exception as e:
-            logger.error(f"Error getting page data for {url}: {str(e)}")
+            logger.error("Error getting page data for %s: %s", url, e)
             return {
                 'total_pages': 0,
                 'indexed_pages': 0,
-                'status': f"Error: {str(e)}"
+                'status': f"Error: {str(e)}",
+                'lookup_failed': True
             }
 
 # Custom exception for SSL errors
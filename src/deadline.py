@@ -0,0 +1,85 @@
+import asyncio
+import time
+from contextvars import ContextVar
+from typing import Optional
+import aiohttp
+from src.constants import DOMAIN_TIME_BUDGET, CONNECT_TIMEOUT
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """Raised instead of starting a request once a domain's time budget is spent"""
+    pass
+
+
+class Deadline:
+    """
+    Time budget for the work done on one domain.
+
+    The clock only runs while the domain is being worked on: the pipeline
+    pauses it while the domain waits in the enrichment queue, so queueing
+    does not eat into the budget.
+    """
+
+    def __init__(self, budget: float = DOMAIN_TIME_BUDGET):
+        self.budget = budget
+        self._spent = 0.0
+        self._started: Optional[float] = time.monotonic()
+        self.expired = False
+
+    def pause(self):
+        if self._started is not None:
+            self._spent += time.monotonic() - self._started
+            self._started = None
+
+    def resume(self):
+        if self._started is None:
+            self._started = time.monotonic()
+
+    def remaining(self) -> float:
+        spent = self._spent
+        if self._started is not None:
+            spent += time.monotonic() - self._started
+        return self.budget - spent
+
+    def clamp(self, seconds: float) -> float:
+        """Shorten a stage timeout to the time left; raise if none is left."""
+        remaining = self.remaining()
+        if remaining <= 0:
+            self.expired = True
+            raise DeadlineExceeded("Domain time budget exhausted")
+        return min(seconds, remaining)
+
+    @property
+    def exhausted(self) -> bool:
+        """True once work was skipped or cut short by the deadline."""
+        return self.expired or self.remaining() <= 0
+
+
+# Deadline of the domain the current task is working on, if any
+current_deadline: ContextVar[Optional[Deadline]] = ContextVar('current_deadline', default=None)
+
+
+def stage_timeout(seconds: float) -> aiohttp.ClientTimeout:
+    """Client timeout for one request of a stage, bounded by the domain deadline."""
+    deadline = current_deadline.get()
+    if deadline is not None:
+        seconds = deadline.clamp(seconds)
+    return aiohttp.ClientTimeout(total=seconds, connect=min(CONNECT_TIMEOUT, seconds))
+
+
+def time_left(default: float) -> float:
+    """Seconds left before the current deadline, or `default` when there is none."""
+    deadline = current_deadline.get()
+    return default if deadline is None else deadline.remaining()
+
+
+def cut_by_deadline(error: BaseException) -> bool:
+    """
+    True when a failure is the current domain running out of time rather
+    than the far end misbehaving: DeadlineExceeded, or a timeout on a
+    request the deadline cut short.
+    """
+    if isinstance(error, DeadlineExceeded):
+        return True
+    deadline = current_deadline.get()
+    return isinstance(error, asyncio.TimeoutError) and deadline is not None and deadline.exhausted
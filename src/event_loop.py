@@ -0,0 +1,37 @@
+import asyncio
+import logging
+import sys
+from src.constants import EVENT_LOOP
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+LOOP_CHOICES = ('auto', 'uvloop', 'asyncio')
+
+
+def resolve_loop(kind: str = EVENT_LOOP) -> str:
+    """
+    The event loop `kind` resolves to on this machine: 'uvloop' or 'asyncio'.
+
+    'auto' picks uvloop on Linux when it is installed; an explicit 'uvloop'
+    falls back to asyncio, with a warning, where uvloop is unavailable.
+    """
+    if kind not in LOOP_CHOICES:
+        raise ValueError(f"Unknown event loop: {kind}")
+    if kind == 'asyncio' or (kind == 'auto' and not sys.platform.startswith('linux')):
+        return 'asyncio'
+    try:
+        import uvloop  # noqa: F401
+    except ImportError:
+        if kind == 'uvloop':
+            logger.warning("uvloop is not available on %s, using the asyncio event loop", sys.platform)
+        return 'asyncio'
+    return 'uvloop'
+
+
+def new_event_loop(kind: str = EVENT_LOOP) -> asyncio.AbstractEventLoop:
+    """A new event loop of the given kind, for a thread that runs its own loop."""
+    if resolve_loop(kind) == 'uvloop':
+        import uvloop
+        return uvloop.new_event_loop()
+    return asyncio.new_event_loop()
@@ -0,0 +1,140 @@
+import csv
+import io
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+from src.constants import EXPORT_FLUSH_ROWS, EXPORT_FLUSH_INTERVAL
+from src.csv_handler import partition_file
+from src.records import Lead, SiteResult, to_text
+from src.result_store import RESULT_COLUMNS, INPUT_KEYS
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+PART_SUFFIX = '.part'
+_HEADERS = [header for _, header, _ in RESULT_COLUMNS]
+_RESULT_COLUMNS = [(key, kind) for key, _, kind in RESULT_COLUMNS[len(INPUT_KEYS):]]
+
+
+def _cell(value: Any, kind: str) -> Any:
+    if value is None:
+        return None
+    if kind == 'int':
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+    if kind == 'flag':
+        return bool(value)
+    return to_text(value)
+
+
+class _Appender:
+    """
+    One CMS file. Rows are buffered as CSV text and appended to the .part
+    file whole, so what is on disk always ends on a row boundary.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.part_path = path + PART_SUFFIX
+        self.rows = 0
+        self._buffer = io.StringIO()
+        # Same quoting and line endings as a DataFrame export
+        self._writer = csv.writer(self._buffer, quoting=csv.QUOTE_ALL, lineterminator=os.linesep)
+        self._file = open(self.part_path, 'w', newline='', encoding='utf-8')
+        self._writer.writerow(_HEADERS)
+
+    def append(self, values: List[Any]):
+        self._writer.writerow(values)
+        self.rows += 1
+
+    def flush(self):
+        text = self._buffer.getvalue()
+        if text:
+            self._file.write(text)
+            self._file.flush()
+            self._buffer.seek(0)
+            self._buffer.truncate()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+        os.replace(self.part_path, self.path)
+
+
+class StreamingExport:
+    """
+    CSV export written while processing runs, one file per CMS.
+
+    Rows go to <base>_out_<cms>.csv.part as results arrive, with the same
+    columns and file names as `ResultStore.export`. Each file buffers its
+    rows and the buffers are appended every `flush_rows` rows or
+    `flush_interval` seconds, so memory use does not grow with the run and
+    the .part files are readable CSV at any point. `close` renames them to
+    their final names. A write error is logged and stops the stream; it
+    never fails the run.
+    """
+
+    def __init__(self, output_path: str, flush_rows: int = EXPORT_FLUSH_ROWS,
+                 flush_interval: float = EXPORT_FLUSH_INTERVAL):
+        self.base_path, _ = os.path.splitext(output_path)
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.rows = 0
+        self.error: Optional[str] = None
+        self._appenders: Dict[str, _Appender] = {}
+        self._buffered = 0
+        self._last_flush = time.monotonic()
+
+    def append(self, lead: Lead, result: SiteResult):
+        """Add the export row for one finished lead."""
+        if self.error:
+            return
+        values = [to_text(getattr(lead, key)) for key in INPUT_KEYS]
+        values += [_cell(getattr(result, key), kind) for key, kind in _RESULT_COLUMNS]
+        path = partition_file(self.base_path, result.cms, '.csv')
+        try:
+            appender = self._appenders.get(path)
+            if appender is None:
+                appender = self._appenders[path] = _Appender(path)
+            appender.append(values)
+        except OSError as e:
+            self._fail(e)
+            return
+        self.rows += 1
+        self._buffered += 1
+        if self._buffered >= self.flush_rows or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        if self.error:
+            return
+        try:
+            for appender in self._appenders.values():
+                appender.flush()
+        except OSError as e:
+            self._fail(e)
+        self._buffered = 0
+        self._last_flush = time.monotonic()
+
+    def close(self) -> List[str]:
+        """Flush and move every file to its final name; returns the files written."""
+        written = []
+        for appender in self._appenders.values():
+            try:
+                if not self.error:
+                    appender.close()
+                    written.append(appender.path)
+                    logger.info("Wrote %s rows to %s", appender.rows, appender.path)
+                else:
+                    appender._file.close()
+            except OSError as e:
+                self._fail(e)
+        self._appenders = {}
+        return written
+
+    def _fail(self, error: Exception):
+        self.error = str(error)
+        logger.error("Error streaming results to %s_out_*.csv: %s", self.base_path, self.error)
@@ -0,0 +1,62 @@
+import logging
+from PyQt6.QtCore import QThread, pyqtSignal
+from src.csv_handler import iter_csv_chunks
+from src.gui.utils import is_valid_domain
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class CsvLoader(QThread):
+    """
+    Reads the leads CSV off the GUI thread.
+
+    Each chunk of valid leads is emitted as soon as it is parsed, so the
+    table fills in (and processing can start) while the rest of the file
+    is still being read.
+    """
+    chunk_loaded = pyqtSignal(list)  # Valid Lead records
+    progress = pyqtSignal(int, int)  # Percent of the file read, valid leads so far
+    finished_loading = pyqtSignal(int, int, int)  # Valid, invalid and empty URL counts
+    error = pyqtSignal(str)
+
+    def __init__(self, file_path):
+        super().__init__()
+        self.file_path = file_path
+        self._is_running = True
+
+    def stop(self):
+        self._is_running = False
+
+    def run(self):
+        valid_count = invalid_count = empty_count = 0
+        try:
+            for leads, fraction in iter_csv_chunks(self.file_path):
+                if not self._is_running:
+                    logger.info("CSV loading stopped")
+                    break
+
+                valid = []
+                for lead in leads:
+                    url = lead.website_url
+                    if url is None or not url.strip():
+                        empty_count += 1
+                        continue
+
+                    url = url.strip()
+                    if is_valid_domain(url):
+                        lead.website_url = url
+                        valid.append(lead)
+                    else:
+                        invalid_count += 1
+                        logger.info("Invalid URL found: %s", url)
+
+                valid_count += len(valid)
+                if valid:
+                    self.chunk_loaded.emit(valid)
+                self.progress.emit(int(fraction * 100), valid_count)
+
+            self.finished_loading.emit(valid_count, invalid_count, empty_count)
+        except Exception as e:
+            logger.error("Error reading CSV: %s", e)
+            self.error.emit(str(e))
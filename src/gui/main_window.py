@@ -1,14 +1,20 @@
 import os
 import sys
 import logging
-from urllib.parse import urlparse
+import threading
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
-                             QPushButton, QTableWidget, QTableWidgetItem, 
-                             QFileDialog, QProgressBar, QMessageBox, QApplication, QLabel)
+                             QPushButton, QTableView, QLineEdit,
+                             QFileDialog, QProgressBar, QMessageBox, QApplication, QLabel,
+                             QInputDialog)
 from PyQt6.QtCore import Qt
-from src.csv_handler import read_csv, write_csv
+from src.gui.csv_loader import CsvLoader
+from src.gui.utils import is_valid_domain
+from src.result_store import ResultStore
+from src.gui.result_model import ResultTableModel, ResultFilterProxyModel
 from src.gui.worker import Worker
-from src.constants import LAST_INPUT_DIRECTORY, update_last_input_directory
+from src.metrics import metrics_path, write_report
+from src.jobs import JobStore, job_settings
+from src.constants import LAST_INPUT_DIRECTORY, EVENT_LOOP, DATAFORSEO_MODE, JOBS_DIR, update_last_input_directory
 from src.utils import set_log_file
 
 # Set up logging
@@ -16,8 +22,9 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, event_loop=EVENT_LOOP):
         super().__init__()
+        self.event_loop = event_loop
         self.setWindowTitle("WordPress SEO Data Extraction")
         self.setGeometry(100, 100, 1400, 600)
 
@@ -50,26 +57,44 @@ class MainWindow(QMainWindow):
         progress_layout.addWidget(self.progress_bar)
         self.progress_label = QLabel("0/0 sites processed")
         progress_layout.addWidget(self.progress_label)
+        self.stage_label = QLabel("")
+        progress_layout.addWidget(self.stage_label)
         layout.addLayout(progress_layout)
 
-        # Results table
-        self.results_table = QTableWidget(0, 14)
-        self.results_table.setHorizontalHeaderLabels([
-            "First Name", "Last Name", "Email", "Organization Name", "Title",
-            "Website URL", "Phone Number", "LinkedIn URL", "CMS", "Domain Rank",
-            "Total Pages", "Indexed Pages", "Backlinks", "Backlink Domains"
-        ])
-        self.results_table.setSortingEnabled(False)
-        layout.addWidget(self.results_table)
+        # Current adaptive concurrency of each stage
+        self.concurrency_label = QLabel("")
+        self.statusBar().addPermanentWidget(self.concurrency_label)
+
+        # Filter box
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("Filter rows...")
+        layout.addWidget(self.filter_edit)
 
+        # Results table: a view over the result store, sorted and filtered by a proxy
         self.data = []
-        self.results = []
-        self.resume_file = 'resume.json'
+        self.store = ResultStore()
+        self.table_model = ResultTableModel(self.store, self)
+        self.proxy_model = ResultFilterProxyModel(self)
+        self.proxy_model.setSourceModel(self.table_model)
+        self.filter_edit.textChanged.connect(self.proxy_model.setFilterFixedString)
+
+        self.results_table = QTableView()
+        self.results_table.setModel(self.proxy_model)
+        self.results_table.setSortingEnabled(True)
+        self.results_table.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        layout.addWidget(self.results_table)
+
+        self.jobs_dir = JOBS_DIR
         self.worker = None
+        self.loader = None
+        self.input_loaded = threading.Event()  # Set once the whole CSV has been read
         self.input_csv_path = None  # Store the input CSV path
 
     def closeEvent(self, event):
         """Handle window close event"""
+        if self.loader and self.loader.isRunning():
+            self.loader.stop()
+            self.loader.wait()
         if self.worker and self.worker.isRunning():
             reply = QMessageBox.question(
                 self,
@@ -90,19 +115,7 @@ class MainWindow(QMainWindow):
 
     def is_valid_url(self, url):
         """Validate URL, accepting domain names without scheme"""
-        if not url or url.isspace():
-            return False
-
-        url = url.strip()
-
-        # Remove any scheme if present
-        if url.startswith(('http://', 'https://')):
-            parsed = urlparse(url)
-            url = parsed.netloc
-
-        # Basic domain validation
-        parts = url.split('.')
-        return len(parts) >= 2 and all(part for part in parts)
+        return is_valid_domain(url)
 
     def upload_csv(self):
         try:
@@ -118,104 +131,112 @@ class MainWindow(QMainWindow):
                 self.input_csv_path = file_name  # Store the input CSV path
                 # Update window title with filename
                 self.setWindowTitle(f"WordPress SEO Data Extraction    -    {os.path.basename(file_name)}")
-                logger.info(f"Selected file: {file_name}")
+                logger.info("Selected file: %s", file_name)
 
                 # Set up logging to file
                 log_file = set_log_file(file_name)
-                logger.info(f"Logging to file: {log_file}")
+                logger.info("Logging to file: %s", log_file)
 
                 # Update the last input directory in config
                 new_directory = os.path.dirname(os.path.abspath(file_name))
                 update_last_input_directory(new_directory)
-                logger.info(f"Updated last input directory to: {new_directory}")
-
-                all_data = read_csv(file_name)
-                if all_data is not None:
-                    logger.info(f"Successfully read {len(all_data)} records from CSV")
-                    self.data = []
-                    invalid_count = 0
-                    empty_count = 0
-
-                    for row in all_data:
-                        url = row.get('website_url')
-                        logger.info(f"Processing URL: {url}")
-
-                        if url is None or (isinstance(url, str) and not url.strip()):
-                            empty_count += 1
-                            logger.info("Empty URL found")
-                            continue
-
-                        if isinstance(url, float):
-                            url = str(url).rstrip('0').rstrip('.')
-                        elif not isinstance(url, str):
-                            url = str(url)
-
-                        url = url.strip()
-                        if self.is_valid_url(url):
-                            row['website_url'] = url
-                            self.data.append(row)
-                            logger.info(f"Valid URL added: {url}")
-                        else:
-                            invalid_count += 1
-                            logger.info(f"Invalid URL found: {url}")
-
-                    if self.data:
-                        self.process_button.setEnabled(True)
-                        self.update_table_with_input_data()
-                        message = (f"CSV file loaded with {len(self.data)} valid entries.\n"
-                                 f"{invalid_count} entries were skipped due to invalid URLs.\n"
-                                 f"{empty_count} entries were skipped due to empty URL fields.")
-                        logger.info(message)
-                        QMessageBox.information(self, "Upload Successful", message)
-                    else:
-                        message = "No valid entries found in the CSV file."
-                        logger.error(message)
-                        QMessageBox.warning(self, "Upload Failed", message)
-                else:
-                    message = "Failed to load the CSV file. Please check the file format and required columns."
-                    logger.error(message)
-                    QMessageBox.warning(self, "Upload Failed", message)
+                logger.info("Updated last input directory to: %s", new_directory)
+
+                # Read in the background; rows appear (and can be processed) chunk by chunk
+                self.data = []
+                self.store = ResultStore()
+                self.table_model.set_store(self.store)
+                self.input_loaded.clear()
+                self.upload_button.setEnabled(False)
+                self.process_button.setEnabled(False)
+                self.progress_bar.setValue(0)
+                self.progress_label.setText("Loading CSV...")
+
+                self.loader = CsvLoader(file_name)
+                self.loader.chunk_loaded.connect(self.on_chunk_loaded)
+                self.loader.progress.connect(self.update_load_progress)
+                self.loader.finished_loading.connect(self.on_loading_finished)
+                self.loader.error.connect(self.on_loading_error)
+                self.loader.start()
 
         except Exception as e:
             error_message = f"Error during CSV upload: {str(e)}"
             logger.error(error_message)
             QMessageBox.critical(self, "Error", error_message)
 
-    def update_table_with_input_data(self):
-        try:
-            self.results_table.setRowCount(len(self.data))
-            for i, row in enumerate(self.data):
-                for j, key in enumerate(['first_name', 'last_name', 'email', 'organization_name', 'title',
-                                         'website_url', 'phone_number', 'linkedin_url']):
-                    value = row.get(key, '')
-                    if isinstance(value, float):
-                        value = str(int(value)) if value.is_integer() else str(value)
-                    self.results_table.setItem(i, j, QTableWidgetItem(str(value) if value is not None else ''))
-                # Initialize remaining columns with empty values
-                for j in range(8, self.results_table.columnCount()):
-                    self.results_table.setItem(i, j, QTableWidgetItem(''))
-            logger.info(f"Updated table with {len(self.data)} rows")
-        except Exception as e:
-            logger.error(f"Error updating table: {str(e)}")
+    def on_chunk_loaded(self, leads):
+        self.data.extend(leads)
+        self.table_model.append_inputs(leads)
+        if not self.process_button.isEnabled() and not (self.worker and self.worker.isRunning()):
+            # The first chunk is enough to start processing
+            self.process_button.setEnabled(True)
+
+    def update_load_progress(self, percent, loaded_count):
+        if self.worker and self.worker.isRunning():
+            return  # The progress bar is showing processing progress
+        self.progress_bar.setValue(percent)
+        self.progress_label.setText(f"Loading CSV... {loaded_count} entries")
+
+    def on_loading_finished(self, valid_count, invalid_count, empty_count):
+        self.input_loaded.set()
+        self.upload_button.setEnabled(True)
+        if not (self.worker and self.worker.isRunning()):
+            self.progress_label.setText(f"0/{len(self.data)} sites processed")
+
+        if valid_count:
+            message = (f"CSV file loaded with {valid_count} valid entries.\n"
+                       f"{invalid_count} entries were skipped due to invalid URLs.\n"
+                       f"{empty_count} entries were skipped due to empty URL fields.")
+            logger.info(message)
+            QMessageBox.information(self, "Upload Successful", message)
+        else:
+            message = "No valid entries found in the CSV file."
+            logger.error(message)
+            QMessageBox.warning(self, "Upload Failed", message)
+
+    def on_loading_error(self, error):
+        self.input_loaded.set()
+        self.upload_button.setEnabled(True)
+        message = f"Failed to load the CSV file. Please check the file format and required columns.\n{error}"
+        logger.error(message)
+        QMessageBox.warning(self, "Upload Failed", message)
 
     def process_urls(self):
         if not self.data:
             QMessageBox.warning(self, "No Data", "Please upload a CSV file first.")
             return
 
+        # Domains finished by an earlier run with the same settings can be reused,
+        # whatever the order or content of the rest of the CSV
+        jobs = JobStore(job_settings(DATAFORSEO_MODE), self.jobs_dir)
+        finished = jobs.finished(lead.website_url for lead in self.data)
+        if finished:
+            reply = QMessageBox.question(
+                self,
+                'Resume',
+                f'{finished} of the {len(self.data)} sites already have results from an earlier run '
+                f'with the same settings. Reuse them and process only the rest?',
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                QMessageBox.StandardButton.Yes
+            )
+            if reply == QMessageBox.StandardButton.No:
+                jobs.forget()
+
         self.progress_bar.setValue(0)
         self.progress_label.setText(f"0/{len(self.data)} sites processed")
         self.process_button.setEnabled(False)
         self.export_button.setEnabled(False)
 
-        # Reset the resume file
-        if os.path.exists(self.resume_file):
-            os.remove(self.resume_file)
-
+        # Results are also streamed to the CSV export files as they finish
+        base, ext = os.path.splitext(self.input_csv_path)
         batch_size = 10  # You can adjust this value
-        self.worker = Worker(data=self.data, batch_size=batch_size, resume_file=self.resume_file)
+        self.worker = Worker(data=self.data, batch_size=batch_size, jobs=jobs, export_path=f"{base}_Out{ext}",
+                             input_loaded=self.input_loaded, event_loop=self.event_loop)
         self.worker.finished.connect(self.on_processing_finished)
         self.worker.progress.connect(self.update_progress)
+        self.worker.result_ready.connect(self.on_result_ready)
+        self.worker.stage_progress.connect(self.update_stage_progress)
+        self.worker.metrics_report.connect(self.save_metrics_report)
         self.worker.error.connect(self.show_error)
         self.worker.start()
 
@@ -223,68 +244,58 @@ class MainWindow(QMainWindow):
         self.progress_bar.setValue(value)
         self.progress_label.setText(f"{processed_count}/{len(self.data)} sites processed")
 
-    def on_processing_finished(self, results, processed_count):
-        self.results = results
-        self.update_table_with_processed_data(results)
+    def update_stage_progress(self, stats):
+        triage = stats.get('triage', {})
+        enrich = stats.get('enrich', {})
+        self.stage_label.setText(
+            f"Triage: {triage.get('completed', 0)} done, {triage.get('queued', 0)} queued  |  "
+            f"Enrichment: {enrich.get('completed', 0)} done, {enrich.get('queued', 0)} queued"
+        )
+        self.concurrency_label.setText(
+            f"Concurrency: triage {triage.get('limit', 0)}, enrichment {enrich.get('limit', 0)}"
+        )
+
+    def on_result_ready(self, result):
+        """Store a finished domain; the table picks it up on its next refresh."""
+        rows = self.store.set_result(result)
+        self.table_model.mark_rows_changed(rows)
+        if rows and self.proxy_model.sortColumn() < 0:
+            # Follow progress unless the user has sorted the table
+            self.results_table.scrollTo(self.proxy_model.mapFromSource(self.table_model.index(rows[-1], 0)))
+
+    def on_processing_finished(self, processed_count):
         self.process_button.setEnabled(True)
         self.export_button.setEnabled(True)
         QMessageBox.information(self, "Processing Complete", f"{processed_count}/{len(self.data)} URLs have been processed.")
 
+    def save_metrics_report(self, report):
+        """Write the run metrics next to the export: leads_Out_metrics.json."""
+        if self.input_csv_path:
+            base, ext = os.path.splitext(self.input_csv_path)
+            write_report(report, metrics_path(f"{base}_Out{ext}"))
+
     def show_error(self, message):
         QMessageBox.critical(self, "Error", message)
 
-    def update_table_with_processed_data(self, results):
-        try:
-            for result in results:
-                website = result['website']
-                for row in range(self.results_table.rowCount()):
-                    if self.results_table.item(row, 5).text() == website:  # Assuming website URL is in column 5
-                        # Convert any float values to strings
-                        linkedin_url = result.get('linkedin_url', '')
-                        if isinstance(linkedin_url, float):
-                            linkedin_url = str(int(linkedin_url)) if linkedin_url.is_integer() else str(linkedin_url)
-                        self.results_table.setItem(row, 7, QTableWidgetItem(str(linkedin_url)))
-
-                        # Update CMS column
-                        self.results_table.setItem(row, 8, QTableWidgetItem(str(result.get('cms', 'Unknown'))))
-
-                        # Update all data columns regardless of CMS status
-                        for j, key in enumerate(['domain_rank', 'total_pages', 'indexed_pages',
-                                                'backlinks', 'backlink_domains']):
-                            value = result.get(key, 'N/A')
-                            if isinstance(value, float):
-                                value = str(int(value)) if value.is_integer() else str(value)
-                            self.results_table.setItem(row, j + 9, QTableWidgetItem(str(value)))
-                        break
-
-            if results:
-                self.results_table.scrollToItem(self.results_table.item(len(results) - 1, 0))
-                logger.info(f"Updated table with {len(results)} processed results")
-        except Exception as e:
-            logger.error(f"Error updating table with processed data: {str(e)}")
-
     def export_results(self):
         try:
             if not self.input_csv_path:
                 QMessageBox.warning(self, "Error", "No input CSV file found. Please upload a CSV file first.")
                 return
 
-            # Generate the output filename by inserting "_Out" before .csv
+            formats = {"CSV": 'csv', "Parquet": 'parquet', "Arrow IPC": 'arrow'}
+            choice, ok = QInputDialog.getItem(
+                self, "Export Results", "Export format:", list(formats), 0, False
+            )
+            if not ok:
+                return
+
+            # Generate the output filename by inserting "_Out" before the extension
             base, ext = os.path.splitext(self.input_csv_path)
             output_filename = f"{base}_Out{ext}"
 
-            logger.info(f"Exporting results to: {output_filename}")
-
-            results_with_data = []
-            for i in range(self.results_table.rowCount()):
-                row_data = {}
-                for j in range(self.results_table.columnCount()):
-                    item = self.results_table.item(i, j)
-                    header = self.results_table.horizontalHeaderItem(j).text()
-                    row_data[header] = item.text() if item else ''
-                results_with_data.append(row_data)
-
-            success = write_csv(results_with_data, output_filename)
+            logger.info("Exporting results to: %s", output_filename)
+            success = self.store.export(output_filename, formats[choice])
             if success:
                 message = f"Results exported to {output_filename}"
                 logger.info(message)
@@ -0,0 +1,121 @@
+from typing import Any, Iterable, List, Set
+from PyQt6.QtCore import (QAbstractTableModel, QModelIndex, QSortFilterProxyModel, Qt, QTimer)
+from src.constants import TABLE_REFRESH_INTERVAL_MS
+from src.records import Lead
+from src.result_store import ResultStore, RESULT_COLUMNS, INPUT_KEYS
+
+# Role returning the raw value, so sorting compares numbers as numbers
+SORT_ROLE = Qt.ItemDataRole.UserRole
+
+_FIRST_RESULT_COLUMN = len(INPUT_KEYS)
+
+
+class ResultTableModel(QAbstractTableModel):
+    """
+    Read-only view of a ResultStore.
+
+    Cells are read from the store's columns when the view asks for them, so
+    only the visible rows cost anything. Rows updated by results are
+    collected and announced in a single dataChanged every
+    `refresh_interval_ms`, instead of one repaint per domain.
+    """
+
+    def __init__(self, store: ResultStore, parent=None, refresh_interval_ms: int = TABLE_REFRESH_INTERVAL_MS):
+        super().__init__(parent)
+        self._store = store
+        self._dirty_rows: Set[int] = set()
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.setInterval(refresh_interval_ms)
+        self._refresh_timer.timeout.connect(self.flush)
+
+    def set_store(self, store: ResultStore):
+        """Show a newly loaded store."""
+        self.beginResetModel()
+        self._store = store
+        self._dirty_rows.clear()
+        self.endResetModel()
+
+    def append_inputs(self, leads: List[Lead]):
+        """Add newly loaded leads to the store and the view."""
+        if not leads:
+            return
+        first = len(self._store)
+        self.beginInsertRows(QModelIndex(), first, first + len(leads) - 1)
+        self._store.load_inputs(leads)
+        self.endInsertRows()
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._store)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(RESULT_COLUMNS)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return RESULT_COLUMNS[section][1]
+        return section + 1
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        row = index.row()
+        key, _, kind = RESULT_COLUMNS[index.column()]
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.display_text(row, key)
+        if role == SORT_ROLE:
+            value = self._store.value(row, key)
+            if kind == 'int':
+                return -1 if value is None else value
+            if kind == 'flag':
+                return int(bool(value))
+            return value or ''
+        if role == Qt.ItemDataRole.TextAlignmentRole and kind == 'int':
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        return None
+
+    def display_text(self, row: int, key: str) -> str:
+        value = self._store.value(row, key)
+        if key in INPUT_KEYS:
+            return value or ''
+        if self._store.value(row, 'cms') is None:
+            return ''  # Not processed yet
+        if key in ('partial', 'indexed_pending', 'lookup_failed'):
+            return 'Yes' if value else ''
+        if key == 'indexed_pages' and self._store.value(row, 'indexed_pending'):
+            return 'pending'
+        if value is None:
+            return 'N/A'
+        return str(value)
+
+    def mark_rows_changed(self, rows: Iterable[int]):
+        """Queue rows whose results changed; the view hears about them on the next refresh."""
+        self._dirty_rows.update(rows)
+        if self._dirty_rows and not self._refresh_timer.isActive():
+            self._refresh_timer.start()
+
+    def flush(self):
+        """Announce all queued rows as one changed block of result columns."""
+        if not self._dirty_rows:
+            return
+        top, bottom = min(self._dirty_rows), max(self._dirty_rows)
+        self._dirty_rows.clear()
+        self.dataChanged.emit(
+            self.index(top, _FIRST_RESULT_COLUMN),
+            self.index(bottom, len(RESULT_COLUMNS) - 1),
+            [Qt.ItemDataRole.DisplayRole, SORT_ROLE]
+        )
+
+
+class ResultFilterProxyModel(QSortFilterProxyModel):
+    """Sorts on raw values and filters rows on text in any column."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setSortRole(SORT_ROLE)
+        self.setFilterKeyColumn(-1)
+        self.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.setDynamicSortFilter(True)
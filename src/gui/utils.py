@@ -5,4 +5,20 @@ def is_valid_url(url):
         result = urlparse(url)
         return all([result.scheme, result.netloc])
     except ValueError:
-        return False
\ No newline at end of file
+        return False
+
+def is_valid_domain(url):
+    """Validate URL, accepting domain names without scheme"""
+    if not url or url.isspace():
+        return False
+
+    url = url.strip()
+
+    # Remove any scheme if present
+    if url.startswith(('http://', 'https://')):
+        parsed = urlparse(url)
+        url = parsed.netloc
+
+    # Basic domain validation
+    parts = url.split('.')
+    return len(parts) >= 2 and all(part for part in parts)
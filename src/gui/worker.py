@@ -2,39 +2,61 @@ import sys
 import logging
 from PyQt6.QtCore import QThread, pyqtSignal
 from src.data_processor import DataForSEOClient
+from src.pipeline import TwoStagePipeline
+from src.records import SiteResult
+from src.csv_handler import clean_domain
+from src.event_loop import new_event_loop, resolve_loop
+from src.jobs import JobStore, job_settings
+from src.export_writer import StreamingExport
+from src.constants import (
+    QUEUE_ENRICH_CONCURRENCY, QUEUE_ENRICH_QUEUE_SIZE, QUEUE_ENRICH_REQUESTS_PER_SECOND, INPUT_WAIT_INTERVAL,
+    EVENT_LOOP, DATAFORSEO_MODE
+)
 import asyncio
-import json
-import os
 import platform
+import threading
+from dataclasses import asdict
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 class Worker(QThread):
-    finished = pyqtSignal(list, int)
+    finished = pyqtSignal(int)  # Rows processed; the results themselves went out through result_ready
     progress = pyqtSignal(int, int)
+    stage_progress = pyqtSignal(dict)
+    result_ready = pyqtSignal(object)  # SiteResult
+    metrics_report = pyqtSignal(dict)
     error = pyqtSignal(str)
 
-    def __init__(self, data, batch_size=10, resume_file='resume.json'):
+    def __init__(self, data, batch_size=10, jobs=None, export_path=None, input_loaded=None, event_loop=EVENT_LOOP):
         super().__init__()
         self.data = data
+        # Set once `data` is complete; until then more rows may still be appended
+        if input_loaded is None:
+            input_loaded = threading.Event()
+            input_loaded.set()
+        self.input_loaded = input_loaded
         self.batch_size = batch_size
-        self.resume_file = resume_file
-        self.start_index = 0
+        # Domains finished by earlier runs with the same settings are reported, not processed again
+        self.jobs = jobs if jobs is not None else JobStore(job_settings(DATAFORSEO_MODE))
+        self.reused = 0
+        self.processed = 0
+        # Per-CMS CSVs that grow as domains finish, next to where Export writes them
+        self.export = StreamingExport(export_path) if export_path else None
         self._is_running = True
+        self.event_loop = resolve_loop(event_loop)
         self.loop = None
 
     def run(self):
         try:
             # Create a new event loop for this thread
-            self.loop = asyncio.new_event_loop()
+            self.loop = new_event_loop(self.event_loop)
             asyncio.set_event_loop(self.loop)
+            logger.info("Worker running on the %s event loop", self.event_loop)
 
-            # Run the async code and get results
-            results, processed_count = self.loop.run_until_complete(self.async_run())
-
-            # Emit results
-            self.finished.emit(results, processed_count)
+            # Run the async code and get the number of rows processed
+            processed_count = self.loop.run_until_complete(self.async_run())
+            self.finished.emit(processed_count)
 
         except Exception as e:
             self.error.emit(f"Error in Worker: {str(e)}")
@@ -60,105 +82,104 @@ class Worker(QThread):
             self.loop.call_soon_threadsafe(self.loop.stop)
 
     async def async_run(self):
-        results = []
-        processed_count = 0
-        self.start_index = self.load_resume()
-
-        if self.start_index >= len(self.data):
-            self.start_index = 0
+        def report(lead, result):
+            if self.export is not None:
+                self.export.append(lead, result)
+            self.processed += 1
+            self.result_ready.emit(result)
+            progress = min(100, int(self.processed / len(self.data) * 100))
+            self.progress.emit(progress, self.processed)
+
+        def on_result(job):
+            # Keep only the reported fields; the client's working dict is dropped
+            result = SiteResult.from_client(job.website, job.row.linkedin_url, job.result)
+            client.metrics.record_domain(job.website, job.stage_seconds)
+            self.jobs.record(result)
+            report(job.row, result)
+            if self.processed % self.batch_size == 0:
+                self.jobs.flush()
+            self.stage_progress.emit(pipeline.stats)
 
         try:
             async with DataForSEOClient() as client:
-                for i in range(self.start_index, len(self.data), self.batch_size):
-                    if not self._is_running:
-                        break
-
-                    batch = self.data[i:i+self.batch_size]
-                    batch_results = await self.process_batch(client, batch)
-                    results.extend(batch_results)
-
-                    processed_count += len(batch_results)
-                    self.save_resume(i + self.batch_size)
-                    progress = min(100, int((i + self.batch_size) / len(self.data) * 100))
-                    self.progress.emit(progress, processed_count)
-
-            return results, processed_count
+                # Domains deferred by an earlier run's CSE quota were not stored as finished,
+                # so the ones in this input are looked up again as they reach enrichment
+                stage_settings = dict(triage_limiter=client.scrape_limiter, enrich_limiter=client.api_limiter)
+                if client.task_queue is not None:
+                    # Queued tasks take minutes, so keep many domains in enrichment at once;
+                    # their latency says nothing about load, so enrichment is not adaptive
+                    stage_settings.update(
+                        enrich_concurrency=QUEUE_ENRICH_CONCURRENCY,
+                        enrich_queue_size=QUEUE_ENRICH_QUEUE_SIZE,
+                        enrich_rate=QUEUE_ENRICH_REQUESTS_PER_SECOND,
+                        enrich_limiter=None
+                    )
+                pipeline = TwoStagePipeline(
+                    client,
+                    on_result=on_result,
+                    should_continue=lambda: self._is_running,
+                    **stage_settings
+                )
+                await pipeline.run(self.rows(on_reused=report))
+                self.metrics_report.emit(self.build_report(client, pipeline, self.save_job()))
+
+            return self.processed
         except Exception as e:
             self.error.emit(f"Error during processing: {str(e)}")
-            return results, processed_count
-
-    async def process_batch(self, client, batch):
-        batch_results = []
-        for row in batch:
-            if not self._is_running:
-                break
-
-            website = row['website_url']
-            linkedin_url = row.get('linkedin_url', '')
-            try:
-                # Remove any existing protocol as the API client will handle
-                if website.startswith(('http://', 'https://')):
-                    website = website.split('://', 1)[1]
-
-                # Get website data
-                website_data = await client.get_website_data(website)
-                
-                # Add delay between API calls
-                await asyncio.sleep(1.5)
-
-                # Extract all needed values with defaults
-                cms = website_data.get('cms', 'Error')
-                domain_rank = website_data.get('domain_rank')
-                total_pages = website_data.get('total_pages', 0)
-                indexed_pages = website_data.get('indexed_pages', 0)
-                backlinks = website_data.get('backlinks', 0)
-                backlink_domains = website_data.get('backlink_domains', 0)
-
-                # Create result dictionary with extracted values
-                result = {
-                    'website': website,
-                    'linkedin_url': linkedin_url,
-                    'cms': cms,
-                    'domain_rank': domain_rank,
-                    'total_pages': total_pages,
-                    'indexed_pages': indexed_pages,
-                    'backlinks': backlinks,
-                    'backlink_domains': backlink_domains
-                }
-
-                batch_results.append(result)
-
-            except Exception as e:
-                logger.error()
-                error_msg = f"Error processing {website}: {str(e)}"
-                self.error.emit(error_msg)
-                # Add error result to maintain order
-                batch_results.append({
-                    'website': website,
-                    'linkedin_url': linkedin_url,
-                    'cms': cms,
-                    'domain_rank': domain_rank,
-                    'total_pages': total_pages,
-                    'indexed_pages': indexed_pages,
-                    'backlinks': backlinks,
-                    'backlink_domains': backlink_domains
-                })
-
-        return batch_results
-
-    def save_resume(self, index):
-        try:
-            with open(self.resume_file, 'w') as f:
-                json.dump({'last_processed_index': index}, f)
-        except Exception as e:
-            self.error.emit(f"Error saving resume state: {str(e)}")
-
-    def load_resume(self):
-        try:
-            if os.path.exists(self.resume_file):
-                with open(self.resume_file, 'r') as f:
-                    data = json.load(f)
-                    return data.get('last_processed_index', 0)
-        except Exception as e:
-            self.error.emit(f"Error loading resume state: {str(e)}")
-        return 0
+            return self.processed
+        finally:
+            self.jobs.flush()
+            if self.export is not None:
+                self.export.close()
+                if self.export.error:
+                    self.error.emit(f"Error writing results as they finished: {self.export.error}")
+
+    def save_job(self):
+        """Record the job once the whole input is known; the manifest's id goes into the report."""
+        if not self.input_loaded.is_set():
+            return None
+        identity = self.jobs.save_job(lead.website_url for lead in self.data)
+        logger.info("Job %s: %s of %s rows reused from earlier runs", identity, self.reused, len(self.data))
+        return identity
+
+    def build_report(self, client, pipeline, job_id=None):
+        """Run metrics from the client's counters plus retry, host and stage totals."""
+        retries = client.retry_engine.summary()
+        extra = {
+            'event_loop': self.event_loop,
+            'job': {'id': job_id, 'reused': self.reused},
+            'timeouts': retries['total_timeouts'] + client.hosts.timeouts,
+            'retries': retries,
+            'hosts': {'short_circuited': client.hosts.short_circuited, 'timeouts': client.hosts.timeouts,
+                      'crawl_delayed': client.hosts.delayed},
+            'pipeline': pipeline.stats,
+            'cse_quota': {'remaining': client.cse_quota.remaining, 'deferred': client.cse_quota.deferred},
+        }
+        if client.task_queue is not None:
+            extra['task_queue'] = asdict(client.task_queue.stats)
+        return client.metrics.report(**extra)
+
+    async def rows(self, on_reused=None):
+        """
+        (index, lead) pairs for the rows still to process, waiting for rows the
+        CSV loader has not added yet. Rows whose domain has a stored result are
+        passed to `on_reused` with their lead instead.
+        """
+        index = 0
+        while True:
+            # Read the flag first: rows appended before it was set are then seen below
+            loaded = self.input_loaded.is_set()
+            if index < len(self.data):
+                lead = self.data[index]
+                stored = self.jobs.result(clean_domain(lead.website_url), lead.linkedin_url)
+                if stored is None:
+                    yield index, lead
+                else:
+                    self.reused += 1
+                    if on_reused is not None:
+                        on_reused(lead, stored)
+                index += 1
+            elif loaded or not self._is_running:
+                return
+            else:
+                await asyncio.sleep(INPUT_WAIT_INTERVAL)
@@ -0,0 +1,140 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from aiohttp import ClientError
+from src.constants import HOST_CONCURRENCY_LIMIT, HOST_FAILURE_THRESHOLD, HOST_BREAKER_RESET_TIMEOUT, CRAWL_DELAY_MAX
+from src.deadline import cut_by_deadline
+from src.retry import CircuitBreaker, CircuitOpenError, OVERLOAD_STATUSES  # noqa: F401
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class HostUnavailableError(CircuitOpenError):
+    """Raised for requests to a scraped host whose breaker has tripped"""
+    pass
+
+
+class _HostState:
+    __slots__ = ('semaphore', 'breaker', 'users')
+
+    def __init__(self, limit: int, failure_threshold: int, reset_timeout: float):
+        self.semaphore = asyncio.Semaphore(limit)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.users = 0  # Requests holding or waiting for a slot
+
+
+class HostScheduler:
+    """
+    Per-host concurrency cap and circuit breaker for scraped websites.
+
+    Requests to one host wait for one of `limit` slots. After
+    `failure_threshold` consecutive timeouts, connection errors or 429/503
+    responses the host's breaker opens: the request that is waiting for a
+    slot, and any later one, fails at once with HostUnavailableError.
+
+    Hosts given a Crawl-delay with `set_crawl_delay` also have the starts
+    of their requests spaced at least that far apart.
+    """
+
+    def __init__(self, limit: int = HOST_CONCURRENCY_LIMIT,
+                 failure_threshold: int = HOST_FAILURE_THRESHOLD,
+                 reset_timeout: float = HOST_BREAKER_RESET_TIMEOUT):
+        self.limit = limit
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._hosts: Dict[str, _HostState] = {}
+        self.short_circuited = 0  # Requests skipped because a breaker was open
+        self.timeouts = 0
+        # Kept apart from _hosts, which drops idle hosts
+        self._crawl_delays: Dict[str, float] = {}
+        self._next_start: Dict[str, float] = {}
+        self.delayed = 0  # Requests that waited for a host's Crawl-delay
+
+    def _state(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = _HostState(self.limit, self.failure_threshold, self.reset_timeout)
+            self._hosts[host] = state
+        return state
+
+    def _check(self, host: str, state: _HostState):
+        if not state.breaker.allow():
+            self.short_circuited += 1
+            raise HostUnavailableError(f"{host} is failing, skipping request")
+
+    def is_open(self, host: str) -> bool:
+        state = self._hosts.get(host)
+        return bool(state and state.breaker.is_open)
+
+    def set_crawl_delay(self, host: str, delay: Optional[float]):
+        """Space requests to `host` by its robots.txt Crawl-delay, capped at CRAWL_DELAY_MAX."""
+        if delay:
+            self._crawl_delays[host] = min(delay, CRAWL_DELAY_MAX)
+        else:
+            self._crawl_delays.pop(host, None)
+            self._next_start.pop(host, None)
+
+    def crawl_delay(self, host: str) -> Optional[float]:
+        return self._crawl_delays.get(host)
+
+    async def _wait_crawl_delay(self, host: str):
+        delay = self._crawl_delays.get(host)
+        if not delay:
+            return
+        # Reserve the next start time before sleeping so concurrent requests queue up behind it
+        now = asyncio.get_running_loop().time()
+        start = max(now, self._next_start.get(host, now))
+        self._next_start[host] = start + delay
+        if start > now:
+            self.delayed += 1
+            await asyncio.sleep(start - now)
+
+    def record_failure(self, host: str):
+        state = self._state(host)
+        state.breaker.record_failure()
+        if state.breaker.is_open:
+            logger.warning("Circuit opened for %s after %s consecutive failures", host, state.breaker.failures)
+
+    @asynccontextmanager
+    async def slot(self, host: str):
+        """
+        Hold one of the host's request slots.
+
+        Timeouts and connection errors raised inside the block count as
+        failures, unless the domain deadline caused them; callers report
+        overload statuses with `record_failure`.
+        """
+        state = self._state(host)
+        if state.breaker.cooling_down:
+            self.short_circuited += 1
+            raise HostUnavailableError(f"{host} is failing, skipping request")
+        state.users += 1
+        try:
+            async with state.semaphore:
+                await self._wait_crawl_delay(host)
+                # The breaker may have opened while we were queued
+                self._check(host, state)
+                trial = state.breaker.is_open  # This request is the half-open trial
+                failures_before = state.breaker.failures
+                try:
+                    yield
+                except (ClientError, asyncio.TimeoutError) as e:
+                    # A request cut short by the domain's own deadline says nothing about the host
+                    if not cut_by_deadline(e):
+                        if isinstance(e, asyncio.TimeoutError):
+                            self.timeouts += 1
+                        self.record_failure(host)
+                    raise
+                else:
+                    if state.breaker.failures == failures_before:
+                        state.breaker.record_success()
+                finally:
+                    if trial:
+                        state.breaker.release_trial()
+        finally:
+            state.users -= 1
+            # Drop idle, healthy hosts so the table does not grow with the run
+            if state.users == 0 and not state.breaker.is_open and state.breaker.failures == 0:
+                self._hosts.pop(host, None)
@@ -0,0 +1,167 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, fields
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+from src.constants import (
+    JOBS_DIR, JOB_RESULT_TTL_DAYS, CMS_MIN_CONFIDENCE, CMS_CONFIRM_CONFIDENCE, CMS_HEADER_CONFIDENCE
+)
+from src.csv_handler import clean_domain
+from src.records import SiteResult
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+PROGRESS_FILE = 'progress.jsonl'
+_RESULT_FIELDS = {f.name for f in fields(SiteResult)}
+
+
+def canonical_domain(website: Optional[str]) -> str:
+    """Domain a lead's website stands for: no scheme, path or leading www., lowercased."""
+    domain = clean_domain(website or '').strip().lower().split('/', 1)[0]
+    return domain[4:] if domain.startswith('www.') else domain
+
+
+def job_settings(mode: str) -> Dict[str, Any]:
+    """Settings that change what a run reports; stored results are only reused under the same ones."""
+    return {
+        'dataforseo_mode': mode,
+        'cms_min_confidence': CMS_MIN_CONFIDENCE,
+        'cms_confirm_confidence': CMS_CONFIRM_CONFIDENCE,
+        'cms_header_confidence': CMS_HEADER_CONFIDENCE,
+    }
+
+
+def _digest(value: Any) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+def job_id(websites: Iterable[str], settings: Dict[str, Any]) -> str:
+    """Identity of a job: its canonical domain set plus its settings, independent of row order."""
+    domains = sorted({canonical_domain(website) for website in websites} - {''})
+    return _digest({'domains': domains, 'settings': settings})
+
+
+def _incomplete(result: Dict[str, Any]) -> bool:
+    """A result missing data that a later run could still fetch."""
+    return any(result.get(flag) for flag in ('partial', 'indexed_pending', 'lookup_failed'))
+
+
+class JobStore:
+    """
+    Finished domains for one set of settings, shared by every job run with them.
+
+    Each distinct set of settings gets a directory under `directory`, named
+    by its digest. progress.jsonl holds one line per finished domain with
+    its result, appended in batches, so progress survives a crash without
+    rewriting the file; the last line for a domain wins. Each job, identified
+    by `job_id` of its domain set and settings, leaves a <job_id>.json
+    manifest beside it. A re-sorted, filtered or extended CSV therefore
+    only processes the domains that have no stored result yet.
+
+    Results cut short by the time budget, still waiting for a deferred
+    indexed-page count, with a failed paid lookup, or for sites that could
+    not be reached are not stored, so the next run tries them again.
+    """
+
+    def __init__(self, settings: Dict[str, Any], directory: str = JOBS_DIR,
+                 ttl_days: float = JOB_RESULT_TTL_DAYS):
+        self.settings = settings
+        self.path = os.path.join(directory, _digest(settings))
+        self.ttl = ttl_days * 86400
+        self._progress_path = os.path.join(self.path, PROGRESS_FILE)
+        self._torn = False  # The file ends in a half-written line
+        self._results: Dict[str, Dict[str, Any]] = self._load()
+        self._pending: List[Dict[str, Any]] = []
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        results = {}
+        cutoff = time.time() - self.ttl
+        try:
+            with open(self._progress_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    self._torn = not line.endswith('\n')
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # Interrupted mid-write
+                    if entry['finished'] >= cutoff and not _incomplete(entry['result']):
+                        results[entry['domain']] = entry['result']
+                    else:
+                        results.pop(entry['domain'], None)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning("Could not load job progress %s: %s", self._progress_path, e)
+        return results
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def finished(self, websites: Iterable[str]) -> int:
+        """How many of these websites already have a stored result."""
+        return sum(canonical_domain(website) in self._results for website in websites)
+
+    def result(self, website: str, linkedin_url: Optional[str] = None) -> Optional[SiteResult]:
+        """The stored result for a website's domain, reported under this lead's website and LinkedIn URL."""
+        stored = self._results.get(canonical_domain(website))
+        if stored is None:
+            return None
+        values = {key: value for key, value in stored.items() if key in _RESULT_FIELDS}
+        values.update(website=website, linkedin_url=linkedin_url or '')
+        return SiteResult(**values)
+
+    def record(self, result: SiteResult):
+        data = asdict(result)
+        if _incomplete(data) or result.cms == 'Error':
+            return
+        domain = canonical_domain(result.website)
+        del data['website'], data['linkedin_url']
+        self._results[domain] = data
+        self._pending.append({'domain': domain, 'finished': int(time.time()), 'result': data})
+
+    def forget(self):
+        """Start over: earlier results are ignored for this run and replaced as domains finish."""
+        self._results = {}
+
+    def flush(self) -> Optional[str]:
+        """Append the results recorded since the last flush. Returns the path written, if any."""
+        if not self._pending:
+            return None
+        lines = ''.join(json.dumps(entry) + '\n' for entry in self._pending)
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            with open(self._progress_path, 'a', encoding='utf-8') as f:
+                f.write('\n' + lines if self._torn else lines)
+            self._torn = False
+            self._pending = []
+            return self._progress_path
+        except Exception as e:
+            logger.error("Error saving job progress %s: %s", self._progress_path, e)
+            return None
+
+    def save_job(self, websites: Iterable[str]) -> str:
+        """Write the manifest for the job over these websites; returns its id."""
+        websites = list(websites)
+        identity = job_id(websites, self.settings)
+        domains = {canonical_domain(website) for website in websites} - {''}
+        manifest = {
+            'job_id': identity,
+            'settings': self.settings,
+            'domains': len(domains),
+            'finished': sum(domain in self._results for domain in domains),
+            'updated': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        }
+        path = os.path.join(self.path, f"{identity}.json")
+        tmp_path = path + '.tmp'
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            with open(tmp_path, 'w') as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error("Error saving job manifest %s: %s", path, e)
+        return identity
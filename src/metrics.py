@@ -0,0 +1,151 @@
+import heapq
+import json
+import logging
+import os
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from src.constants import API_CALL_COSTS, METRICS_SAMPLE_INTERVAL, METRICS_SLOWEST_DOMAINS
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class RunMetrics:
+    """
+    Counters for one processing run, reported as JSON when it ends.
+
+    The client records billable API calls, bytes received and cache
+    lookups; the Worker records each finished domain with its stage times.
+    Throughput, with the adaptive concurrency limits at the time, is sampled
+    every `sample_interval` seconds.
+    """
+
+    def __init__(self, mode: str = 'live', sample_interval: float = METRICS_SAMPLE_INTERVAL,
+                 slowest: int = METRICS_SLOWEST_DOMAINS):
+        self.mode = mode
+        self.sample_interval = sample_interval
+        self.slowest = slowest
+        self.started_at = datetime.now(timezone.utc)
+        self._started = time.monotonic()
+        self._last_sample = (0.0, 0)  # (elapsed, completed) at the last sample
+
+        self.completed = 0
+        self.throughput: List[Dict[str, float]] = []
+        self.stage_seconds: Counter = Counter()
+        self.stage_domains: Counter = Counter()
+        self.bytes_received = 0
+        self.header_only = 0  # Domains whose CMS was settled without reading the homepage body
+        self.api_calls: Counter = Counter()
+        self.cache_hits: Counter = Counter()
+        self.cache_misses: Counter = Counter()
+        self._slowest: List[Tuple[float, str]] = []  # Min-heap of the slowest domains
+        self._limiters: List[Any] = []  # AdaptiveLimiters whose limits are sampled
+
+    def track_limiters(self, *limiters: Any):
+        self._limiters.extend(limiters)
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self._started
+
+    def record_api_call(self, endpoint: str):
+        self.api_calls[endpoint] += 1
+
+    def record_bytes(self, count: int):
+        self.bytes_received += count
+
+    def record_header_only(self):
+        self.header_only += 1
+
+    def record_cache(self, name: str, hit: bool):
+        if hit:
+            self.cache_hits[name] += 1
+        else:
+            self.cache_misses[name] += 1
+
+    def record_domain(self, domain: str, stage_seconds: Dict[str, float]):
+        """A domain finished; `stage_seconds` holds the time it spent in each stage."""
+        self.completed += 1
+        for stage, seconds in stage_seconds.items():
+            self.stage_seconds[stage] += seconds
+            self.stage_domains[stage] += 1
+
+        entry = (sum(stage_seconds.values()), domain)
+        if len(self._slowest) < self.slowest:
+            heapq.heappush(self._slowest, entry)
+        elif entry > self._slowest[0]:
+            heapq.heapreplace(self._slowest, entry)
+        self._sample()
+
+    def _sample(self, force: bool = False):
+        elapsed = self.elapsed()
+        last_elapsed, last_completed = self._last_sample
+        if not force and elapsed - last_elapsed < self.sample_interval:
+            return
+        window = max(elapsed - last_elapsed, 1e-9)
+        sample = {
+            'elapsed_seconds': round(elapsed, 1),
+            'completed': self.completed,
+            'domains_per_minute': round((self.completed - last_completed) * 60 / window, 2)
+        }
+        if self._limiters:
+            sample['concurrency'] = {limiter.name: limiter.limit for limiter in self._limiters}
+        self.throughput.append(sample)
+        self._last_sample = (elapsed, self.completed)
+
+    def report(self, **extra: Any) -> Dict[str, Any]:
+        """The run report; keyword arguments are added as extra sections."""
+        self._sample(force=True)
+        elapsed = self.elapsed()
+        costs = API_CALL_COSTS.get(self.mode, {})
+        api_calls = {
+            endpoint: {'calls': calls, 'cost': round(calls * costs.get(endpoint, 0.0), 4)}
+            for endpoint, calls in sorted(self.api_calls.items())
+        }
+        caches = {}
+        for name in sorted(set(self.cache_hits) | set(self.cache_misses)):
+            hits, misses = self.cache_hits[name], self.cache_misses[name]
+            caches[name] = {'hits': hits, 'misses': misses, 'hit_rate': round(hits / (hits + misses), 3)}
+
+        report = {
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'elapsed_seconds': round(elapsed, 1),
+            'mode': self.mode,
+            'domains_completed': self.completed,
+            'domains_per_minute': round(self.completed * 60 / elapsed, 2) if elapsed else 0.0,
+            'throughput': self.throughput,
+            'stages': {
+                stage: {'domains': self.stage_domains[stage], 'seconds': round(seconds, 1),
+                        'mean_seconds': round(seconds / self.stage_domains[stage], 2)}
+                for stage, seconds in self.stage_seconds.items()
+            },
+            'bytes_received': self.bytes_received,
+            'cms_from_headers_only': self.header_only,
+            'api_calls': api_calls,
+            'api_cost': round(sum(entry['cost'] for entry in api_calls.values()), 4),
+            'caches': caches,
+            'concurrency': {limiter.name: limiter.snapshot() for limiter in self._limiters},
+            'slowest_domains': [
+                {'domain': domain, 'seconds': round(seconds, 2)}
+                for seconds, domain in sorted(self._slowest, reverse=True)
+            ],
+        }
+        report.update(extra)
+        return report
+
+
+def metrics_path(output_path: str) -> str:
+    """Report path next to an output file: leads_Out.csv -> leads_Out_metrics.json."""
+    return os.path.splitext(output_path)[0] + '_metrics.json'
+
+
+def write_report(report: Dict[str, Any], path: str) -> Optional[str]:
+    try:
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+        logger.info("Wrote run metrics to %s", path)
+        return path
+    except OSError as e:
+        logger.error("Error writing run metrics to %s: %s", path, e)
+        return None
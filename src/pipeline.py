@@ -0,0 +1,219 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field, asdict
+from typing import Any, AsyncIterable, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, Union
+from src.constants import (
+    TRIAGE_CONCURRENCY, TRIAGE_QUEUE_SIZE,
+    ENRICH_CONCURRENCY, ENRICH_QUEUE_SIZE, ENRICH_REQUESTS_PER_SECOND
+)
+from src.utils import RateLimiter
+from src.concurrency import AdaptiveLimiter
+from src.deadline import Deadline
+from src.records import Lead
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Sentinel used to shut down stage workers
+_STOP = object()
+
+
+@dataclass
+class StageStats:
+    """Progress counters for a single pipeline stage."""
+    name: str
+    queued: int = 0
+    in_flight: int = 0
+    completed: int = 0
+    failed: int = 0
+    limit: int = 0  # Current concurrency limit
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class PipelineJob:
+    """A single input row travelling through the pipeline."""
+    index: int
+    row: Lead
+    website: str
+    result: Dict[str, Any] = field(default_factory=dict)
+    deadline: Deadline = field(default_factory=Deadline)
+    stage_seconds: Dict[str, float] = field(default_factory=dict)  # Time spent in each stage
+
+
+class Stage:
+    """
+    A pool of workers consuming a bounded queue.
+
+    The queue size provides back-pressure: `put` blocks once the stage has
+    `queue_size` items waiting, so an upstream producer can never run more
+    than one queue ahead of the stage it feeds.
+
+    With a `limiter` the stage runs up to the limiter's maximum workers, and
+    each item is handled only once a limiter slot is free, so the limiter's
+    current limit is the stage's concurrency.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[Any], Awaitable[None]],
+        concurrency: int,
+        queue_size: int,
+        rate_limiter: Optional[RateLimiter] = None,
+        on_error: Optional[Callable[[Any, Exception], Awaitable[None]]] = None,
+        limiter: Optional[AdaptiveLimiter] = None
+    ):
+        self.name = name
+        self.handler = handler
+        self.limiter = limiter
+        self.concurrency = limiter.maximum if limiter else concurrency
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.rate_limiter = rate_limiter
+        self.on_error = on_error
+        self.stats = StageStats(name, limit=limiter.limit if limiter else concurrency)
+        self._workers: List[asyncio.Task] = []
+
+    def start(self):
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+
+    async def put(self, item: Any):
+        self.stats.queued += 1
+        await self.queue.put(item)
+
+    async def close(self):
+        """Wait for queued items to drain, then stop the workers."""
+        for _ in self._workers:
+            await self.queue.put(_STOP)
+        await asyncio.gather(*self._workers)
+        self._workers = []
+
+    async def _work(self):
+        while True:
+            item = await self.queue.get()
+            if item is _STOP:
+                return
+
+            self.stats.queued -= 1
+            if self.limiter:
+                await self.limiter.acquire()
+                self.stats.limit = self.limiter.limit
+            self.stats.in_flight += 1
+            started = None
+            try:
+                if self.rate_limiter:
+                    await self.rate_limiter.acquire()
+                started = time.monotonic()
+                await self.handler(item)
+                self.stats.completed += 1
+            except Exception as e:
+                self.stats.failed += 1
+                logger.error("Error in %s stage: %s", self.name, e)
+                if self.on_error:
+                    await self.on_error(item, e)
+            finally:
+                self.stats.in_flight -= 1
+                if self.limiter:
+                    self.limiter.release(None if started is None else time.monotonic() - started)
+                    self.stats.limit = self.limiter.limit
+
+
+async def _aiter(rows):
+    """Iterate a plain or async iterable alike."""
+    if hasattr(rows, '__aiter__'):
+        async for row in rows:
+            yield row
+    else:
+        for row in rows:
+            yield row
+
+
+class TwoStagePipeline:
+    """
+    Stage 1 (triage) runs the cheap CMS scrape over the whole list at high
+    concurrency. Only confirmed WordPress sites are handed to stage 2
+    (enrichment), which makes the paid DataForSEO and Google CSE calls under
+    its own concurrency and rate limit. Triage keeps running ahead until the
+    enrichment queue is full, so the rate-limited stage always has work.
+    Either stage can take an AdaptiveLimiter in place of its fixed
+    concurrency.
+    """
+
+    def __init__(
+        self,
+        client,
+        on_result: Callable[[PipelineJob], None],
+        should_continue: Callable[[], bool] = lambda: True,
+        triage_concurrency: int = TRIAGE_CONCURRENCY,
+        triage_queue_size: int = TRIAGE_QUEUE_SIZE,
+        enrich_concurrency: int = ENRICH_CONCURRENCY,
+        enrich_queue_size: int = ENRICH_QUEUE_SIZE,
+        enrich_rate: float = ENRICH_REQUESTS_PER_SECOND,
+        triage_limiter: Optional[AdaptiveLimiter] = None,
+        enrich_limiter: Optional[AdaptiveLimiter] = None
+    ):
+        self.client = client
+        self.on_result = on_result
+        self.should_continue = should_continue
+        self.triage = Stage(
+            'triage', self._triage, triage_concurrency, triage_queue_size,
+            on_error=self._emit_failed, limiter=triage_limiter
+        )
+        self.enrich = Stage(
+            'enrich', self._enrich, enrich_concurrency, enrich_queue_size,
+            rate_limiter=RateLimiter(enrich_rate), on_error=self._emit_failed, limiter=enrich_limiter
+        )
+
+    @property
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            self.triage.name: self.triage.stats.as_dict(),
+            self.enrich.name: self.enrich.stats.as_dict()
+        }
+
+    async def run(self, rows: Union[Iterable[Tuple[int, Lead]], AsyncIterable[Tuple[int, Lead]]]):
+        """Feed (index, lead) pairs through both stages until done or stopped."""
+        self.triage.start()
+        self.enrich.start()
+        try:
+            async for index, row in _aiter(rows):
+                if not self.should_continue():
+                    logger.info("Pipeline stopped, no further rows will be queued")
+                    break
+                website = row.website_url
+                if website.startswith(('http://', 'https://')):
+                    website = website.split('://', 1)[1]
+                job = PipelineJob(index=index, row=row, website=website)
+                job.deadline.pause()  # Starts when a triage worker picks the job up
+                await self.triage.put(job)
+        finally:
+            # Triage must drain first because it feeds the enrichment queue
+            await self.triage.close()
+            await self.enrich.close()
+
+    async def _triage(self, job: PipelineJob):
+        job.deadline.resume()
+        started = time.monotonic()
+        job.result = await self.client.detect_cms(job.website, job.deadline)
+        job.stage_seconds[self.triage.name] = time.monotonic() - started
+        if job.result.get('cms') == 'WordPress' and self.should_continue():
+            # Time spent waiting for an enrichment slot does not count against the domain
+            job.deadline.pause()
+            await self.enrich.put(job)
+        else:
+            self.on_result(job)
+
+    async def _enrich(self, job: PipelineJob):
+        job.deadline.resume()
+        started = time.monotonic()
+        await self.client.enrich_website_data(job.website, job.result, job.deadline)
+        job.stage_seconds[self.enrich.name] = time.monotonic() - started
+        self.on_result(job)
+
+    async def _emit_failed(self, job: PipelineJob, error: Exception):
+        if not job.result:
+            job.result = self.client.empty_result()
+        self.on_result(job)
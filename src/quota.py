@@ -0,0 +1,109 @@
+import logging
+import time
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+from src.cache import JsonCache
+from src.constants import (
+    CSE_DAILY_QUOTA, CSE_QUOTA_RESERVE, CSE_PRIORITY_MIN_RANK, CSE_RESULT_TTL_DAYS
+)
+from src.utils import RateLimitError
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+try:
+    from zoneinfo import ZoneInfo
+    # Google resets Custom Search quotas at midnight Pacific time
+    _QUOTA_TZ = ZoneInfo('America/Los_Angeles')
+except Exception:
+    _QUOTA_TZ = timezone.utc
+
+
+class QuotaExceededError(RateLimitError):
+    """Raised when Google reports the daily Custom Search quota is used up"""
+    pass
+
+
+def _quota_day() -> str:
+    return datetime.now(_QUOTA_TZ).strftime('%Y-%m-%d')
+
+
+class CSEQuotaManager:
+    """
+    Tracks Google Custom Search usage against the daily quota.
+
+    Usage, cached totalResults per domain and the queue of deferred
+    lookups all live in the shared JSON cache, so they carry over between
+    runs. The last `reserve` queries of the day are kept for domains whose
+    domain_rank is at least `priority_min_rank`; other lookups are deferred
+    and reported as pending. A deferred domain is looked up again when a
+    later run enriches it with quota to spare.
+    """
+
+    def __init__(self, cache: JsonCache, daily_quota: int = CSE_DAILY_QUOTA,
+                 reserve: int = CSE_QUOTA_RESERVE, priority_min_rank: int = CSE_PRIORITY_MIN_RANK,
+                 ttl_days: float = CSE_RESULT_TTL_DAYS):
+        self.cache = cache
+        self.daily_quota = daily_quota
+        self.reserve = reserve
+        self.priority_min_rank = priority_min_rank
+        self.ttl_seconds = ttl_days * 86400
+        self._usage = cache.namespace('cse_usage')
+        self._results = cache.namespace('cse_results')
+        self._pending = cache.namespace('cse_pending')
+        self.cache_hits = 0
+        self.deferred = 0
+
+    def _used_today(self) -> int:
+        return self._usage.get(_quota_day(), 0)
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.daily_quota - self._used_today())
+
+    def cached_total(self, domain: str) -> Optional[int]:
+        entry = self._results.get(domain)
+        if entry and time.time() - entry['fetched'] < self.ttl_seconds:
+            self.cache_hits += 1
+            return entry['total']
+        return None
+
+    def store_total(self, domain: str, total: int):
+        self._results[domain] = {'total': total, 'fetched': time.time()}
+        self._pending.pop(domain, None)
+        self.cache.mark_dirty()
+
+    def try_acquire(self, priority: Optional[int] = None) -> bool:
+        """Reserve one query from today's quota if this lookup may run now."""
+        remaining = self.remaining
+        if remaining <= 0:
+            return False
+        if remaining <= self.reserve and (priority or 0) < self.priority_min_rank:
+            return False
+        self.record_query()
+        return True
+
+    def record_query(self):
+        """Count one query sent against today's quota."""
+        day = _quota_day()
+        # Keep only today's counter
+        for old_day in [d for d in self._usage if d != day]:
+            del self._usage[old_day]
+        self._usage[day] = self._usage.get(day, 0) + 1
+        self.cache.mark_dirty()
+
+    def mark_exhausted(self):
+        """Google says the quota is gone: stop sending lookups until tomorrow."""
+        if self.remaining:
+            logger.warning("Google Custom Search daily quota exhausted, deferring remaining lookups")
+        self._usage[_quota_day()] = self.daily_quota
+        self.cache.mark_dirty()
+
+    def defer(self, domain: str, priority: Optional[int] = None):
+        self.deferred += 1
+        self._pending[domain] = priority or 0
+        self.cache.mark_dirty()
+
+    def pending_by_priority(self) -> List[Tuple[str, int]]:
+        """Deferred (domain, priority) pairs, highest priority first."""
+        return sorted(self._pending.items(), key=lambda item: item[1], reverse=True)
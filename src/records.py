@@ -0,0 +1,86 @@
+from dataclasses import dataclass, fields
+from typing import Any, Dict, Optional
+import pandas as pd
+
+
+def to_text(value: Any) -> Optional[str]:
+    """Normalise a CSV cell to text; pandas reads numeric-looking cells as float."""
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return None
+    if isinstance(value, float):
+        return str(int(value)) if value.is_integer() else str(value)
+    return str(value)
+
+
+def slotted(cls):
+    """
+    Rebuild a dataclass with __slots__ for its fields, as dataclass(slots=True)
+    does on Python 3.10+; the build still runs on 3.9.
+    """
+    names = tuple(f.name for f in fields(cls))
+    namespace = dict(cls.__dict__)
+    for name in names:
+        # Defaults live in the generated __init__; as class attributes they would clash with the slots
+        namespace.pop(name, None)
+    namespace.pop('__dict__', None)
+    namespace.pop('__weakref__', None)
+    namespace['__slots__'] = names
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+
+@slotted
+@dataclass
+class Lead:
+    """One input row from the leads CSV."""
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    email: Optional[str] = None
+    organization_name: Optional[str] = None
+    title: Optional[str] = None
+    website_url: Optional[str] = None
+    phone_number: Optional[str] = None
+    linkedin_url: Optional[str] = None
+
+    @classmethod
+    def from_values(cls, *values: Any) -> 'Lead':
+        """Build a lead from raw cell values in field order."""
+        return cls(*map(to_text, values))
+
+
+@slotted
+@dataclass
+class SiteResult:
+    """Enrichment result for one website, as reported by the Worker."""
+    website: str
+    linkedin_url: str = ''
+    cms: str = 'Error'
+    domain_rank: Optional[int] = None
+    total_pages: Optional[int] = 0
+    indexed_pages: Optional[int] = 0
+    backlinks: Optional[int] = 0
+    backlink_domains: Optional[int] = 0
+    indexed_pending: bool = False
+    partial: bool = False
+    cms_confidence: Optional[int] = None  # Last, so positional construction keeps its meaning
+    lookup_failed: bool = False
+
+    @classmethod
+    def from_client(cls, website: str, linkedin_url: Optional[str], data: Dict[str, Any]) -> 'SiteResult':
+        """Keep the fields we report from a DataForSEOClient result dict."""
+        return cls(
+            website=website,
+            linkedin_url=linkedin_url or '',
+            cms=data.get('cms', 'Error'),
+            domain_rank=data.get('domain_rank'),
+            total_pages=data.get('total_pages', 0),
+            indexed_pages=data.get('indexed_pages', 0),
+            backlinks=data.get('backlinks', 0),
+            backlink_domains=data.get('backlink_domains', 0),
+            indexed_pending=data.get('indexed_pending', False),
+            partial=data.get('partial', False),
+            cms_confidence=data.get('cms_confidence'),
+            lookup_failed=data.get('lookup_failed', False)
+        )
+
+
+LEAD_FIELDS = [f.name for f in fields(Lead)]
@@ -0,0 +1,144 @@
+import logging
+from array import array
+from typing import Any, Dict, List, Optional
+import numpy as np
+import pandas as pd
+from src.csv_handler import clean_domain, write_partitioned
+from src.records import Lead, SiteResult, to_text
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# (key, export header, kind). Text and flag columns hold str / bool or None;
+# count columns are stored as int64 arrays with a separate validity mask so
+# an unprocessed row stays empty rather than becoming 0.
+RESULT_COLUMNS = [
+    ('first_name', 'First Name', 'text'),
+    ('last_name', 'Last Name', 'text'),
+    ('email', 'Email', 'text'),
+    ('organization_name', 'Organization Name', 'text'),
+    ('title', 'Title', 'text'),
+    ('website_url', 'Website URL', 'text'),
+    ('phone_number', 'Phone Number', 'text'),
+    ('linkedin_url', 'LinkedIn URL', 'text'),
+    ('cms', 'CMS', 'text'),
+    ('domain_rank', 'Domain Rank', 'int'),
+    ('total_pages', 'Total Pages', 'int'),
+    ('indexed_pages', 'Indexed Pages', 'int'),
+    ('backlinks', 'Backlinks', 'int'),
+    ('backlink_domains', 'Backlink Domains', 'int'),
+    ('cms_confidence', 'CMS Confidence (%)', 'int'),
+    ('indexed_pending', 'Indexed Pages Pending', 'flag'),
+    ('partial', 'Partial', 'flag'),
+    ('lookup_failed', 'Lookup Failed', 'flag'),
+]
+
+INPUT_KEYS = [key for key, _, _ in RESULT_COLUMNS[:8]]
+RESULT_KEYS = [key for key, _, _ in RESULT_COLUMNS[8:]]
+_KINDS = {key: kind for key, _, kind in RESULT_COLUMNS}
+
+
+class _IntColumn:
+    """Nullable int64 column: values in an array('q'), validity in a bytearray."""
+
+    __slots__ = ('values', 'valid')
+
+    def __init__(self):
+        self.values = array('q')
+        self.valid = bytearray()
+
+    def append_null(self):
+        self.values.append(0)
+        self.valid.append(0)
+
+    def set(self, row: int, value: Any):
+        try:
+            self.values[row] = int(value)
+            self.valid[row] = 1
+        except (TypeError, ValueError):
+            self.values[row] = 0
+            self.valid[row] = 0
+
+    def get(self, row: int) -> Optional[int]:
+        return self.values[row] if self.valid[row] else None
+
+    def to_series(self, name: str) -> pd.Series:
+        # Copy out of the buffers: an array that is exporting a buffer cannot grow
+        values = np.frombuffer(self.values, dtype=np.int64).copy()
+        mask = np.frombuffer(self.valid, dtype=np.uint8) == 0
+        return pd.Series(pd.arrays.IntegerArray(values, mask), name=name)
+
+
+class ResultStore:
+    """
+    Column-oriented buffer holding the input leads and their enrichment
+    results for a run.
+
+    Rows are loaded once from the input CSV; results are written into the
+    result columns as each domain completes, so export reads straight from
+    here with numeric types intact instead of from the table widget.
+    """
+
+    def __init__(self):
+        self._columns: Dict[str, Any] = {
+            key: (_IntColumn() if kind == 'int' else []) for key, _, kind in RESULT_COLUMNS
+        }
+        self._rows_by_website: Dict[str, List[int]] = {}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def load_inputs(self, rows: List[Lead]):
+        """Append input rows; result columns start out empty."""
+        for row in rows:
+            index = self._size
+            for key in INPUT_KEYS:
+                self._columns[key].append(getattr(row, key))
+            for key in RESULT_KEYS:
+                column = self._columns[key]
+                if _KINDS[key] == 'int':
+                    column.append_null()
+                else:
+                    column.append(None)
+
+            website = clean_domain(self._columns['website_url'][index] or '')
+            self._rows_by_website.setdefault(website, []).append(index)
+            self._size += 1
+
+    def set_result(self, result: SiteResult) -> List[int]:
+        """Store a Worker result on every row for its website; returns the rows updated."""
+        rows = self._rows_by_website.get(result.website, [])
+        for row in rows:
+            for key in RESULT_KEYS:
+                value = getattr(result, key)
+                kind = _KINDS[key]
+                if kind == 'int':
+                    self._columns[key].set(row, value)
+                elif kind == 'flag':
+                    self._columns[key][row] = bool(value)
+                else:
+                    self._columns[key][row] = to_text(value)
+        return rows
+
+    def value(self, row: int, key: str) -> Any:
+        column = self._columns[key]
+        return column[row] if isinstance(column, list) else column.get(row)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Build a typed DataFrame using the export headers as column names."""
+        data = {}
+        for key, header, kind in RESULT_COLUMNS:
+            column = self._columns[key]
+            if kind == 'int':
+                data[header] = column.to_series(header)
+            elif kind == 'flag':
+                data[header] = pd.Series(column, dtype='boolean', name=header)
+            else:
+                data[header] = pd.Series(column, dtype='string', name=header)
+        return pd.DataFrame(data)
+
+    def export(self, output_path: str, file_format: str = 'csv') -> bool:
+        """Write one file per CMS in the chosen format (csv, parquet or arrow)."""
+        logger.info("Exporting %s rows as %s based on: %s", self._size, file_format, output_path)
+        return write_partitioned(self.to_frame(), output_path, file_format)
@@ -0,0 +1,246 @@
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass, asdict
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+from aiohttp import ClientError, ClientResponseError
+from src.constants import (
+    MAX_RETRIES, INITIAL_RETRY_DELAY, MAX_RETRY_DELAY, RETRY_MULTIPLIER, RETRY_AFTER_MAX,
+    RETRY_BUDGETS, BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_TIMEOUT, ERROR_MESSAGES
+)
+from src.utils import APIError, AuthenticationError, ServiceError
+from src.deadline import DeadlineExceeded, cut_by_deadline, time_left
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# HTTP statuses worth retrying; anything else is returned to the caller
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Responses that mean the far end is struggling, as opposed to refusing the request
+OVERLOAD_STATUSES = {429, 503}
+
+
+class CircuitOpenError(APIError):
+    """Raised instead of making a request while a host's breaker is open"""
+    pass
+
+
+class RetryableError(APIError):
+    """Raised by a request function for a failure that should be retried"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = MAX_RETRIES
+    initial_delay: float = INITIAL_RETRY_DELAY
+    max_delay: float = MAX_RETRY_DELAY
+    multiplier: float = RETRY_MULTIPLIER
+    # Retries this endpoint may spend over a whole run before failing fast
+    budget: Optional[int] = None
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given (1-based) retry."""
+        ceiling = min(self.max_delay, self.initial_delay * (self.multiplier ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
+
+@dataclass
+class EndpointStats:
+    calls: int = 0
+    retries: int = 0
+    failures: int = 0
+    rejected: int = 0  # Calls refused by an open breaker or spent budget
+    timeouts: int = 0
+    wasted_seconds: float = 0.0  # Time spent in failed attempts and backoff sleeps
+
+
+class CircuitBreaker:
+    """
+    Stops calls to a host after `failure_threshold` consecutive failures.
+
+    After `reset_timeout` seconds one trial call is let through (half-open);
+    success closes the breaker, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = BREAKER_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    @property
+    def cooling_down(self) -> bool:
+        """Open and not yet due for a trial call."""
+        return self.opened_at is not None and time.monotonic() - self.opened_at < self.reset_timeout
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if not self._trial_in_flight and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def release_trial(self):
+        """End a half-open trial that neither succeeded nor failed (cancelled, or refused for its own reasons)."""
+        self._trial_in_flight = False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_overload(error: Exception) -> bool:
+    """The far end is struggling: a timeout or a 429/503, as opposed to a bad request."""
+    if isinstance(error, DeadlineExceeded):
+        return False  # The domain ran out of time, not the API
+    if isinstance(error, asyncio.TimeoutError):
+        return True
+    return isinstance(error, ClientResponseError) and error.status in OVERLOAD_STATUSES
+
+
+class RetryEngine:
+    """
+    Single retry and circuit-breaker layer for outbound calls.
+
+    Each call names an endpoint (which selects the retry policy and budget)
+    and a host (which selects the circuit breaker). Transient failures -
+    network errors, timeouts, 429 and 5xx responses, or a RetryableError
+    raised by the request function - are retried with jittered backoff,
+    honouring Retry-After. Totals are kept per endpoint for the run.
+    Timeouts and 429/503 responses are also passed to `on_overload`, which
+    the client uses to back off its API concurrency.
+    """
+
+    def __init__(self, policies: Optional[Dict[str, RetryPolicy]] = None,
+                 on_overload: Optional[Callable[[], None]] = None):
+        self.policies = policies if policies is not None else {
+            name: RetryPolicy(budget=budget) for name, budget in RETRY_BUDGETS.items()
+        }
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.stats: Dict[str, EndpointStats] = {}
+        self.on_overload = on_overload
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        if host not in self.breakers:
+            self.breakers[host] = CircuitBreaker()
+        return self.breakers[host]
+
+    def _classify(self, error: Exception) -> Optional[float]:
+        """Return a Retry-After hint (0 if none) for retryable errors, None otherwise."""
+        if isinstance(error, RetryableError):
+            return error.retry_after or 0.0
+        if isinstance(error, ClientResponseError):
+            if error.status == 401:
+                raise AuthenticationError(ERROR_MESSAGES['auth_failed']) from error
+            if error.status in RETRY_STATUSES:
+                headers = error.headers or {}
+                return parse_retry_after(headers.get('Retry-After')) or 0.0
+            return None
+        if isinstance(error, (ClientError, asyncio.TimeoutError)):
+            return 0.0
+        return None
+
+    async def call(self, endpoint: str, host: str, request: Callable[[], Awaitable[T]]) -> T:
+        policy = self.policies.get(endpoint) or RetryPolicy()
+        stats = self.stats.setdefault(endpoint, EndpointStats())
+        breaker = self.breaker(host)
+        stats.calls += 1
+
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                stats.rejected += 1
+                raise CircuitOpenError(f"Circuit open for {host}, skipping {endpoint} request")
+            trial = breaker.is_open  # This call is the half-open trial
+
+            started = time.monotonic()
+            try:
+                result = await request()
+                breaker.record_success()
+                return result
+            except Exception as e:
+                if cut_by_deadline(e):
+                    # The domain ran out of time, not the API: no retry, timeout or breaker failure
+                    raise
+                if isinstance(e, asyncio.TimeoutError):
+                    stats.timeouts += 1
+                if self.on_overload and _is_overload(e):
+                    self.on_overload()
+                retry_after = self._classify(e)
+                stats.wasted_seconds += time.monotonic() - started
+                if retry_after is None:
+                    raise
+                breaker.record_failure()
+                trial = False
+
+                attempt += 1
+                if attempt >= policy.max_attempts:
+                    stats.failures += 1
+                    raise ServiceError(f"{endpoint} failed after {attempt} attempts: {str(e)}") from e
+                if policy.budget is not None and stats.retries >= policy.budget:
+                    stats.failures += 1
+                    stats.rejected += 1
+                    raise ServiceError(f"Retry budget for {endpoint} exhausted: {str(e)}") from e
+
+                delay = max(policy.backoff(attempt), min(retry_after, RETRY_AFTER_MAX))
+                if delay >= time_left(delay + 1):
+                    # The domain's deadline would pass before the retry could run
+                    stats.failures += 1
+                    raise ServiceError(f"{endpoint} failed and no time is left to retry: {str(e)}") from e
+                stats.retries += 1
+                stats.wasted_seconds += delay
+                logger.warning("%s request to %s failed (%s), retry %s/%s in %.1fs",
+                               endpoint, host, str(e) or type(e).__name__, attempt,
+                               policy.max_attempts - 1, delay)
+                await asyncio.sleep(delay)
+            finally:
+                if trial:
+                    # Cancelled, cut off by the deadline or refused for its own reasons:
+                    # no verdict on the host, so let the next call be the trial
+                    breaker.release_trial()
+
+    def summary(self) -> Dict[str, Any]:
+        """Per-endpoint totals plus run-wide retries and wasted time."""
+        endpoints = {name: asdict(stats) for name, stats in self.stats.items()}
+        return {
+            'endpoints': endpoints,
+            'total_retries': sum(s.retries for s in self.stats.values()),
+            'total_timeouts': sum(s.timeouts for s in self.stats.values()),
+            'total_wasted_seconds': round(sum(s.wasted_seconds for s in self.stats.values()), 2),
+            'open_breakers': [host for host, b in self.breakers.items() if b.is_open],
+        }
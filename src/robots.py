@@ -0,0 +1,63 @@
+import math
+from typing import List, NamedTuple, Optional, Tuple
+from urllib.parse import urljoin
+
+
+class RobotsTxt(NamedTuple):
+    """What we use from a robots.txt: the sitemaps it lists and the Crawl-delay that applies to us."""
+    sitemaps: Tuple[str, ...] = ()
+    crawl_delay: Optional[float] = None
+
+
+def _lines(text: str):
+    """(field, value) pairs: comments dropped, field names lowercased, any line ending."""
+    for line in text.lstrip('\ufeff').splitlines():
+        line = line.split('#', 1)[0]
+        field, separator, value = line.partition(':')
+        if separator:
+            yield field.strip().lower(), value.strip()
+
+
+def _delay(value: str) -> Optional[float]:
+    try:
+        delay = float(value)
+    except ValueError:
+        return None
+    return delay if math.isfinite(delay) and delay >= 0 else None
+
+
+def parse_robots_txt(text: Optional[str], base_url: str = '', user_agent: str = '*') -> RobotsTxt:
+    """
+    Parse a robots.txt body.
+
+    Sitemap lines apply to the whole file wherever they appear and are
+    resolved against `base_url`. Crawl-delay is taken from the group for
+    `user_agent` if there is one, otherwise from the `*` group. A group is
+    a run of User-agent lines followed by its rules.
+    """
+    if not text:
+        return RobotsTxt()
+    user_agent = user_agent.lower()
+    sitemaps: List[str] = []
+    delays = {}  # Agent -> Crawl-delay
+    agents: List[str] = []
+    in_rules = False
+    for field, value in _lines(text):
+        if field == 'sitemap':
+            if value:
+                sitemap = urljoin(base_url, value)
+                if sitemap not in sitemaps:
+                    sitemaps.append(sitemap)
+        elif field == 'user-agent':
+            if in_rules:
+                agents, in_rules = [], False
+            agents.append(value.lower())
+        elif agents:
+            in_rules = True
+            if field == 'crawl-delay':
+                delay = _delay(value)
+                if delay is not None:
+                    for agent in agents:
+                        delays.setdefault(agent, delay)
+    crawl_delay = delays.get(user_agent, delays.get('*'))
+    return RobotsTxt(tuple(sitemaps), crawl_delay)
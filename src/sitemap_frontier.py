@@ -0,0 +1,295 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlparse
+from bs4 import BeautifulSoup
+from src.constants import (
+    MAX_SITEMAP_DEPTH, MAX_URLS_PER_SITEMAP, EXACT_PAGE_COUNT, SITEMAP_SAMPLE_PAGES,
+    WP_CORE_SITEMAP_PAGE_SIZE, YOAST_SITEMAP_PAGE_SIZE,
+    SITEMAP_WORKERS, SITEMAP_MAX_DOCUMENTS, SITEMAP_MAX_BYTES
+)
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Paginated child sitemaps written by WordPress plugins, with their default page size.
+# WP core: wp-sitemap-posts-post-1.xml, wp-sitemap-posts-post-2.xml, ...
+# Yoast / Rank Math: post-sitemap.xml, post-sitemap2.xml, ...
+PAGED_SITEMAP_PATTERNS = [
+    (re.compile(r'^(?P<family>wp-sitemap-.+)-(?P<page>\d+)\.xml$', re.IGNORECASE), WP_CORE_SITEMAP_PAGE_SIZE),
+    (re.compile(r'^(?P<family>[\w-]+-sitemap)(?P<page>\d*)\.xml$', re.IGNORECASE), YOAST_SITEMAP_PAGE_SIZE),
+]
+
+
+class SitemapCount(NamedTuple):
+    """URL count for a sitemap tree, with the error bound when it was estimated."""
+    urls: int = 0
+    margin: Optional[int] = 0  # None: a guess with no known bound
+    estimated: bool = False
+    truncated: bool = False  # A crawl budget ran out; the count is a lower bound
+
+    @classmethod
+    def combine(cls, counts) -> 'SitemapCount':
+        counts = [c for c in counts if isinstance(c, SitemapCount)]
+        margins = [c.margin for c in counts]
+        return cls(
+            sum(c.urls for c in counts),
+            None if None in margins else sum(margins),
+            any(c.estimated for c in counts),
+            any(c.truncated for c in counts)
+        )
+
+
+def group_paged_sitemaps(sitemap_urls: List[str]) -> Tuple[List[Tuple[List[str], int]], List[str]]:
+    """
+    Split index children into paginated families and everything else.
+
+    Returns ([(pages, default_page_size), ...], others) where pages are the
+    family's URLs ordered by page number. Only families whose pages run
+    1..n without gaps are returned; anything irregular goes to others.
+    """
+    families: Dict[Tuple[str, str], Dict[int, str]] = {}
+    page_sizes: Dict[Tuple[str, str], int] = {}
+    others = []
+    for sitemap_url in sitemap_urls:
+        directory, _, name = urlparse(sitemap_url).path.rpartition('/')
+        for pattern, page_size in PAGED_SITEMAP_PATTERNS:
+            match = pattern.match(name)
+            if match:
+                key = (directory, match.group('family').lower())
+                page = int(match.group('page') or 1)
+                families.setdefault(key, {})[page] = sitemap_url
+                page_sizes[key] = page_size
+                break
+        else:
+            others.append(sitemap_url)
+
+    groups = []
+    for key, pages in families.items():
+        if sorted(pages) == list(range(1, len(pages) + 1)):
+            groups.append(([pages[n] for n in sorted(pages)], page_sizes[key]))
+        else:
+            others.extend(pages.values())
+    return groups, others
+
+
+class _Family(NamedTuple):
+    pages: List[str]
+    page_size: int
+
+
+class SitemapFrontier:
+    """
+    Crawl of one domain's sitemap tree.
+
+    Sitemaps are queued by depth, so every index is expanded before the
+    sitemaps below it, and `workers` fetches run at a time. A visited set
+    of canonical URLs means a sitemap listed in robots.txt, in an index and
+    at a default location is fetched once, and a page URL listed in several
+    sitemaps fetched this run is counted once. The crawl stops queueing
+    fetches after `max_documents` sitemaps or `max_bytes` of
+    decoded XML; the count is then flagged truncated. Sitemaps deeper than
+    `max_depth` are skipped.
+
+    Each sitemap is revalidated with the client's conditional GET, so
+    unchanged ones reuse the count or child list stored last run; only the
+    count is kept, so their URLs are not checked against other sitemaps.
+    Unless `exact` is set, paginated WordPress families in an index are
+    estimated from a few sampled pages, and the result carries the error
+    bound of that estimate.
+    """
+
+    def __init__(self, client, exact: bool = EXACT_PAGE_COUNT, workers: int = SITEMAP_WORKERS,
+                 max_depth: int = MAX_SITEMAP_DEPTH, max_documents: int = SITEMAP_MAX_DOCUMENTS,
+                 max_bytes: int = SITEMAP_MAX_BYTES):
+        self.client = client
+        self.exact = exact
+        self.workers = workers
+        self.max_depth = max_depth
+        self.max_documents = max_documents
+        self.max_bytes = max_bytes
+        self.fetched = 0  # Sitemaps requested
+        self.found = 0  # Sitemaps that answered 200 or 304
+        self.bytes = 0
+        self.duplicates = 0
+        self.truncated = False
+        self._visited = set()
+        self._queue: List[Tuple[int, int, Any, bool]] = []  # (depth, order, item, probe)
+        self._order = itertools.count()
+        self._urls = set()  # Page URLs of the sitemaps fetched this run
+        self._revalidated = 0  # Stored counts of unchanged sitemaps
+        self._counts: List[SitemapCount] = []  # Unsampled pages of paginated families
+        self._active = 0
+        self._changed = asyncio.Condition()
+
+    def add(self, url: str, depth: int = 0, probe: bool = False) -> bool:
+        """
+        Queue a sitemap unless it was queued before. A `probe` is a guessed
+        location: a missing one is expected and not logged as a problem.
+        """
+        if depth > self.max_depth:
+            logger.warning("Maximum sitemap depth reached for %s", url)
+            return False
+        url = self.client._canonical_url(url)
+        if url in self._visited:
+            self.duplicates += 1
+            return False
+        self._visited.add(url)
+        heapq.heappush(self._queue, (depth, next(self._order), url, probe))
+        return True
+
+    def _add_index_children(self, sitemap_urls: List[str], depth: int):
+        if self.exact:
+            families, others = [], sitemap_urls
+        else:
+            families, others = group_paged_sitemaps(sitemap_urls)
+        for url in others:
+            self.add(url, depth)
+        for pages, page_size in families:
+            if len(pages) <= SITEMAP_SAMPLE_PAGES + 1:
+                for url in pages:
+                    self.add(url, depth)
+            elif depth > self.max_depth:
+                logger.warning("Maximum sitemap depth reached for %s", pages[0])
+            else:
+                canonical = [self.client._canonical_url(url) for url in pages]
+                if any(url in self._visited for url in canonical):
+                    # Partly counted already; count the rest one by one
+                    for url in pages:
+                        self.add(url, depth)
+                    continue
+                self._visited.update(canonical)
+                heapq.heappush(self._queue, (depth, next(self._order), _Family(canonical, page_size), False))
+
+    def _within_budget(self) -> bool:
+        if self.fetched < self.max_documents and self.bytes < self.max_bytes:
+            return True
+        if not self.truncated:
+            logger.warning("Sitemap budget reached after %s sitemaps (%s bytes); %s left unread",
+                           self.fetched, self.bytes, len(self._queue))
+            self.truncated = True
+        return False
+
+    async def run(self) -> SitemapCount:
+        """Crawl everything queued, and whatever it leads to; returns the combined count."""
+        await asyncio.gather(*[self._work() for _ in range(self.workers)])
+        total = SitemapCount.combine([SitemapCount(len(self._urls) + self._revalidated)] + self._counts)
+        return total._replace(truncated=self.truncated)
+
+    async def _work(self):
+        while True:
+            async with self._changed:
+                while not self._queue and self._active:
+                    await self._changed.wait()
+                if not self._queue or not self._within_budget():
+                    self._queue = []
+                    self._changed.notify_all()
+                    return
+                depth, _, item, probe = heapq.heappop(self._queue)
+                self._active += 1
+            try:
+                if isinstance(item, _Family):
+                    self._counts.append(await self._estimate_family(item, depth))
+                else:
+                    await self._count(item, depth, probe)
+            finally:
+                async with self._changed:
+                    self._active -= 1
+                    self._changed.notify_all()
+
+    async def _count(self, url: str, depth: int, probe: bool = False) -> Optional[int]:
+        """
+        Fetch one sitemap and add its page URLs to the count. Returns how
+        many it lists, or None when it is an index (its children are queued
+        one level down) or could not be read.
+        """
+        logger.info("Parsing sitemap at %s (depth: %s)", url, depth)
+        self.fetched += 1
+        try:
+            status, content, entry = await self.client._conditional_get(url)
+        except Exception as e:
+            logger.warning("Error fetching sitemap %s: %s", url, e)
+            return None
+
+        try:
+            if status == 304:
+                self.found += 1
+                if 'children' not in entry:
+                    count = entry.get('count', 0)
+                    self._revalidated += count
+                    return count
+                sitemap_urls = entry['children']
+            elif status == 200:
+                self.found += 1
+                self.bytes += len(content)
+                soup = BeautifulSoup(content, 'lxml-xml')
+                sitemapindex = soup.find('sitemapindex')
+
+                if not sitemapindex:
+                    urls = {loc.text for loc in soup.find_all('loc')[:MAX_URLS_PER_SITEMAP]}
+                    logger.info("Found %s URLs in sitemap at %s", len(urls), url)
+                    self._urls.update(urls)
+                    self.client._store_validators(url, entry, count=len(urls))
+                    return len(urls)
+
+                logger.info("Found sitemap index at %s", url)
+                sitemap_urls = [loc.text for loc in sitemapindex.find_all('loc')[:MAX_URLS_PER_SITEMAP]]
+                self.client._store_validators(url, entry, children=sitemap_urls)
+            else:
+                if probe:
+                    logger.info("No sitemap at %s (status %s)", url, status)
+                else:
+                    logger.warning("Sitemap %s returned status %s", url, status)
+                return None
+
+            self._add_index_children(sitemap_urls, depth + 1)
+            return None
+        except Exception as e:
+            logger.warning("Error processing sitemap %s: %s", url, e)
+            return None
+
+    async def _estimate_family(self, family: _Family, depth: int) -> SitemapCount:
+        """
+        Estimate a paginated family from a few sampled pages, fetched one
+        after another by this worker.
+
+        Every page but the last is filled to the plugin's page size, so the
+        total is (mean of sampled full pages) * (n - 1) + (last page). The
+        error bound assumes each unsampled page can differ from the estimate
+        by the spread seen between the sampled full pages. A last page that
+        could not be read is taken as half full, give or take half a page.
+        When no full page could be read at all, the plugin's default page
+        size stands in and the estimate has no margin. The sampled pages
+        are counted like any other sitemap, so only the estimate for the
+        unsampled ones is returned.
+        """
+        pages, page_size = family
+        n = len(pages)
+        # First page, evenly spaced middle pages, and the last page
+        step = (n - 1) / SITEMAP_SAMPLE_PAGES
+        sample_indexes = sorted({int(i * step) for i in range(SITEMAP_SAMPLE_PAGES)})
+        samples = []
+        for i in sample_indexes + [n - 1]:
+            samples.append(await self._count(pages[i], depth) if self._within_budget() else None)
+        counted = sum(c or 0 for c in samples)
+        last_count = samples.pop()
+        full_counts = [c for c in samples if c]
+        if not full_counts:
+            estimate = page_size * (n - 1) + (last_count or round(page_size / 2))
+            logger.warning("Guessed %s URLs across %s pages of %s; no page could be sampled", estimate, n, pages[0])
+            return SitemapCount(estimate - counted, None, estimated=True)
+
+        mean_full = sum(full_counts) / len(full_counts)
+        unsampled = (n - 1) - len(full_counts)
+        margin = unsampled * (max(full_counts) - min(full_counts))
+        if last_count is None:
+            # Anywhere from one URL to a full page
+            last_count = round(mean_full / 2)
+            margin += math.ceil(mean_full / 2)
+        estimate = round(mean_full * (n - 1)) + last_count
+        logger.info("Estimated %s (±%s) URLs across %s pages of %s", estimate, margin, n, pages[0])
+        return SitemapCount(estimate - counted, margin, estimated=True)
@@ -0,0 +1,248 @@
+import asyncio
+import itertools
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set
+from urllib.parse import urlparse
+from src.constants import (
+    DEFAULT_TIMEOUT, QUEUE_POST_BATCH_SIZE, QUEUE_FLUSH_INTERVAL,
+    QUEUE_POLL_MIN_INTERVAL, QUEUE_POLL_MAX_INTERVAL, QUEUE_POLL_BACKOFF, QUEUE_TASK_TIMEOUT
+)
+from src.deadline import current_deadline, stage_timeout
+from src.retry import RetryableError
+from src.utils import ServiceError
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# DataForSEO status code for a task accepted into the standard queue
+TASK_CREATED = 20100
+
+
+@dataclass
+class _QueuedTask:
+    path: str
+    payload: Dict[str, Any]
+    endpoint_name: str
+    future: asyncio.Future
+    posted_at: float = 0.0
+
+
+@dataclass
+class QueueStats:
+    posted: int = 0
+    post_requests: int = 0
+    completed: int = 0
+    failed: int = 0
+    polls: int = 0
+
+
+class StandardTaskQueue:
+    """
+    DataForSEO standard (queued) method for an API path.
+
+    `submit` parks the task until `post_batch_size` tasks for the same path
+    are waiting, or `flush_interval` seconds pass, then posts them in one
+    task_post request. A single poller asks tasks_ready for finished tasks,
+    fetching each with task_get and resolving the caller's future. The poll
+    interval starts at `poll_min`, grows by `poll_backoff` while nothing is
+    ready up to `poll_max`, and drops back once results arrive.
+
+    Requests go through the client's session and retry engine; the domain
+    deadline of whichever caller triggered a flush does not apply to it.
+    """
+
+    def __init__(self, client, post_batch_size: int = QUEUE_POST_BATCH_SIZE,
+                 flush_interval: float = QUEUE_FLUSH_INTERVAL,
+                 poll_min: float = QUEUE_POLL_MIN_INTERVAL, poll_max: float = QUEUE_POLL_MAX_INTERVAL,
+                 poll_backoff: float = QUEUE_POLL_BACKOFF, task_timeout: float = QUEUE_TASK_TIMEOUT):
+        self.client = client
+        self.post_batch_size = post_batch_size
+        self.flush_interval = flush_interval
+        self.poll_min = poll_min
+        self.poll_max = poll_max
+        self.poll_backoff = poll_backoff
+        self.task_timeout = task_timeout
+        self.poll_interval = poll_min
+        self.stats = QueueStats()
+        self._waiting: Dict[str, List[_QueuedTask]] = {}  # Path -> tasks not yet posted
+        self._posted: Dict[str, _QueuedTask] = {}  # Task id -> task awaiting its result
+        self._tags = itertools.count()
+        self._flusher: Optional[asyncio.Task] = None
+        self._poller: Optional[asyncio.Task] = None
+        self._background: Set[asyncio.Task] = set()
+
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    async def submit(self, path: str, payload: Dict[str, Any], endpoint_name: str) -> List[Dict[str, Any]]:
+        """Queue one task for `path` (e.g. 'backlinks/summary') and wait for its result list."""
+        future = asyncio.get_running_loop().create_future()
+        waiting = self._waiting.setdefault(path, [])
+        waiting.append(_QueuedTask(path, payload, endpoint_name, future))
+
+        if len(waiting) >= self.post_batch_size:
+            self._spawn(self._flush(path))
+        elif self._flusher is None:
+            self._flusher = self._spawn(self._flush_later())
+        return await future
+
+    async def close(self):
+        """Stop polling and fail any tasks still waiting for a result."""
+        for task in list(self._background):
+            task.cancel()
+        await asyncio.gather(*self._background, return_exceptions=True)
+        pending = [t for tasks in self._waiting.values() for t in tasks] + list(self._posted.values())
+        for task in pending:
+            if not task.future.done():
+                task.future.set_exception(ServiceError("Task queue closed before the task finished"))
+        if pending:
+            logger.warning("%s queued DataForSEO tasks were abandoned", len(pending))
+        self._waiting.clear()
+        self._posted.clear()
+
+    async def _flush_later(self):
+        try:
+            await asyncio.sleep(self.flush_interval)
+        finally:
+            self._flusher = None
+        for path in list(self._waiting):
+            await self._flush(path)
+
+    async def _request(self, method: str, url: str, json: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        """Send one queue request and return its task records."""
+        async with self.client.session.request(
+            method, url, json=json, timeout=stage_timeout(DEFAULT_TIMEOUT)
+        ) as response:
+            response.raise_for_status()
+            result = await response.json()
+
+        if not isinstance(result, dict):
+            raise ValueError(f"Invalid response format from API: {result}")
+        status_code = result.get('status_code') or 0
+        if status_code >= 50000:
+            raise RetryableError(f"API request failed: {result.get('status_message', 'Unknown error')}")
+        return result.get('tasks') or []
+
+    async def _call(self, endpoint_name: str, method: str, url: str,
+                    json: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        # Queue traffic is shared by many domains, so no single domain's deadline applies
+        current_deadline.set(None)
+        return await self.client.retry_engine.call(
+            endpoint_name, urlparse(url).netloc, lambda: self._request(method, url, json)
+        )
+
+    async def _flush(self, path: str):
+        batch = self._waiting.pop(path, [])
+        for start in range(0, len(batch), self.post_batch_size):
+            await self._post(path, batch[start:start + self.post_batch_size])
+
+    async def _post(self, path: str, tasks: List[_QueuedTask]):
+        by_tag = {}
+        payloads = []
+        for task in tasks:
+            tag = f"q{next(self._tags)}"
+            by_tag[tag] = task
+            payloads.append({**task.payload, 'tag': tag})
+
+        url = f"{self.client.BASE_URL}/{path}/task_post"
+        logger.info("Posting %s tasks to %s", len(payloads), url)
+        try:
+            records = await self._call(tasks[0].endpoint_name, 'POST', url, payloads)
+        except Exception as e:
+            logger.error("task_post to %s failed: %s", url, e)
+            self._fail(tasks, e)
+            return
+        self.stats.post_requests += 1
+
+        now = time.monotonic()
+        for record in records:
+            task = by_tag.pop((record.get('data') or {}).get('tag'), None)
+            if task is None:
+                continue
+            if record.get('status_code') == TASK_CREATED and record.get('id'):
+                task.posted_at = now
+                self._posted[record['id']] = task
+                self.stats.posted += 1
+            else:
+                self._fail([task], ServiceError(f"Task rejected: {record.get('status_message', 'Unknown error')}"))
+        # Tasks the response did not mention were never created
+        self._fail(list(by_tag.values()), ServiceError("Task missing from task_post response"))
+
+        if self._posted and self._poller is None:
+            self._poller = self._spawn(self._poll())
+
+    def _fail(self, tasks: List[_QueuedTask], error: Exception):
+        for task in tasks:
+            if not task.future.done():
+                task.future.set_exception(error)
+                self.stats.failed += 1
+
+    async def _poll(self):
+        try:
+            while self._posted:
+                await asyncio.sleep(self.poll_interval)
+                ready = []
+                paths = {task.path: task.endpoint_name for task in self._posted.values()}
+                for path, endpoint_name in paths.items():
+                    ready.extend(await self._ready_ids(path, endpoint_name))
+
+                if ready:
+                    self.poll_interval = self.poll_min
+                    await asyncio.gather(*(self._collect(task_id) for task_id in ready))
+                else:
+                    self.poll_interval = min(self.poll_interval * self.poll_backoff, self.poll_max)
+                self._expire()
+        finally:
+            self._poller = None
+
+    async def _ready_ids(self, path: str, endpoint_name: str) -> List[str]:
+        url = f"{self.client.BASE_URL}/{path}/tasks_ready"
+        self.stats.polls += 1
+        try:
+            records = await self._call(endpoint_name, 'GET', url)
+        except Exception as e:
+            logger.error("tasks_ready for %s failed: %s", path, e)
+            return []
+        ready = []
+        for record in records:
+            for entry in record.get('result') or []:
+                if entry.get('id') in self._posted:
+                    ready.append(entry['id'])
+        return ready
+
+    async def _collect(self, task_id: str):
+        task = self._posted.get(task_id)
+        if task is None:
+            return
+        url = f"{self.client.BASE_URL}/{task.path}/task_get/{task_id}"
+        try:
+            records = await self._call(task.endpoint_name, 'GET', url)
+        except Exception as e:
+            # Leave it posted: it is still ready and the next poll tries again
+            logger.error("task_get for %s failed: %s", task_id, e)
+            return
+
+        self._posted.pop(task_id, None)
+        record = records[0] if records else {}
+        if task.future.done():
+            return  # The caller gave up waiting
+        if record.get('status_code') == 20000:
+            task.future.set_result(record.get('result') or [])
+            self.stats.completed += 1
+        else:
+            self._fail([task], ServiceError(f"Task failed: {record.get('status_message', 'Unknown error')}"))
+
+    def _expire(self):
+        now = time.monotonic()
+        expired = [task_id for task_id, task in self._posted.items()
+                   if now - task.posted_at > self.task_timeout]
+        for task_id in expired:
+            task = self._posted.pop(task_id)
+            self._fail([task], ServiceError(f"Task {task_id} not ready after {self.task_timeout}s"))
+        if expired:
+            logger.warning("Gave up on %s DataForSEO tasks that never became ready", len(expired))
@@ -1,28 +1,126 @@
 import asyncio
+import atexit
 import logging
+import logging.handlers
+import queue
 import time
 import os
-from functools import wraps
-from typing import Callable, TypeVar, Any
-from aiohttp import ClientError, ClientResponseError
-from src.constants import (
-    MAX_RETRIES,
-    INITIAL_RETRY_DELAY,
-    MAX_RETRY_DELAY,
-    RETRY_MULTIPLIER,
-    ERROR_MESSAGES,
-    REQUESTS_PER_SECOND
-)
-
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+from src.constants import LOG_MAX_BYTES, LOG_BACKUP_COUNT, LOG_REPEAT_BURST, LOG_REPEAT_WINDOW
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - [%(domain)s] %(message)s'
+
+# Domain the current task is working on; stamped on every log record it writes.
+# A ContextVar because the pipeline works on many domains concurrently.
+log_domain: ContextVar[Optional[str]] = ContextVar('log_domain', default=None)
+
+
+class DomainFilter(logging.Filter):
+    """Adds the current domain to each record as `record.domain`."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, 'domain'):
+            record.domain = log_domain.get() or '-'
+        return True
+
+
+class RepeatFilter(logging.Filter):
+    """
+    Rate-limits records below ERROR that share a message template.
+
+    Up to `burst` records per template pass in each `window` seconds; the
+    rest are dropped and counted, and the first record of the next window
+    reports how many were suppressed. Templates are the unformatted
+    messages, so this only groups calls that use lazy % formatting.
+    """
+
+    def __init__(self, burst: int = LOG_REPEAT_BURST, window: float = LOG_REPEAT_WINDOW):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self._seen: Dict[Tuple[str, int, str], list] = {}  # Key -> [window start, count, suppressed]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.ERROR or not record.args:
+            return True
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        state = self._seen.get(key)
+        if state is None or now - state[0] >= self.window:
+            suppressed = state[2] if state else 0
+            self._seen[key] = [now, 1, 0]
+            if suppressed:
+                record.msg = f"{record.getMessage()} ({suppressed} similar messages suppressed)"
+                record.args = None
+            return True
+        state[1] += 1
+        if state[1] <= self.burst:
+            return True
+        state[2] += 1
+        return False
+
 
 # Global variable to store current log file path
 _current_log_file = None
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def _stop_listener():
+    global _listener
+    if _listener is not None:
+        _listener.stop()  # Drains queued records before returning
+        _listener = None
+
+
+atexit.register(_stop_listener)
+
+
+def setup_logging(log_path: Optional[str] = None, level: Optional[int] = None) -> Optional[str]:
+    """
+    Route all logging through a queue to a console handler and, when
+    `log_path` is given, a rotating log file.
+
+    File and console I/O happen on the listener's thread, so logging never
+    blocks the event loop on disk. Re-running replaces the previous setup.
+    """
+    global _listener
+
+    root_logger = logging.getLogger()
+    if level is not None:
+        root_logger.setLevel(level)
+
+    # Remove existing handlers
+    _stop_listener()
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
+        handler.close()
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = []
+    if log_path:
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, delay=True
+        )
+        if os.path.exists(log_path) and os.path.getsize(log_path) > 0:
+            # Start each run in a fresh file; the last one is kept as a backup
+            file_handler.doRollover()
+        handlers.append(file_handler)
+    # Also add a stream handler for console output
+    handlers.append(logging.StreamHandler())
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    # Filters run in the thread that logs, where the domain ContextVar is set
+    queue_handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+    queue_handler.addFilter(DomainFilter())
+    queue_handler.addFilter(RepeatFilter())
+    root_logger.addHandler(queue_handler)
+
+    _listener = logging.handlers.QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return log_path
+
 
 def set_log_file(csv_path: str) -> str:
     """
@@ -39,31 +137,12 @@ def set_log_file(csv_path: str) -> str:
     
     # Store the current log file path
     _current_log_file = log_path
-    
-    # Remove existing handlers
-    root_logger = logging.getLogger()
-    for handler in root_logger.handlers[:]:
-        root_logger.removeHandler(handler)
-    
-    # Set up new file handler
-    file_handler = logging.FileHandler(log_path, mode='w')
-    file_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
-    root_logger.addHandler(file_handler)
-    
-    # Also add a stream handler for console output
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
-    root_logger.addHandler(console_handler)
-    
-    return log_path
+    return setup_logging(log_path)
 
 def get_current_log_file() -> str:
     """Returns the current log file path"""
     return _current_log_file
 
-# Type variable for generic return type
-T = TypeVar('T')
-
 class APIError(Exception):
     """Base exception for API related errors"""
     pass
@@ -96,82 +175,6 @@ class RateLimiter:
                 await asyncio.sleep(delay)
             self.last_request_time = time.time()
 
-# Global rate limiter instance
-rate_limiter = RateLimiter(REQUESTS_PER_SECOND)
-
-def with_retry(
-    max_retries: int = MAX_RETRIES,
-    initial_delay: float = INITIAL_RETRY_DELAY,
-    max_delay: float = MAX_RETRY_DELAY,
-    multiplier: float = RETRY_MULTIPLIER
-) -> Callable[[Callable[..., T]], Callable[..., T]]:
-    """
-    Decorator that implements exponential backoff retry logic for async functions.
-    
-    Args:
-        max_retries: Maximum number of retries
-        initial_delay: Initial delay between retries in seconds
-        max_delay: Maximum delay between retries in seconds
-        multiplier: Multiplier for exponential backoff
-    
-    Returns:
-        Decorated function with retry logic
-    """
-    def decorator(func: Callable[..., T]) -> Callable[..., T]:
-        @wraps(func)
-        async def wrapper(*args: Any, **kwargs: Any) -> T:
-            last_exception = None
-            delay = initial_delay
-
-            for attempt in range(max_retries + 1):
-                try:
-                    # Acquire rate limit before making request
-                    await rate_limiter.acquire()
-                    
-                    return await func(*args, **kwargs)
-
-                except ClientResponseError as e:
-                    last_exception = e
-                    if e.status == 401:
-                        raise AuthenticationError(ERROR_MESSAGES['auth_failed'])
-                    elif e.status == 429:
-                        raise RateLimitError(ERROR_MESSAGES['rate_limit'])
-                    elif e.status >= 500:
-                        if attempt == max_retries:
-                            raise ServiceError(ERROR_MESSAGES['service_error'])
-                    else:
-                        # Don't retry for other status codes
-                        raise
-
-                except ClientError as e:
-                    last_exception = e
-                    logger.warning(f"Network error on attempt {attempt + 1}: {str(e)}")
-                    if attempt == max_retries:
-                        raise APIError(ERROR_MESSAGES['network_error']) from e
-
-                except asyncio.TimeoutError as e:
-                    last_exception = e
-                    logger.warning(f"Timeout error on attempt {attempt + 1}")
-                    if attempt == max_retries:
-                        raise APIError(ERROR_MESSAGES['timeout']) from e
-
-                except Exception as e:
-                    # Log unexpected errors but don't retry
-                    logger.error(f"Unexpected error: {str(e)}")
-                    raise
-
-                if attempt < max_retries:
-                    sleep_time = min(delay, max_delay)
-                    logger.info(f"Retrying in {sleep_time:.2f} seconds... (Attempt {attempt + 1}/{max_retries})")
-                    await asyncio.sleep(sleep_time)
-                    delay *= multiplier
-
-            # If we get here, we've exhausted all retries
-            raise last_exception
-
-        return wrapper
-    return decorator
-
 def validate_response(response_data: dict) -> bool:
     """
     Validates the response data from the API.
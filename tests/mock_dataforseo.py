@@ -0,0 +1,87 @@
+"""
+Local stand-in for the DataForSEO API, for tests and benchmarks.
+
+Serves the /live endpoints and the standard task_post / tasks_ready /
+task_get queue for domain_technologies and backlinks/summary, with
+deterministic results per target. Queued tasks become ready after
+`ready_after` tasks_ready polls.
+"""
+import itertools
+from collections import Counter
+from aiohttp import web
+
+PATHS = ('domain_analytics/technologies/domain_technologies', 'backlinks/summary')
+
+
+def fake_result(path, target):
+    """Deterministic result list for a target, shaped like the real endpoint's."""
+    seed = sum(map(ord, target))
+    if path.startswith('backlinks'):
+        return [{'target': target, 'external_links_count': seed * 10, 'referring_domains': seed}]
+    return [{'domain': target, 'domain_rank': seed % 1000}]
+
+
+def _envelope(tasks):
+    return web.json_response({'status_code': 20000, 'status_message': 'Ok.', 'tasks': tasks})
+
+
+class MockDataForSEO:
+
+    def __init__(self, ready_after=1):
+        self.ready_after = ready_after
+        self.requests = Counter()  # (path, method name) -> count
+        self.tasks = {}  # id -> task state
+        self._ids = itertools.count(1)
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        for path in PATHS:
+            app.router.add_post(f'/v3/{path}/live', self._live(path))
+            app.router.add_post(f'/v3/{path}/task_post', self._task_post(path))
+            app.router.add_get(f'/v3/{path}/tasks_ready', self._tasks_ready(path))
+            app.router.add_get(f'/v3/{path}/task_get/{{task_id}}', self._task_get(path))
+        return app
+
+    def _live(self, path):
+        async def handler(request):
+            self.requests[(path, 'live')] += 1
+            payload = (await request.json())[0]
+            return _envelope([{'status_code': 20000, 'data': payload,
+                               'result': fake_result(path, payload['target'])}])
+        return handler
+
+    def _task_post(self, path):
+        async def handler(request):
+            self.requests[(path, 'task_post')] += 1
+            tasks = []
+            for payload in await request.json():
+                task_id = f"task-{next(self._ids)}"
+                self.tasks[task_id] = {'path': path, 'payload': payload, 'polls': 0}
+                tasks.append({'id': task_id, 'status_code': 20100, 'status_message': 'Task Created.',
+                              'data': payload, 'result': None})
+            return _envelope(tasks)
+        return handler
+
+    def _tasks_ready(self, path):
+        async def handler(request):
+            self.requests[(path, 'tasks_ready')] += 1
+            ready = []
+            for task_id, task in self.tasks.items():
+                if task['path'] != path:
+                    continue
+                task['polls'] += 1
+                if task['polls'] > self.ready_after:
+                    ready.append({'id': task_id, 'tag': task['payload'].get('tag')})
+            return _envelope([{'status_code': 20000, 'result': ready}])
+        return handler
+
+    def _task_get(self, path):
+        async def handler(request):
+            self.requests[(path, 'task_get')] += 1
+            task = self.tasks.pop(request.match_info['task_id'], None)
+            if task is None:
+                return _envelope([{'status_code': 40400, 'status_message': 'Not Found.'}])
+            return _envelope([{'id': request.match_info['task_id'], 'status_code': 20000,
+                               'data': task['payload'],
+                               'result': fake_result(path, task['payload']['target'])}])
+        return handler
@@ -0,0 +1,117 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import tempfile
+import unittest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from src.cache import JsonCache
+from src.cms_fingerprint import CMSFingerprinter, OTHER_CMS, fingerprinter
+from src.data_processor import DataForSEOClient
+
+
+class TestCMSFingerprinter(unittest.TestCase):
+
+    def test_shopify_from_headers_alone(self):
+        fp = fingerprinter.identify({'X-ShopId': '12345', 'Server': 'cloudflare'}, ['_shopify_y'])
+        self.assertEqual(fp.cms, 'Shopify')
+        self.assertGreater(fp.confidence, 0.95)
+        self.assertEqual(len(fp.evidence), 2)
+
+    def test_wix_from_html(self):
+        html = '<html><img src="https://static.wixstatic.com/media/logo.png"></html>'
+        fp = fingerprinter.identify({}, html=html)
+        self.assertEqual(fp.cms, 'Wix')
+
+    def test_wordpress_from_generator_and_link_header(self):
+        html = '<head><meta name="generator" content="WordPress 6.4.2"></head>'
+        self.assertEqual(fingerprinter.identify({}, html=html).cms, 'WordPress')
+
+        headers = {'link': '<https://example.com/wp-json/>; rel="https://api.w.org/"'}
+        self.assertEqual(fingerprinter.identify(headers).cms, 'WordPress')
+
+    def test_strongest_cms_wins(self):
+        # A WordPress page linking to a Drupal module path
+        html = ('<link href="/wp-content/themes/astra/style.css">'
+                '<a href="https://other.org/modules/contrib/">x</a>')
+        fp = fingerprinter.identify({}, html=html)
+        self.assertEqual(fp.cms, 'WordPress')
+
+        html = '<script src="/core/misc/drupal.js"></script><div data-drupal-selector="x"></div>'
+        self.assertEqual(fingerprinter.identify({}, html=html).cms, 'Drupal')
+
+    def test_weak_or_missing_evidence_is_other(self):
+        fp = fingerprinter.identify({'Server': 'nginx'}, html='<html><body>Hello</body></html>')
+        self.assertEqual(fp, (OTHER_CMS, 0.0, []))
+
+        fp = fingerprinter.identify({}, html='<a href="/modules/">Modules</a>')
+        self.assertEqual(fp.cms, OTHER_CMS)
+        self.assertAlmostEqual(fp.confidence, 0.2)
+
+    def test_header_verdict_ignores_the_body(self):
+        fp = fingerprinter.identify_headers({'X-Powered-By': 'WP Engine'}, ['wp-settings-1'])
+        self.assertEqual(fp.cms, 'WordPress')
+        self.assertEqual(fingerprinter.identify_headers({'Server': 'nginx'}).cms, OTHER_CMS)
+
+    def test_unknown_source_is_rejected(self):
+        with self.assertRaises(ValueError):
+            CMSFingerprinter([('Foo', 'body', 'foo', 0.5)])
+
+
+class TestHeaderOnlyDetection(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.requested = []
+
+        async def home(request):
+            self.requested.append(request.path_qs)
+            if request.path == '/moved':
+                raise web.HTTPFound('/')
+            if request.query.get('site') == 'wp':
+                return web.Response(text='<html>' + 'x' * 100000 + '</html>',
+                                    headers={'Link': '<https://a.com/wp-json/>; rel="https://api.w.org/"'})
+            return web.Response(text='<link href="/wp-content/themes/astra/style.css">')
+
+        app = web.Application()
+        app.router.add_get('/{tail:.*}', home)
+        self.server = TestServer(app)
+        await self.server.start_server()
+
+    async def asyncTearDown(self):
+        await self.server.close()
+        self.tmp_dir.cleanup()
+
+    async def test_conclusive_headers_skip_the_body(self):
+        async with DataForSEOClient(cache=JsonCache(os.path.join(self.tmp_dir.name, 'cache.json'))) as client:
+            by_headers = await client.fingerprint_site(str(self.server.make_url('/?site=wp')))
+            by_body = await client.fingerprint_site(str(self.server.make_url('/')))
+
+        self.assertEqual((by_headers.cms, by_body.cms), ('WordPress', 'WordPress'))
+        self.assertEqual(client.metrics.header_only, 1)
+        self.assertEqual(client.metrics.report()['cms_from_headers_only'], 1)
+
+    async def test_pages_are_fetched_once_per_run(self):
+        async with DataForSEOClient(cache=JsonCache(os.path.join(self.tmp_dir.name, 'cache.json'))) as client:
+            first = await client.fingerprint_site(str(self.server.make_url('/')))
+            again = await client.fingerprint_site(str(self.server.make_url('/')))
+            redirected = await client.fingerprint_site(str(self.server.make_url('/moved')))
+
+        self.assertIs(again, first)
+        self.assertIs(redirected, first)
+        # The redirect is followed, but the page it lands on is not fetched again
+        self.assertEqual(self.requested, ['/', '/moved'])
+        self.assertEqual(client.metrics.cache_hits['homepages'], 1)
+
+    async def test_only_connection_failures_are_raised(self):
+        port = self.server.port
+        await self.server.close()
+        async with DataForSEOClient(cache=JsonCache(os.path.join(self.tmp_dir.name, 'cache.json'))) as client:
+            fingerprint, reachable = await client._fingerprint_reachable(f"http://127.0.0.1:{port}/")
+        self.assertIsNone(fingerprint)
+        self.assertFalse(reachable)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import asyncio
+import unittest
+from src.concurrency import AdaptiveLimiter
+
+
+class TestAdaptiveLimiter(unittest.IsolatedAsyncioTestCase):
+
+    async def run_work(self, limiter, jobs, latency=0.005):
+        peak = 0
+
+        async def job():
+            nonlocal peak
+            await limiter.acquire()
+            peak = max(peak, limiter.in_flight)
+            try:
+                await asyncio.sleep(latency)
+            finally:
+                limiter.release(latency)
+
+        await asyncio.gather(*(job() for _ in range(jobs)))
+        return peak
+
+    async def test_limit_caps_work_in_flight(self):
+        limiter = AdaptiveLimiter('test', initial=3, minimum=1, maximum=3)
+        self.assertEqual(await self.run_work(limiter, 20), 3)
+        self.assertEqual(limiter.in_flight, 0)
+
+    async def test_limit_grows_while_throughput_grows(self):
+        limiter = AdaptiveLimiter('test', initial=2, minimum=1, maximum=10)
+        await self.run_work(limiter, 300)
+        self.assertGreater(limiter.limit, 2)
+        self.assertLessEqual(limiter.limit, 10)
+
+    async def test_overload_halves_once_per_window(self):
+        limiter = AdaptiveLimiter('test', initial=8, minimum=1, maximum=10)
+        limiter.record_overload()
+        limiter.record_overload()
+        self.assertEqual(limiter.limit, 4)
+        self.assertEqual(limiter.snapshot()['decreases'], 1)
+        self.assertEqual(limiter.snapshot()['overloads'], 2)
+
+        for _ in range(4):
+            await limiter.acquire()
+        for _ in range(4):
+            limiter.release(0.1)
+        # A new window: the next overload counts again, down to the minimum
+        limiter.record_overload()
+        self.assertEqual(limiter.limit, 2)
+
+    async def test_overload_ratio_ignores_isolated_failures(self):
+        limiter = AdaptiveLimiter('test', initial=4, minimum=1, maximum=4, overload_ratio=0.5)
+        limiter.record_overload()
+        for _ in range(4):
+            await limiter.acquire()
+        for _ in range(4):
+            limiter.release(0.1)
+        self.assertEqual(limiter.limit, 4)
+
+        for _ in range(2):
+            limiter.record_overload()
+        for _ in range(4):
+            await limiter.acquire()
+        for _ in range(4):
+            limiter.release(0.1)
+        self.assertEqual(limiter.limit, 2)
+
+    async def test_cancelled_waiter_passes_its_wake_up_on(self):
+        limiter = AdaptiveLimiter('test', initial=1, minimum=1, maximum=1)
+        await limiter.acquire()
+        first = asyncio.create_task(limiter.acquire())
+        second = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        limiter.release()
+        first.cancel()
+        await asyncio.wait_for(second, 1)
+        self.assertEqual(limiter.in_flight, 1)
+
+    def test_bounds_are_checked(self):
+        with self.assertRaises(ValueError):
+            AdaptiveLimiter('test', initial=5, minimum=1, maximum=4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import gzip
+import unittest
+import zlib
+import brotli
+from src.content_decoder import StreamDecoder, sniff_charset
+
+PAGE = '<html><head><title>Café</title></head><body>' + 'ünïcode ' * 2000 + '</body></html>'
+
+
+def chunks(data, size=1000):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def decode(data, content_encoding=None, charset=None, size=1000):
+    decoder = StreamDecoder(content_encoding, charset)
+    for chunk in chunks(data, size):
+        decoder.feed(chunk)
+    return decoder.finish()
+
+
+class TestStreamDecoder(unittest.TestCase):
+
+    def test_compressed_bodies_decode_chunk_by_chunk(self):
+        raw = PAGE.encode('utf-8')
+        self.assertEqual(decode(gzip.compress(raw), 'gzip'), PAGE)
+        self.assertEqual(decode(brotli.compress(raw), 'br'), PAGE)
+        self.assertEqual(decode(zlib.compress(raw), 'deflate'), PAGE)
+        raw_deflate = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+        self.assertEqual(decode(raw_deflate.compress(raw) + raw_deflate.flush(), 'deflate'), PAGE)
+        # Multi-byte characters split across chunk boundaries
+        self.assertEqual(decode(raw, size=7), PAGE)
+
+    def test_mislabelled_body_is_read_as_sent(self):
+        self.assertEqual(decode(PAGE.encode('utf-8'), 'gzip'), PAGE)
+
+    def test_charset_from_headers_then_meta(self):
+        latin = PAGE.encode('latin-1')
+        self.assertEqual(decode(latin, charset='ISO-8859-1'), PAGE)
+
+        with_meta = b'<html><head><meta charset="windows-1252">' + 'Café'.encode('cp1252')
+        self.assertEqual(decode(with_meta), '<html><head><meta charset="windows-1252">Café')
+
+        # Undeclared latin-1 no longer fails the page
+        self.assertIn('Caf�', decode(latin))
+
+    def test_sniff_charset(self):
+        self.assertEqual(sniff_charset(b'<?xml version="1.0" encoding="ISO-8859-1"?><urlset>'), 'iso8859-1')
+        self.assertEqual(
+            sniff_charset(b'<meta http-equiv="Content-Type" content="text/html; charset=Shift_JIS">'), 'shift_jis')
+        self.assertEqual(sniff_charset(b'\xef\xbb\xbf<html>'), 'utf-8-sig')
+        self.assertIsNone(sniff_charset(b'<html><meta charset="no-such-charset">'))
+        self.assertIsNone(sniff_charset(b'<html>'))
+
+
+if __name__ == '__main__':
+    unittest.main()
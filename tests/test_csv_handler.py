@@ -0,0 +1,44 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import tempfile
+import unittest
+from src.csv_handler import iter_csv_chunks, read_csv
+
+HEADER = "firstName,lastName,email,companyName,title,website,phoneNumbers,linkedIn\n"
+
+
+class TestChunkedCsvReading(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'leads.csv')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write(self, text):
+        with open(self.path, 'w') as f:
+            f.write(text)
+
+    def test_chunks_cover_the_file_and_report_progress(self):
+        self.write(HEADER + ''.join(f"A,B,a@b.c,Org,CEO,https://site{i}.com,1555000{i},\n" for i in range(5)))
+        chunks = list(iter_csv_chunks(self.path, chunk_size=2))
+
+        self.assertEqual([len(leads) for leads, _ in chunks], [2, 2, 1])
+        self.assertEqual(chunks[-1][1], 1.0)
+        leads = [lead for chunk, _ in chunks for lead in chunk]
+        self.assertEqual(leads, read_csv(self.path))
+        self.assertEqual(leads[3].website_url, 'site3.com')
+        self.assertEqual(leads[3].phone_number, '15550003')
+
+    def test_missing_columns_are_reported(self):
+        self.write("firstName,website\nA,site.com\n")
+        with self.assertRaisesRegex(ValueError, 'last_name'):
+            list(iter_csv_chunks(self.path))
+        self.assertIsNone(read_csv(self.path))
+
+
+if __name__ == '__main__':
+    unittest.main()
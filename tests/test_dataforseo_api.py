@@ -0,0 +1,224 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import tempfile
+import unittest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from yarl import URL
+from src.cache import JsonCache
+from src.data_processor import DataForSEOClient
+from src.sitemap_frontier import SitemapFrontier
+
+
+class TestCanonicalOrigins(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        # The client's locks need the test's event loop, which only exists from here on
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.tmp_dir.name, 'cache.json')
+        self.client = DataForSEOClient(cache=JsonCache(self.cache_path))
+
+    async def asyncTearDown(self):
+        self.tmp_dir.cleanup()
+
+    async def test_later_requests_use_recorded_origin(self):
+        self.client._record_canonical_origin('https://example.com', URL('https://www.example.com/home'))
+        self.assertEqual(
+            self.client._canonical_url('http://example.com/sitemap.xml'),
+            'https://www.example.com/sitemap.xml'
+        )
+        self.assertEqual(self.client._canonical_url('unknown.com'), 'https://unknown.com')
+
+    async def test_first_origin_of_the_run_wins(self):
+        self.client._record_canonical_origin('https://example.com', URL('https://example.com/'))
+        self.client._record_canonical_origin('https://www.example.com', URL('https://www.example.com/'))
+        self.assertEqual(self.client._canonical_url('example.com'), 'https://example.com/')
+
+    async def test_origins_persist_across_runs(self):
+        self.client._record_canonical_origin('https://example.com', URL('https://www.example.com/'))
+        self.client.cache.save()
+
+        next_run = DataForSEOClient(cache=JsonCache(self.cache_path))
+        self.assertEqual(next_run._canonical_url('example.com/robots.txt'), 'https://www.example.com/robots.txt')
+
+
+def make_sitemap_app(documents, requests_log):
+    """Serve fixed documents with ETags, answering 304 when the ETag matches."""
+    async def handler(request):
+        body = documents.get(request.path)
+        if body is None:
+            response = web.Response(status=404)
+        else:
+            etag = f'"{abs(hash(body))}"'
+            if request.headers.get('If-None-Match') == etag:
+                response = web.Response(status=304, headers={'ETag': etag})
+            else:
+                response = web.Response(text=body, headers={'ETag': etag})
+        requests_log.append((request.path, response.status))
+        return response
+
+    app = web.Application()
+    app.router.add_get('/{tail:.*}', handler)
+    return app
+
+
+def urlset(*locs):
+    entries = ''.join(f"<url><loc>{loc}</loc></url>" for loc in locs)
+    return f'<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</urlset>'
+
+
+class TestConditionalSitemaps(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.tmp_dir.name, 'cache.json')
+        self.requests_log = []
+        self.documents = {}
+        self.server = TestServer(make_sitemap_app(self.documents, self.requests_log))
+        await self.server.start_server()
+        base = str(self.server.make_url('/'))
+        self.base = base.rstrip('/')
+        self.documents['/robots.txt'] = f"User-agent: *\nSitemap: {self.base}/sitemap_index.xml\n"
+        self.documents['/sitemap_index.xml'] = (
+            '<?xml version="1.0"?><sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+            f"<sitemap><loc>{self.base}/post-sitemap.xml</loc></sitemap>"
+            f"<sitemap><loc>{self.base}/page-sitemap.xml</loc></sitemap>"
+            '</sitemapindex>'
+        )
+        self.documents['/post-sitemap.xml'] = urlset('/a', '/b', '/c')
+        self.documents['/page-sitemap.xml'] = urlset('/about')
+
+    async def asyncTearDown(self):
+        await self.server.close()
+        self.tmp_dir.cleanup()
+
+    async def total_pages(self):
+        async with DataForSEOClient(cache=JsonCache(self.cache_path)) as client:
+            return await client.get_total_pages(self.base)
+
+    async def test_unchanged_sitemaps_reuse_stored_counts(self):
+        self.assertEqual((await self.total_pages())[0], 4)
+
+        self.documents['/page-sitemap.xml'] = urlset('/about', '/contact')
+        self.requests_log.clear()
+        self.assertEqual((await self.total_pages())[0], 5)
+        # Every document is revalidated, but only the changed child is re-sent
+        self.assertEqual(sorted(self.requests_log), [
+            ('/page-sitemap.xml', 200), ('/post-sitemap.xml', 304),
+            ('/robots.txt', 304), ('/sitemap_index.xml', 304)
+        ])
+
+    async def test_urls_in_several_sitemaps_are_counted_once(self):
+        self.documents['/page-sitemap.xml'] = urlset('/about', '/a', '/b')
+        self.assertEqual((await self.total_pages())[0], 4)
+
+    async def test_robots_sitemaps_skip_default_probes(self):
+        self.documents['/robots.txt'] = f"User-agent: *\r\nCrawl-delay: 0.01\r\nSitemap:{self.base}/sitemap_index.xml\r\n"
+        async with DataForSEOClient(cache=JsonCache(self.cache_path)) as client:
+            self.assertEqual((await client.get_total_pages(self.base))[0], 4)
+            robots, _ = await client.get_robots(self.base)
+            self.assertEqual(robots.crawl_delay, 0.01)
+            self.assertEqual(client.hosts.crawl_delay(client._host_key(URL(self.base).authority)), 0.01)
+
+        paths = [path for path, _ in self.requests_log]
+        self.assertEqual(paths.count('/robots.txt'), 1)
+        self.assertNotIn('/sitemap.xml', paths)
+        self.assertEqual(client.metrics.cache_hits['robots'], 1)
+
+    def paged_family(self):
+        """Ten Yoast pages: nine with 5 URLs and a last one with 2."""
+        pages = [f"{self.base}/post-sitemap{n if n > 1 else ''}.xml" for n in range(1, 11)]
+        self.documents['/sitemap_index.xml'] = (
+            '<?xml version="1.0"?><sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+            + ''.join(f"<sitemap><loc>{page}</loc></sitemap>" for page in pages)
+            + '</sitemapindex>'
+        )
+        for n, page in enumerate(pages, start=1):
+            locs = [f"/p{n}-{i}" for i in range(5 if n < 10 else 2)]
+            self.documents[URL(page).path] = urlset(*locs)
+        return [URL(page).path for page in pages]
+
+    async def test_paginated_families_are_estimated_from_samples(self):
+        self.paged_family()
+        async with DataForSEOClient(cache=JsonCache(self.cache_path)) as client:
+            total, status = await client.get_total_pages(self.base)
+            self.assertEqual(total, 47)
+            self.assertIn('estimated', status)
+            fetched = [path for path, _ in self.requests_log if 'post-sitemap' in path]
+            self.assertLess(len(fetched), 10)
+
+            self.assertEqual((await client.get_total_pages(self.base, exact=True))[0], 47)
+
+    async def test_unread_family_pages_widen_the_margin(self):
+        paths = self.paged_family()
+        del self.documents[paths[-1]]
+        self.assertEqual(await self.total_pages(), (47, "Total pages estimated from sitemaps (±3)"))
+
+        # No full page could be sampled: the default page size is a guess, not a bound
+        for path in paths[:-1]:
+            del self.documents[path]
+        self.documents[paths[-1]] = urlset('/last-1', '/last-2')
+        self.assertEqual(await self.total_pages(),
+                         (9002, "Total pages guessed from sitemap page sizes (margin unknown)"))
+
+    async def test_shared_sitemaps_are_fetched_once(self):
+        self.documents['/robots.txt'] = (f"Sitemap: {self.base}/sitemap_index.xml\n"
+                                         f"Sitemap: {self.base}/post-sitemap.xml\n"
+                                         f"Sitemap: {self.base}/news_index.xml\n")
+        self.documents['/news_index.xml'] = (
+            '<?xml version="1.0"?><sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+            f"<sitemap><loc>{self.base}/page-sitemap.xml</loc></sitemap>"
+            '</sitemapindex>'
+        )
+        self.assertEqual(await self.total_pages(), (4, "Total pages counted from sitemaps"))
+        paths = [path for path, _ in self.requests_log]
+        self.assertEqual(sorted(paths), ['/news_index.xml', '/page-sitemap.xml', '/post-sitemap.xml',
+                                         '/robots.txt', '/sitemap_index.xml'])
+
+    async def test_default_locations_are_parsed_as_probed(self):
+        del self.documents['/robots.txt']
+        self.assertEqual((await self.total_pages())[0], 4)
+        paths = [path for path, _ in self.requests_log]
+        self.assertEqual(paths.count('/sitemap_index.xml'), 1)
+        self.assertIn('/sitemap.xml', paths)
+
+    async def test_frontier_is_bounded_and_budgeted(self):
+        children = [f"{self.base}/s{i}.xml" for i in range(20)]
+        self.documents['/sitemap_index.xml'] = (
+            '<?xml version="1.0"?><sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+            + ''.join(f"<sitemap><loc>{child}</loc></sitemap>" for child in children)
+            + '</sitemapindex>'
+        )
+        for i, child in enumerate(children):
+            self.documents[URL(child).path] = urlset(f"/p{i}", "/shared")
+
+        async with DataForSEOClient(cache=JsonCache(self.cache_path)) as client:
+            conditional_get = client._conditional_get
+            active, peak = 0, 0
+
+            async def tracked_get(url, **kwargs):
+                nonlocal active, peak
+                active += 1
+                peak = max(peak, active)
+                try:
+                    return await conditional_get(url, **kwargs)
+                finally:
+                    active -= 1
+
+            client._conditional_get = tracked_get
+            frontier = SitemapFrontier(client, workers=3)
+            frontier.add(f"{self.base}/sitemap_index.xml")
+            self.assertEqual(await frontier.run(), (21, 0, False, False))
+            self.assertEqual(peak, 3)
+
+            # Revalidated sitemaps add their stored counts, shared URL included
+            frontier = SitemapFrontier(client, max_documents=6)
+            frontier.add(f"{self.base}/sitemap_index.xml")
+            total = await frontier.run()
+            self.assertEqual((frontier.fetched, total.urls, total.truncated), (6, 10, True))
+
+
+if __name__ == '__main__':
+    unittest.main()
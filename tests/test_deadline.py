@@ -0,0 +1,34 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import time
+import unittest
+from src.deadline import Deadline, DeadlineExceeded, current_deadline, stage_timeout
+
+
+class TestDeadline(unittest.TestCase):
+
+    def test_stage_timeout_is_clamped_to_remaining_budget(self):
+        token = current_deadline.set(Deadline(budget=5))
+        try:
+            self.assertLessEqual(stage_timeout(30).total, 5)
+            self.assertEqual(stage_timeout(2).total, 2)
+        finally:
+            current_deadline.reset(token)
+        self.assertEqual(stage_timeout(30).total, 30)
+
+    def test_paused_time_is_not_counted(self):
+        deadline = Deadline(budget=0.05)
+        deadline.pause()
+        time.sleep(0.1)
+        self.assertGreater(deadline.remaining(), 0)
+        deadline.resume()
+        time.sleep(0.1)
+        with self.assertRaises(DeadlineExceeded):
+            deadline.clamp(10)
+        self.assertTrue(deadline.exhausted)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import asyncio
+import unittest
+from unittest import mock
+from src.event_loop import new_event_loop, resolve_loop
+
+
+class TestEventLoop(unittest.TestCase):
+
+    def test_explicit_choices(self):
+        self.assertEqual(resolve_loop('asyncio'), 'asyncio')
+        with self.assertRaises(ValueError):
+            resolve_loop('trio')
+
+    def test_uvloop_falls_back_when_unavailable(self):
+        with mock.patch.dict(sys.modules, {'uvloop': None}):
+            with self.assertLogs('src.event_loop', 'WARNING'):
+                self.assertEqual(resolve_loop('uvloop'), 'asyncio')
+            self.assertEqual(resolve_loop('auto'), 'asyncio')
+
+    def test_auto_only_picks_uvloop_on_linux(self):
+        with mock.patch.object(sys, 'platform', 'win32'):
+            self.assertEqual(resolve_loop('auto'), 'asyncio')
+
+    def test_new_loop_runs_coroutines(self):
+        for kind in ('asyncio', 'auto'):
+            loop = new_event_loop(kind)
+            try:
+                self.assertEqual(loop.run_until_complete(asyncio.sleep(0, result=kind)), kind)
+            finally:
+                loop.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
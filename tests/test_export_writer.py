@@ -0,0 +1,71 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import tempfile
+import unittest
+import pandas as pd
+from src.export_writer import PART_SUFFIX, StreamingExport
+from src.records import Lead, SiteResult
+from src.result_store import ResultStore
+
+
+def lead(website):
+    return Lead.from_values('Ann', 'Lee', 'ann@example.com', 'Org, Inc', 'CEO', website, 15551234567.0, '')
+
+
+RESULTS = [
+    SiteResult('wp.com', cms='WordPress', cms_confidence=95, domain_rank=120, total_pages=50,
+               indexed_pages=40, backlinks=7, backlink_domains=3),
+    SiteResult('down.com'),
+    SiteResult('shop.com', cms='Shopify', cms_confidence=80, domain_rank=None, partial=True),
+    SiteResult('blog.com', cms='WordPress', cms_confidence=60, indexed_pending=True),
+]
+
+
+class TestStreamingExport(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.tmp_dir.name, 'leads_Out.csv')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def path(self, cms):
+        return os.path.join(self.tmp_dir.name, f"leads_Out_out_{cms}.csv")
+
+    def test_matches_the_export_from_the_store(self):
+        export = StreamingExport(self.output)
+        for result in RESULTS:
+            export.append(lead(result.website), result)
+        written = export.close()
+        self.assertEqual(sorted(written), sorted(self.path(cms) for cms in ('wordpress', 'errors', 'shopify')))
+        streamed = {path: pd.read_csv(path) for path in written}
+
+        store = ResultStore()
+        store.load_inputs([lead(result.website) for result in RESULTS])
+        for result in RESULTS:
+            store.set_result(result)
+        self.assertTrue(store.export(self.output))
+        for path, frame in streamed.items():
+            pd.testing.assert_frame_equal(frame, pd.read_csv(path))
+        self.assertFalse(any(name.endswith(PART_SUFFIX) for name in os.listdir(self.tmp_dir.name)))
+
+    def test_part_files_are_usable_while_running(self):
+        export = StreamingExport(self.output, flush_rows=2, flush_interval=3600)
+        export.append(lead('wp.com'), RESULTS[0])
+        part = self.path('wordpress') + PART_SUFFIX
+        self.assertEqual(os.path.getsize(part), 0)  # Still buffered
+
+        export.append(lead('down.com'), RESULTS[1])
+        self.assertEqual(pd.read_csv(part)['Website URL'].tolist(), ['wp.com'])
+        self.assertFalse(os.path.exists(self.path('wordpress')))
+
+        export.close()
+        self.assertEqual(export.rows, 2)
+        self.assertEqual(pd.read_csv(self.path('errors'))['CMS'].tolist(), ['Error'])
+
+
+if __name__ == '__main__':
+    unittest.main()
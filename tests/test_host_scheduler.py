@@ -0,0 +1,93 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import asyncio
+import unittest
+from src.host_scheduler import HostScheduler, HostUnavailableError
+from src.deadline import Deadline, current_deadline
+
+
+class TestHostScheduler(unittest.IsolatedAsyncioTestCase):
+
+    async def test_concurrency_is_capped_per_host(self):
+        scheduler = HostScheduler(limit=2)
+        active, peak = 0, 0
+
+        async def fetch():
+            nonlocal active, peak
+            async with scheduler.slot('example.com'):
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.01)
+                active -= 1
+
+        await asyncio.gather(*[fetch() for _ in range(6)])
+        self.assertEqual(peak, 2)
+
+    async def test_pending_requests_fail_fast_once_breaker_opens(self):
+        scheduler = HostScheduler(limit=1, failure_threshold=2)
+
+        async def fetch():
+            async with scheduler.slot('slow.com'):
+                await asyncio.sleep(0.01)
+                raise asyncio.TimeoutError()
+
+        results = await asyncio.gather(*[fetch() for _ in range(5)], return_exceptions=True)
+        self.assertEqual(sum(isinstance(r, asyncio.TimeoutError) for r in results), 2)
+        self.assertEqual(sum(isinstance(r, HostUnavailableError) for r in results), 3)
+        self.assertTrue(scheduler.is_open('slow.com'))
+
+    async def test_cancelled_half_open_trial_is_released(self):
+        scheduler = HostScheduler(limit=1, failure_threshold=1, reset_timeout=0)
+        scheduler.record_failure('slow.com')
+
+        async def hangs():
+            async with scheduler.slot('slow.com'):
+                await asyncio.sleep(60)
+
+        task = asyncio.create_task(hangs())
+        await asyncio.sleep(0)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        async with scheduler.slot('slow.com'):
+            pass
+        self.assertFalse(scheduler.is_open('slow.com'))
+
+    async def test_expired_deadlines_are_not_host_failures(self):
+        scheduler = HostScheduler(limit=1, failure_threshold=2)
+        token = current_deadline.set(Deadline(budget=0))
+        try:
+            for _ in range(3):
+                with self.assertRaises(asyncio.TimeoutError):
+                    async with scheduler.slot('slow.com'):
+                        raise asyncio.TimeoutError()
+        finally:
+            current_deadline.reset(token)
+        self.assertFalse(scheduler.is_open('slow.com'))
+        self.assertEqual(scheduler.timeouts, 0)
+
+    async def test_crawl_delay_spaces_request_starts(self):
+        scheduler = HostScheduler(limit=4)
+        scheduler.set_crawl_delay('polite.com', 0.05)
+        loop = asyncio.get_running_loop()
+        starts = []
+
+        async def fetch(host):
+            async with scheduler.slot(host):
+                starts.append((host, loop.time()))
+
+        await asyncio.gather(*[fetch('polite.com') for _ in range(3)], fetch('other.com'))
+        polite = [t for host, t in starts if host == 'polite.com']
+        self.assertGreaterEqual(polite[2] - polite[0], 0.095)
+        self.assertEqual(starts[0][0], 'polite.com')
+        self.assertEqual(starts[1][0], 'other.com')  # Other hosts are not held up
+        self.assertEqual(scheduler.delayed, 2)
+
+        scheduler.set_crawl_delay('polite.com', 3600)
+        self.assertEqual(scheduler.crawl_delay('polite.com'), 10)  # Capped at CRAWL_DELAY_MAX
+
+
+if __name__ == '__main__':
+    unittest.main()
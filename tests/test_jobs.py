@@ -0,0 +1,148 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import asyncio
+import json
+import tempfile
+import unittest
+from urllib.parse import urlparse
+from src.cache import JsonCache
+from src.data_processor import DataForSEOClient
+from src.gui.worker import Worker
+from src.jobs import JobStore, PROGRESS_FILE, canonical_domain, job_id, job_settings
+from src.records import Lead, SiteResult
+
+
+def result(website, **values):
+    return SiteResult(website=website, cms='WordPress', cms_confidence=90, domain_rank=120, **values)
+
+
+class TestJobIdentity(unittest.TestCase):
+
+    def test_same_domain_set_is_the_same_job(self):
+        settings = job_settings('live')
+        self.assertEqual(canonical_domain('https://WWW.Example.com/about'), 'example.com')
+        self.assertEqual(
+            job_id(['a.com', 'https://www.b.com/', 'a.com'], settings),
+            job_id(['http://B.com', 'a.com'], settings)
+        )
+        self.assertNotEqual(job_id(['a.com'], settings), job_id(['a.com', 'c.com'], settings))
+        self.assertNotEqual(job_id(['a.com'], settings), job_id(['a.com'], job_settings('standard')))
+
+
+class TestJobStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.settings = job_settings('live')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def store(self, settings=None, **kwargs):
+        return JobStore(settings or self.settings, self.tmp_dir.name, **kwargs)
+
+    def test_progress_is_keyed_by_domain(self):
+        first = self.store()
+        first.record(result('www.a.com'))
+        first.record(result('b.com', partial=True))  # Cut short, so tried again
+        first.record(result('e.com', indexed_pending=True))  # Indexed pages deferred to a later run
+        first.record(SiteResult(website='c.com'))  # Unreachable
+        first.flush()
+
+        # A re-sorted superset of the list: only the new domains are left to do
+        again = self.store()
+        websites = ['d.com', 'c.com', 'b.com', 'e.com', 'http://a.com']
+        self.assertEqual(again.finished(websites), 1)
+        reused = again.result('a.com', 'https://linkedin.com/company/a')
+        self.assertEqual((reused.website, reused.linkedin_url, reused.cms, reused.domain_rank),
+                         ('a.com', 'https://linkedin.com/company/a', 'WordPress', 120))
+        self.assertIsNone(again.result('b.com'))
+        self.assertIsNone(again.result('e.com'))
+
+        # Other settings keep their own progress
+        self.assertEqual(len(self.store(job_settings('standard'))), 0)
+
+    def test_jobs_coexist(self):
+        store = self.store()
+        store.record(result('a.com'))
+        small = store.save_job(['a.com'])
+        large = store.save_job(['a.com', 'b.com'])
+        self.assertNotEqual(small, large)
+        with open(os.path.join(store.path, f"{large}.json")) as f:
+            manifest = json.load(f)
+        self.assertEqual((manifest['domains'], manifest['finished']), (2, 1))
+        self.assertTrue(os.path.exists(os.path.join(store.path, f"{small}.json")))
+
+    def test_torn_and_expired_lines_are_skipped(self):
+        store = self.store()
+        store.record(result('a.com'))
+        store.flush()
+        path = os.path.join(store.path, PROGRESS_FILE)
+        with open(path, 'a') as f:
+            f.write('{"domain": "b.com", "fin')
+
+        store = self.store()
+        self.assertEqual(len(store), 1)
+        store.record(result('c.com'))
+        store.flush()
+        self.assertEqual(len(self.store()), 2)
+        self.assertEqual(len(self.store(ttl_days=-1)), 0)
+
+    def test_forget_starts_over(self):
+        store = self.store()
+        store.record(result('a.com'))
+        store.flush()
+        store = self.store()
+        store.forget()
+        self.assertIsNone(store.result('a.com'))
+
+
+class TestFailedLookups(unittest.IsolatedAsyncioTestCase):
+
+    async def test_results_from_an_open_breaker_are_not_stored(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            client = DataForSEOClient(cache=JsonCache(os.path.join(tmp_dir, 'cache.json')), mode='live')
+            breaker = client.retry_engine.breaker(urlparse(client.BASE_URL).netloc)
+            while not breaker.is_open:
+                breaker.record_failure()
+
+            async def page_data(url, priority=None):
+                return {'total_pages': 12, 'indexed_pages': 10, 'status': '', 'lookup_failed': False}
+
+            client.get_page_data = page_data
+            async with client:
+                data = client.empty_result()
+                data.update(cms='WordPress', cms_confidence=90)
+                data = await client.enrich_website_data('wp.com', data)
+            self.assertTrue(data['lookup_failed'])
+            self.assertEqual((data['domain_rank'], data['backlinks']), (None, 0))
+
+            store = JobStore(job_settings('live'), tmp_dir)
+            store.record(SiteResult.from_client('wp.com', None, data))
+            store.flush()
+            self.assertIsNone(JobStore(job_settings('live'), tmp_dir).result('wp.com'))
+
+
+class TestWorkerRows(unittest.TestCase):
+
+    def test_finished_domains_are_reported_not_processed(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store = JobStore(job_settings('live'), tmp_dir)
+            store.record(result('b.com'))
+            data = [Lead(website_url='https://a.com'), Lead(website_url='https://www.b.com', linkedin_url='li'),
+                    Lead(website_url='c.com')]
+            worker = Worker(data, jobs=store)
+            reused = []
+
+            async def collect():
+                return [index async for index, _ in worker.rows(on_reused=lambda lead, stored: reused.append(stored))]
+
+            self.assertEqual(asyncio.run(collect()), [0, 2])
+            self.assertEqual([(r.website, r.linkedin_url) for r in reused], [('www.b.com', 'li')])
+            self.assertEqual(worker.reused, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
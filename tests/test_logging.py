@@ -0,0 +1,75 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import logging
+import tempfile
+import unittest
+from unittest import mock
+from src import utils
+from src.utils import DomainFilter, RepeatFilter, log_domain, setup_logging
+
+
+def record(msg, *args, level=logging.INFO):
+    return logging.LogRecord('test', level, __file__, 1, msg, args, None)
+
+
+class TestLogFilters(unittest.TestCase):
+
+    def test_records_carry_the_current_domain(self):
+        token = log_domain.set('example.com')
+        try:
+            rec = record("Fetching %s", 'https://example.com')
+            DomainFilter().filter(rec)
+            self.assertEqual(rec.domain, 'example.com')
+        finally:
+            log_domain.reset(token)
+        rec = record("No domain")
+        DomainFilter().filter(rec)
+        self.assertEqual(rec.domain, '-')
+
+    def test_repeated_templates_are_sampled(self):
+        repeat = RepeatFilter(burst=2, window=10)
+        passed = [repeat.filter(record("Found %s URLs", n)) for n in range(5)]
+        self.assertEqual(passed, [True, True, False, False, False])
+        # Errors and other templates are never dropped
+        self.assertTrue(repeat.filter(record("Failed %s", 1, level=logging.ERROR)))
+        self.assertTrue(repeat.filter(record("Other %s", 1)))
+
+        with mock.patch('src.utils.time.monotonic', return_value=10 ** 9):
+            rec = record("Found %s URLs", 99)
+            self.assertTrue(repeat.filter(rec))
+        self.assertEqual(rec.getMessage(), "Found 99 URLs (3 similar messages suppressed)")
+
+
+class TestSetupLogging(unittest.TestCase):
+
+    def tearDown(self):
+        utils._stop_listener()
+        root_logger = logging.getLogger()
+        for handler in root_logger.handlers[:]:
+            root_logger.removeHandler(handler)
+
+    def test_each_run_starts_a_fresh_rotating_file(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            log_path = os.path.join(tmp_dir, 'leads.log')
+            logger = logging.getLogger('test_logging')
+            logger.setLevel(logging.INFO)
+
+            setup_logging(log_path)
+            logger.info("first run %s", 1)
+            setup_logging(log_path)
+            logger.info("second run %s", 2)
+            utils._stop_listener()
+
+            with open(log_path) as f:
+                current = f.read()
+            with open(log_path + '.1') as f:
+                previous = f.read()
+            self.assertIn("[-] second run 2", current)
+            self.assertNotIn("first run", current)
+            self.assertIn("first run 1", previous)
+
+
+if __name__ == '__main__':
+    unittest.main()
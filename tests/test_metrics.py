@@ -0,0 +1,70 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import tempfile
+import unittest
+from aiohttp.test_utils import TestServer
+from src.cache import JsonCache
+from src.data_processor import DataForSEOClient
+from src.metrics import RunMetrics, metrics_path, write_report
+from tests.mock_dataforseo import MockDataForSEO
+
+
+class TestRunMetrics(unittest.TestCase):
+
+    def test_report_totals(self):
+        metrics = RunMetrics('live', sample_interval=0, slowest=2)
+        for domain, triage, enrich in [('a.com', 1.0, 5.0), ('b.com', 0.5, 0.0), ('c.com', 2.0, 9.0)]:
+            stages = {'triage': triage}
+            if enrich:
+                stages['enrich'] = enrich
+            metrics.record_domain(domain, stages)
+        for _ in range(3):
+            metrics.record_api_call('backlinks_summary')
+        metrics.record_cache('cse_results', True)
+        metrics.record_cache('cse_results', False)
+        metrics.record_cache('cse_results', False)
+        metrics.record_cache('cse_results', False)
+
+        report = metrics.report(retries={'total_retries': 0})
+        self.assertEqual(report['domains_completed'], 3)
+        self.assertEqual(report['stages']['enrich'], {'domains': 2, 'seconds': 14.0, 'mean_seconds': 7.0})
+        self.assertEqual([d['domain'] for d in report['slowest_domains']], ['c.com', 'a.com'])
+        self.assertEqual(report['api_calls']['backlinks_summary'], {'calls': 3, 'cost': 0.06})
+        self.assertEqual(report['caches']['cse_results']['hit_rate'], 0.25)
+        self.assertEqual(report['throughput'][-1]['completed'], 3)
+        self.assertEqual(report['retries'], {'total_retries': 0})
+
+    def test_report_is_written_next_to_the_output(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = metrics_path(os.path.join(tmp_dir, 'leads_Out.csv'))
+            self.assertTrue(path.endswith('leads_Out_metrics.json'))
+            write_report(RunMetrics().report(), path)
+            with open(path) as f:
+                self.assertEqual(json.load(f)['domains_completed'], 0)
+
+
+class TestClientCounters(unittest.IsolatedAsyncioTestCase):
+
+    async def test_api_calls_and_bytes_are_counted(self):
+        mock = MockDataForSEO()
+        server = TestServer(mock.app())
+        await server.start_server()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            client = DataForSEOClient(cache=JsonCache(os.path.join(tmp_dir, 'cache.json')), mode='live')
+            client.BASE_URL = str(server.make_url('/v3'))
+            async with client:
+                await client.get_backlink_data('alpha.com')
+        await server.close()
+
+        report = client.metrics.report()
+        self.assertEqual(report['api_calls']['backlinks_summary']['calls'], 1)
+        self.assertGreater(report['bytes_received'], 0)
+        self.assertEqual(set(report['concurrency']), {'scrape', 'api'})
+        self.assertEqual(report['throughput'][-1]['concurrency']['api'], client.api_limiter.limit)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import asyncio
+import unittest
+from src.concurrency import AdaptiveLimiter
+from src.pipeline import TwoStagePipeline
+from src.records import Lead
+
+
+class FakeClient:
+    def __init__(self, wordpress):
+        self.wordpress = wordpress
+        self.enriched = []
+
+    def empty_result(self):
+        return {'cms': 'Error', 'domain_rank': None}
+
+    async def detect_cms(self, url, deadline=None):
+        await asyncio.sleep(0)
+        result = self.empty_result()
+        if url in self.wordpress:
+            result['cms'] = 'WordPress'
+        return result
+
+    async def enrich_website_data(self, url, result, deadline=None):
+        if url == 'broken.com':
+            raise RuntimeError("boom")
+        self.enriched.append(url)
+        result['domain_rank'] = 42
+        return result
+
+
+class TestTwoStagePipeline(unittest.IsolatedAsyncioTestCase):
+
+    async def test_only_wordpress_sites_are_enriched(self):
+        client = FakeClient(wordpress={'wp.com', 'broken.com'})
+        rows = [Lead(website_url=url) for url in ['https://wp.com', 'other.com', 'broken.com']]
+        results = {}
+
+        pipeline = TwoStagePipeline(
+            client,
+            on_result=lambda job: results.__setitem__(job.website, job.result),
+            triage_queue_size=1,
+            enrich_queue_size=1,
+            enrich_rate=1000
+        )
+        await pipeline.run(enumerate(rows))
+
+        self.assertEqual(client.enriched, ['wp.com'])
+        self.assertEqual(results['wp.com']['domain_rank'], 42)
+        self.assertEqual(results['other.com']['cms'], 'Error')
+        # A failing enrichment still emits a result for the row
+        self.assertEqual(results['broken.com']['cms'], 'WordPress')
+        self.assertEqual(pipeline.stats['triage']['completed'], 3)
+        self.assertEqual(pipeline.stats['enrich']['completed'], 1)
+        self.assertEqual(pipeline.stats['enrich']['failed'], 1)
+
+    async def test_stop_prevents_further_rows(self):
+        client = FakeClient(wordpress=set())
+        results = []
+        pipeline = TwoStagePipeline(
+            client,
+            on_result=results.append,
+            should_continue=lambda: len(results) < 1,
+            triage_concurrency=1,
+            triage_queue_size=1
+        )
+        await pipeline.run(enumerate(Lead(website_url=f"site{i}.com") for i in range(50)))
+        self.assertLess(len(results), 50)
+
+    async def test_rows_can_arrive_while_running(self):
+        client = FakeClient(wordpress={'late.com'})
+        results = []
+
+        async def rows():
+            yield 0, Lead(website_url='early.com')
+            await asyncio.sleep(0.01)  # The next chunk is still loading
+            yield 1, Lead(website_url='late.com')
+
+        pipeline = TwoStagePipeline(client, on_result=results.append, enrich_rate=1000)
+        await pipeline.run(rows())
+        self.assertEqual(sorted(job.website for job in results), ['early.com', 'late.com'])
+        self.assertEqual(client.enriched, ['late.com'])
+
+    async def test_adaptive_limiter_sets_stage_concurrency(self):
+        client = FakeClient(wordpress=set())
+        limiter = AdaptiveLimiter('scrape', initial=2, minimum=1, maximum=5)
+        peak = 0
+
+        async def detect_cms(url, deadline=None):
+            nonlocal peak
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.001)
+            return client.empty_result()
+
+        client.detect_cms = detect_cms
+        pipeline = TwoStagePipeline(client, on_result=lambda job: None, triage_limiter=limiter)
+        await pipeline.run(enumerate(Lead(website_url=f"site{i}.com") for i in range(100)))
+
+        self.assertEqual(pipeline.stats['triage']['completed'], 100)
+        self.assertLessEqual(peak, 5)
+        self.assertEqual(pipeline.stats['triage']['limit'], limiter.limit)
+        self.assertEqual(limiter.in_flight, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
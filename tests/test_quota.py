@@ -0,0 +1,85 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import tempfile
+import unittest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from src.cache import JsonCache
+from src.data_processor import DataForSEOClient
+from src.quota import CSEQuotaManager
+from src.retry import RetryPolicy
+
+
+class TestCSEQuotaManager(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'cache.json')
+        self.cache = JsonCache(self.path)
+        self.quota = CSEQuotaManager(self.cache, daily_quota=3, reserve=1, priority_min_rank=100)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_reserve_is_kept_for_high_rank_domains(self):
+        self.assertTrue(self.quota.try_acquire(10))
+        self.assertTrue(self.quota.try_acquire(10))
+        # Only the reserved query is left
+        self.assertFalse(self.quota.try_acquire(10))
+        self.assertTrue(self.quota.try_acquire(500))
+        self.assertFalse(self.quota.try_acquire(500))
+        self.assertEqual(self.quota.remaining, 0)
+
+    def test_usage_and_pending_survive_a_new_run(self):
+        self.quota.try_acquire()
+        self.quota.defer('low.com', 5)
+        self.quota.defer('high.com', 300)
+        self.quota.store_total('done.com', 42)
+        self.cache.save()
+
+        quota = CSEQuotaManager(JsonCache(self.path), daily_quota=3, reserve=1)
+        self.assertEqual(quota.remaining, 2)
+        self.assertEqual(quota.pending_by_priority(), [('high.com', 300), ('low.com', 5)])
+        self.assertEqual(quota.cached_total('done.com'), 42)
+
+        quota.store_total('high.com', 7)
+        self.assertEqual(quota.pending_by_priority(), [('low.com', 5)])
+
+    def test_cached_totals_expire(self):
+        quota = CSEQuotaManager(self.cache, ttl_days=0)
+        quota.store_total('old.com', 9)
+        self.assertIsNone(quota.cached_total('old.com'))
+
+    def test_mark_exhausted_stops_lookups_for_the_day(self):
+        self.quota.mark_exhausted()
+        self.assertFalse(self.quota.try_acquire(1000))
+
+
+class TestIndexedPagesQuota(unittest.IsolatedAsyncioTestCase):
+
+    async def test_every_attempt_counts_against_the_quota(self):
+        responses = [web.Response(status=503), web.json_response({'searchInformation': {'totalResults': '42'}})]
+
+        async def handler(request):
+            return responses.pop(0)
+
+        app = web.Application()
+        app.router.add_get('/customsearch/v1', handler)
+        server = TestServer(app)
+        await server.start_server()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            client = DataForSEOClient(cache=JsonCache(os.path.join(tmp_dir, 'cache.json')))
+            client.GOOGLE_CSE_URL = str(server.make_url('/customsearch/v1'))
+            client.google_api_key, client.google_cse_id = 'key', 'cx'
+            client.retry_engine.policies['google_cse'] = RetryPolicy(initial_delay=0, max_delay=0)
+            remaining = client.cse_quota.remaining
+            async with client:
+                self.assertEqual(await client.get_indexed_pages('example.com'), 42)
+            self.assertEqual(remaining - client.cse_quota.remaining, 2)
+        await server.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,26 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import unittest
+from dataclasses import asdict
+from src.records import Lead, SiteResult
+
+
+class TestSlottedRecords(unittest.TestCase):
+
+    def test_records_have_slots_and_keep_their_defaults(self):
+        result = SiteResult('example.com', cms='WordPress')
+        self.assertFalse(hasattr(result, '__dict__'))
+        with self.assertRaises(AttributeError):
+            result.extra = 1
+        self.assertEqual(asdict(result)['total_pages'], 0)
+        self.assertIsNone(Lead(website_url='example.com').email)
+
+    def test_positional_fields_keep_their_order(self):
+        result = SiteResult('example.com', '', 'WordPress', 120, 50, 40, 7, 3)
+        self.assertEqual((result.domain_rank, result.backlink_domains, result.cms_confidence), (120, 3, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
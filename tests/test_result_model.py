@@ -0,0 +1,66 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import unittest
+from PyQt6.QtCore import QCoreApplication, Qt
+from src.records import Lead, SiteResult
+from src.result_store import ResultStore
+from src.gui.result_model import ResultTableModel, ResultFilterProxyModel
+
+DOMAIN_RANK = 9
+INDEXED_PAGES = 11
+
+
+class TestResultTableModel(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QCoreApplication([])
+
+    def setUp(self):
+        self.store = ResultStore()
+        self.store.load_inputs([Lead(website_url=f"site{i}.com") for i in range(6)])
+        self.model = ResultTableModel(self.store)
+        self.changes = []
+        self.model.dataChanged.connect(lambda top, bottom, roles: self.changes.append((top.row(), bottom.row())))
+
+    def cell(self, row, column):
+        return self.model.data(self.model.index(row, column))
+
+    def test_cells_read_from_the_store(self):
+        self.store.set_result(SiteResult('site1.com', cms='WordPress', domain_rank=None,
+                                         indexed_pages=None, indexed_pending=True))
+        self.assertEqual(self.model.rowCount(), 6)
+        self.assertEqual(self.cell(1, 5), 'site1.com')
+        self.assertEqual(self.cell(1, DOMAIN_RANK), 'N/A')
+        self.assertEqual(self.cell(1, INDEXED_PAGES), 'pending')
+        # Unprocessed rows stay blank
+        self.assertEqual(self.cell(0, DOMAIN_RANK), '')
+
+    def test_updates_are_batched_into_one_signal(self):
+        for row in (4, 1, 2):
+            self.model.mark_rows_changed([row])
+        self.assertEqual(self.changes, [])
+        self.model.flush()
+        self.assertEqual(self.changes, [(1, 4)])
+        self.model.flush()
+        self.assertEqual(len(self.changes), 1)
+
+    def test_proxy_sorts_numbers_and_filters_text(self):
+        for i, rank in enumerate([100, 9, 40]):
+            self.store.set_result(SiteResult(f"site{i}.com", cms='WordPress', domain_rank=rank))
+        proxy = ResultFilterProxyModel()
+        proxy.setSourceModel(self.model)
+
+        proxy.sort(DOMAIN_RANK, Qt.SortOrder.DescendingOrder)
+        ranks = [proxy.data(proxy.index(row, DOMAIN_RANK)) for row in range(3)]
+        self.assertEqual(ranks, ['100', '40', '9'])
+
+        proxy.setFilterFixedString('SITE2')
+        self.assertEqual(proxy.rowCount(), 1)
+        self.assertEqual(proxy.data(proxy.index(0, 5)), 'site2.com')
+
+
+if __name__ == '__main__':
+    unittest.main()
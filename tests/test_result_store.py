@@ -0,0 +1,46 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import tempfile
+import unittest
+import pandas as pd
+from src.records import Lead, SiteResult
+from src.result_store import ResultStore
+
+
+def lead(website):
+    # Cells as pandas reads them: the phone number comes back as a float
+    return Lead.from_values('Ann', 'Lee', 'ann@example.com', 'Org', 'CEO', website, 15551234567.0, '')
+
+
+class TestResultStore(unittest.TestCase):
+
+    def setUp(self):
+        self.store = ResultStore()
+        self.store.load_inputs([lead('wp.com'), lead('other.com'), lead('pending.com')])
+        self.store.set_result(SiteResult('wp.com', cms='WordPress', domain_rank=120, total_pages=50,
+                                         indexed_pages=40, backlinks=7, backlink_domains=3))
+        self.store.set_result(SiteResult('other.com'))
+
+    def test_frame_keeps_numeric_types(self):
+        df = self.store.to_frame()
+        self.assertEqual(str(df['Domain Rank'].dtype), 'Int64')
+        self.assertEqual(df['Domain Rank'].tolist()[0], 120)
+        self.assertTrue(pd.isna(df['Domain Rank'][1]))
+        self.assertEqual(df['Phone Number'][0], '15551234567')
+
+    def test_export_partitions_by_cms(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output = os.path.join(tmp_dir, 'leads_Out.csv')
+            for file_format, ext in [('csv', '.csv'), ('parquet', '.parquet'), ('arrow', '.arrow')]:
+                self.assertTrue(self.store.export(output, file_format))
+                for cms in ('wordpress', 'errors', 'unknown'):
+                    self.assertTrue(os.path.exists(os.path.join(tmp_dir, f"leads_Out_out_{cms}{ext}")))
+
+            wp = pd.read_parquet(os.path.join(tmp_dir, 'leads_Out_out_wordpress.parquet'))
+            self.assertEqual(wp['Total Pages'].tolist(), [50])
+
+
+if __name__ == '__main__':
+    unittest.main()
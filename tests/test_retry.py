@@ -0,0 +1,120 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import asyncio
+import unittest
+from aiohttp import ClientConnectionError
+from src.retry import RetryEngine, RetryPolicy, CircuitBreaker, CircuitOpenError, RetryableError, parse_retry_after
+from src.utils import ServiceError
+from src.deadline import Deadline, DeadlineExceeded, current_deadline
+
+
+class TestRetryEngine(unittest.IsolatedAsyncioTestCase):
+
+    def engine(self, **policy):
+        return RetryEngine({'api': RetryPolicy(initial_delay=0, max_delay=0, **policy)})
+
+    async def test_transient_errors_are_retried(self):
+        engine = self.engine(max_attempts=3)
+        attempts = []
+
+        async def flaky():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise ClientConnectionError("reset")
+            return 'ok'
+
+        self.assertEqual(await engine.call('api', 'example.com', flaky), 'ok')
+        self.assertEqual(engine.summary()['total_retries'], 2)
+
+    async def test_non_transient_errors_are_not_retried(self):
+        engine = self.engine(max_attempts=3)
+        attempts = []
+
+        async def broken():
+            attempts.append(1)
+            raise ValueError("bad payload")
+
+        with self.assertRaises(ValueError):
+            await engine.call('api', 'example.com', broken)
+        self.assertEqual(len(attempts), 1)
+
+    async def test_budget_limits_retries_across_calls(self):
+        engine = self.engine(max_attempts=5, budget=1)
+
+        async def failing():
+            raise RetryableError("busy")
+
+        with self.assertRaises(ServiceError):
+            await engine.call('api', 'example.com', failing)
+        self.assertEqual(engine.stats['api'].retries, 1)
+
+    async def test_open_breaker_rejects_calls(self):
+        engine = self.engine(max_attempts=1)
+        engine.breakers['example.com'] = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+
+        async def failing():
+            raise asyncio.TimeoutError()
+
+        for _ in range(2):
+            with self.assertRaises(ServiceError):
+                await engine.call('api', 'example.com', failing)
+        with self.assertRaises(CircuitOpenError):
+            await engine.call('api', 'example.com', failing)
+        self.assertEqual(engine.summary()['open_breakers'], ['example.com'])
+
+    async def test_expired_deadlines_leave_the_breaker_closed(self):
+        engine = self.engine(max_attempts=3)
+        engine.breakers['api.example.com'] = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+
+        async def out_of_time():
+            raise DeadlineExceeded("Domain time budget exhausted")
+
+        async def cut_short():
+            raise asyncio.TimeoutError()
+
+        for request in [out_of_time, out_of_time, cut_short, cut_short]:
+            token = current_deadline.set(Deadline(budget=0))
+            try:
+                with self.assertRaises(asyncio.TimeoutError):
+                    await engine.call('api', 'api.example.com', request)
+            finally:
+                current_deadline.reset(token)
+        self.assertFalse(engine.breakers['api.example.com'].is_open)
+        self.assertEqual((engine.stats['api'].timeouts, engine.stats['api'].retries), (0, 0))
+
+    async def test_half_open_trial_is_released_without_a_verdict(self):
+        engine = self.engine(max_attempts=1)
+        breaker = engine.breakers['example.com'] = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+
+        async def refused():
+            raise ValueError("bad payload")
+
+        async def hangs():
+            await asyncio.sleep(60)
+
+        with self.assertRaises(ValueError):
+            await engine.call('api', 'example.com', refused)
+        task = asyncio.create_task(engine.call('api', 'example.com', hangs))
+        await asyncio.sleep(0)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+
+        async def ok():
+            return 'ok'
+
+        # The host still gets its trial, and success closes the breaker
+        self.assertEqual(await engine.call('api', 'example.com', ok), 'ok')
+        self.assertFalse(breaker.is_open)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after('7'), 7.0)
+        self.assertEqual(parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'), 0.0)
+        self.assertIsNone(parse_retry_after('soon'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import unittest
+from src.robots import RobotsTxt, parse_robots_txt
+
+BASE = 'https://example.com/robots.txt'
+
+
+class TestParseRobotsTxt(unittest.TestCase):
+
+    def test_sitemaps_in_any_spelling(self):
+        text = ('\ufeffUser-agent: *\r\nDisallow: /wp-admin/\r\n'
+                'Sitemap:https://example.com/sitemap_index.xml\r\n'
+                'SITEMAP :  https://example.com/news.xml   # news\r\n'
+                'sitemap: /relative.xml\r\n'
+                'Sitemap: https://example.com/sitemap_index.xml\r\n')
+        self.assertEqual(parse_robots_txt(text, BASE).sitemaps, (
+            'https://example.com/sitemap_index.xml',
+            'https://example.com/news.xml',
+            'https://example.com/relative.xml',
+        ))
+
+    def test_crawl_delay_from_our_group(self):
+        text = ('User-agent: Googlebot\nCrawl-delay: 1\n\n'
+                'User-agent: Bingbot\nUser-agent: *\nDisallow: /private\nCrawl-delay: 2.5\n\n'
+                'User-agent: Slurp\nCrawl-delay: 30\n')
+        self.assertEqual(parse_robots_txt(text).crawl_delay, 2.5)
+        self.assertEqual(parse_robots_txt(text, user_agent='GoogleBot').crawl_delay, 1)
+
+    def test_bad_or_missing_values(self):
+        self.assertEqual(parse_robots_txt(None), RobotsTxt())
+        self.assertEqual(parse_robots_txt('Crawl-delay: 5\nUser-agent: *\nCrawl-delay: soon\n'), RobotsTxt())
+        self.assertEqual(parse_robots_txt('<html>Not found</html>'), RobotsTxt())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import asyncio
+import tempfile
+import unittest
+from aiohttp.test_utils import TestServer
+from src.cache import JsonCache
+from src.data_processor import DataForSEOClient
+from src.task_queue import StandardTaskQueue
+from tests.mock_dataforseo import MockDataForSEO
+
+DOMAINS = ['alpha.com', 'beta.com', 'gamma.com', 'delta.com', 'epsilon.com']
+
+
+class TestStandardTaskQueue(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.mock = MockDataForSEO(ready_after=2)
+        self.server = TestServer(self.mock.app())
+        await self.server.start_server()
+        self.base_url = str(self.server.make_url('/v3'))
+
+    async def asyncTearDown(self):
+        await self.server.close()
+        self.tmp_dir.cleanup()
+
+    def make_client(self, mode):
+        client = DataForSEOClient(cache=JsonCache(os.path.join(self.tmp_dir.name, 'cache.json')), mode=mode)
+        client.BASE_URL = self.base_url
+        if mode == 'standard':
+            client.task_queue = StandardTaskQueue(client, post_batch_size=3, flush_interval=0.01,
+                                                  poll_min=0.01, poll_max=0.05)
+        return client
+
+    async def backlinks(self, client):
+        async with client:
+            return await asyncio.gather(*(client.get_backlink_data(domain) for domain in DOMAINS))
+
+    async def test_queue_matches_live_results(self):
+        live = await self.backlinks(self.make_client('live'))
+        queued = await self.backlinks(self.make_client('standard'))
+        self.assertEqual(queued, live)
+        self.assertEqual(self.mock.requests[('backlinks/summary', 'live')], len(DOMAINS))
+
+    async def test_tasks_are_posted_in_batches(self):
+        client = self.make_client('standard')
+        await self.backlinks(client)
+        # Five tasks with a batch size of three: one full batch, one flushed by the timer
+        self.assertEqual(self.mock.requests[('backlinks/summary', 'task_post')], 2)
+        self.assertEqual(self.mock.requests[('backlinks/summary', 'task_get')], len(DOMAINS))
+        self.assertEqual(client.task_queue.stats.completed, len(DOMAINS))
+        self.assertFalse(self.mock.tasks)
+
+    async def test_poll_interval_backs_off_while_nothing_is_ready(self):
+        self.mock.ready_after = 4
+        client = self.make_client('standard')
+        queue = client.task_queue
+        intervals = []
+        original = queue._ready_ids
+
+        async def record(path, endpoint_name):
+            intervals.append(queue.poll_interval)
+            return await original(path, endpoint_name)
+
+        queue._ready_ids = record
+        async with client:
+            rank = await client._api_call('domain_analytics/technologies/domain_technologies',
+                                          [{'target': 'alpha.com', 'limit': 1}], 'domain_technologies')
+        self.assertEqual(rank[0]['domain'], 'alpha.com')
+        self.assertEqual(intervals[:3], sorted(intervals[:3]))
+        self.assertGreater(intervals[2], intervals[0])
+
+
+if __name__ == '__main__':
+    unittest.main()